@@ -0,0 +1,149 @@
+import contextlib
+import contextvars
+import logging
+import random
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+logger = logging.getLogger(__name__)
+
+# Read-replica routing.
+#
+# Writes always go to the primary ('default'). Read-heavy endpoints ask
+# read_connection(user_id) for a connection, which is a replica listed in
+# DATABASE_REPLICAS unless
+#   - the user wrote within REPLICA_STICKY_SECONDS (mark_recent_write is
+#     called from bump_data_version, i.e. after every committed write), so
+#     users always read their own writes, or
+#   - no replica is within REPLICA_MAX_LAG_SECONDS of the primary.
+# REPLICA_STICKY_SECONDS must exceed REPLICA_MAX_LAG_SECONDS for the first
+# rule to hold. ORM queries follow the same choice inside use_replica().
+#
+# The sticky marker lives in the default cache; with several worker
+# processes that must be a shared backend, as for the data versions.
+
+STICKY_KEY = "db_recent_write:{user_id}"
+LAG_CHECK_SECONDS = 1.0
+
+_read_alias = contextvars.ContextVar('read_alias', default=None)
+_lag = {}
+_lag_lock = threading.Lock()
+
+def replica_aliases():
+    return list(getattr(settings, 'DATABASE_REPLICAS', []))
+
+def max_lag():
+    return getattr(settings, 'REPLICA_MAX_LAG_SECONDS', 5)
+
+def sticky_seconds():
+    return getattr(settings, 'REPLICA_STICKY_SECONDS', 15)
+
+def mark_recent_write(user_id):
+    """
+    Pins the user's reads to the primary for REPLICA_STICKY_SECONDS.
+    """
+    if user_id is not None and replica_aliases():
+        cache.set(STICKY_KEY.format(user_id=user_id), 1, timeout=sticky_seconds())
+
+def wrote_recently(user_id):
+    return user_id is not None and cache.get(STICKY_KEY.format(user_id=user_id)) is not None
+
+def measure_lag(alias):
+    """
+    Seconds the replica is behind, or None when replication is broken or the
+    replica cannot be reached. Backends without replication report 0.
+    """
+    connection = connections[alias]
+    if connection.vendor != 'mysql':
+        return 0.0
+    try:
+        with connection.cursor() as cursor:
+            try:
+                cursor.execute("SHOW REPLICA STATUS")
+                column = 'Seconds_Behind_Source'
+            except Exception:
+                # MySQL before 8.0.22.
+                cursor.execute("SHOW SLAVE STATUS")
+                column = 'Seconds_Behind_Master'
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            names = [description[0] for description in cursor.description]
+            value = row[names.index(column)]
+    except Exception:
+        logger.warning("Could not read replication status of %s", alias, exc_info=True)
+        return None
+    return None if value is None else float(value)
+
+def replica_lag(alias):
+    """
+    measure_lag() cached per process for LAG_CHECK_SECONDS.
+    """
+    now = time.monotonic()
+    cached = _lag.get(alias)
+    if cached is not None and now - cached[0] < LAG_CHECK_SECONDS:
+        return cached[1]
+    with _lag_lock:
+        cached = _lag.get(alias)
+        if cached is not None and now - cached[0] < LAG_CHECK_SECONDS:
+            return cached[1]
+        lag = measure_lag(alias)
+        _lag[alias] = (now, lag)
+        return lag
+
+def choose_read_alias(user_id=None):
+    """
+    Returns the alias to read the user's data from: a healthy replica when
+    it is safe, otherwise the primary.
+    """
+    replicas = replica_aliases()
+    if not replicas or wrote_recently(user_id):
+        return DEFAULT_DB_ALIAS
+    limit = max_lag()
+    healthy = []
+    for alias in replicas:
+        lag = replica_lag(alias)
+        if lag is not None and lag <= limit:
+            healthy.append(alias)
+    return random.choice(healthy) if healthy else DEFAULT_DB_ALIAS
+
+def read_connection(user_id=None):
+    """
+    Connection for read-only raw SQL on behalf of `user_id`. Never use it
+    for writes or inside a transaction that also writes.
+    """
+    return connections[choose_read_alias(user_id)]
+
+@contextlib.contextmanager
+def use_replica(user_id=None):
+    """
+    Routes ORM reads inside the block as read_connection() would.
+    """
+    token = _read_alias.set(choose_read_alias(user_id))
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+class PrimaryReplicaRouter:
+    """
+    Sends ORM reads to the alias chosen by use_replica() and everything
+    else to the primary. Replicas are populated by replication, never by
+    migrate.
+    """
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in replica_aliases()
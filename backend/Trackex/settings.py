@@ -41,6 +41,7 @@ INSTALLED_APPS = [
     'rest_framework',
     'corsheaders',
     'rest_framework.authtoken', 
+    'accounts',
     'transactions',
     'stock_prediction',
     'categories',
@@ -51,6 +52,13 @@ INSTALLED_APPS = [
     'profilee',
     'tax-api',
     'razarpay_payments',
+    'dashboard',
+    'metrics',
+    'recurring',
+    'forecast',
+    'anomalies',
+    'archive',
+    'ledger',
 ]
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
@@ -58,6 +66,7 @@ REST_FRAMEWORK = {
     ],
 }
 MIDDLEWARE = [
+    'metrics.middleware.QueryMetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -69,6 +78,15 @@ MIDDLEWARE = [
     'accounts.middleware.TokenMiddleware',
 ]
 
+# Per-endpoint SQL instrumentation (see metrics/middleware.py for defaults).
+QUERY_METRICS = {
+    'SAMPLE_RATE': 1.0,
+    'LOG_DUPLICATE_QUERIES': True,
+    'DUPLICATE_QUERY_THRESHOLD': 5,
+    'SLOW_QUERY_SECONDS': 0.5,
+}
+METRICS_ALLOWED_IPS = ('127.0.0.1', '::1')
+
 ROOT_URLCONF = 'project_expense.urls'
 
 CORS_ALLOW_ALL_ORIGINS = True
@@ -111,6 +129,87 @@ DATABASES = {
 }
 
 
+# Read replicas (Trackex/routers.py). Add each replica to DATABASES and list
+# its alias here; read-heavy endpoints then read from a replica unless the
+# user wrote in the last REPLICA_STICKY_SECONDS or every replica lags by
+# more than REPLICA_MAX_LAG_SECONDS.
+DATABASE_ROUTERS = ['Trackex.routers.PrimaryReplicaRouter']
+DATABASE_REPLICAS = []
+REPLICA_MAX_LAG_SECONDS = 5
+REPLICA_STICKY_SECONDS = 15
+
+
+# Cache
+# 'default' holds disposable entries (import progress, statement pages, tax
+# estimates). 'data_versions' holds the per-user data versions behind ETag /
+# Last-Modified on read endpoints and must not evict: it never expires and is
+# sized well above the number of users. Point both at Redis or Memcached
+# (with eviction disabled for data_versions) when running several workers.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'trackex',
+    },
+    'data_versions': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'trackex-data-versions',
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': 10_000_000},
+    },
+}
+
+
+# Expense categorizer (categorize/classifier.py), trained with
+# `manage.py train_categorizer`. Predictions below the confidence are ignored.
+CATEGORIZER_MODEL_PATH = os.path.join(BASE_DIR, 'ML_models', 'categorizer.npz')
+CATEGORIZER_MIN_CONFIDENCE = 0.5
+
+
+# Razorpay API (razarpay_payments/gateway.py). Calls share a pooled session,
+# time out after the connect/read limits and fail fast with a 503 once
+# BREAKER_FAILURES consecutive calls have failed, for BREAKER_RESET_SECONDS.
+RAZORPAY_KEY_ID = os.environ.get('RAZORPAY_KEY_ID', '')
+RAZORPAY_KEY_SECRET = os.environ.get('RAZORPAY_KEY_SECRET', '')
+RAZORPAY_API_BASE_URL = os.environ.get('RAZORPAY_API_BASE_URL') or None
+RAZORPAY_CONNECT_TIMEOUT = 3.05
+RAZORPAY_READ_TIMEOUT = 10.0
+RAZORPAY_POOL_SIZE = 10
+RAZORPAY_BREAKER_FAILURES = 5
+RAZORPAY_BREAKER_RESET_SECONDS = 30.0
+
+# Razorpay webhooks (razarpay_payments/webhooks.py). Events are queued by the
+# webhook view and applied by `manage.py process_webhook_events`.
+RAZORPAY_WEBHOOK_SECRET = os.environ.get('RAZORPAY_WEBHOOK_SECRET', '')
+
+
+# Expense archive (archive app). `manage.py archive_expenses` moves months
+# older than its --keep-months into Parquet files here; reads include them
+# only when asked with include_archived=true.
+EXPENSE_ARCHIVE_DIR = os.path.join(BASE_DIR, 'expense_archive')
+
+
+# Bank statement import (transactions/importer.py)
+STATEMENT_IMPORT_MAX_BYTES = 20 * 1024 * 1024
+STATEMENT_IMPORT_BATCH = 1000
+
+
+# Auth tokens (accounts/tokens.py)
+# Tokens expire TOKEN_TTL_DAYS after login; last_seen_at is written behind in
+# batches. Run `manage.py purge_expired_tokens` periodically to trim the table.
+TOKEN_TTL_DAYS = 30
+TOKEN_LAST_SEEN_FLUSH_SECONDS = 60
+TOKEN_LAST_SEEN_BATCH = 500
+
+
+# Password hashing
+# bcrypt runs in a dedicated process pool (accounts/passwords.py). Stored
+# hashes with a different cost are rehashed to BCRYPT_ROUNDS on login.
+BCRYPT_ROUNDS = 12
+PASSWORD_HASH_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+PASSWORD_HASH_QUEUE = PASSWORD_HASH_WORKERS * 4
+PASSWORD_HASH_TIMEOUT = 5.0
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -0,0 +1,80 @@
+import time
+from unittest import mock
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.test import SimpleTestCase, override_settings
+from . import routers
+
+@override_settings(DATABASE_REPLICAS=['replica_a', 'replica_b'], REPLICA_MAX_LAG_SECONDS=5,
+                   REPLICA_STICKY_SECONDS=15)
+class ChooseReadAliasTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        routers._lag.clear()
+        self.lags = {'replica_a': 0.0, 'replica_b': 0.0}
+        patcher = mock.patch.object(routers, 'measure_lag', side_effect=lambda alias: self.lags[alias])
+        self.measure_lag = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(routers._lag.clear)
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_primary_without_replicas(self):
+        self.assertEqual(routers.choose_read_alias(1), DEFAULT_DB_ALIAS)
+        routers.mark_recent_write(1)
+        self.assertFalse(routers.wrote_recently(1))
+
+    def test_replica_when_healthy(self):
+        self.assertIn(routers.choose_read_alias(1), ('replica_a', 'replica_b'))
+        self.assertIn(routers.choose_read_alias(None), ('replica_a', 'replica_b'))
+
+    def test_sticky_after_a_write(self):
+        routers.mark_recent_write(1)
+        self.assertTrue(routers.wrote_recently(1))
+        self.assertEqual(routers.choose_read_alias(1), DEFAULT_DB_ALIAS)
+        # Other users keep reading from the replicas.
+        self.assertIn(routers.choose_read_alias(2), ('replica_a', 'replica_b'))
+
+    def test_sticky_marker_expires(self):
+        routers.mark_recent_write(1)
+        cache.delete(routers.STICKY_KEY.format(user_id=1))
+        self.assertIn(routers.choose_read_alias(1), ('replica_a', 'replica_b'))
+
+    def test_skips_lagging_and_broken_replicas(self):
+        self.lags['replica_a'] = 6.0
+        for _ in range(10):
+            self.assertEqual(routers.choose_read_alias(1), 'replica_b')
+
+        routers._lag.clear()
+        self.lags = {'replica_a': None, 'replica_b': 5.0}
+        for _ in range(10):
+            self.assertEqual(routers.choose_read_alias(1), 'replica_b')
+
+    def test_primary_when_every_replica_lags(self):
+        self.lags = {'replica_a': 6.0, 'replica_b': None}
+        self.assertEqual(routers.choose_read_alias(1), DEFAULT_DB_ALIAS)
+
+    def test_lag_is_measured_once_per_interval(self):
+        routers.choose_read_alias(1)
+        routers.choose_read_alias(1)
+        self.assertEqual(self.measure_lag.call_count, 2)
+
+        # Age the cached readings past LAG_CHECK_SECONDS.
+        stale = time.monotonic() - routers.LAG_CHECK_SECONDS
+        for alias, (_, lag) in list(routers._lag.items()):
+            routers._lag[alias] = (stale, lag)
+        self.lags['replica_a'] = 6.0
+        self.assertEqual(routers.choose_read_alias(1), 'replica_b')
+        self.assertEqual(self.measure_lag.call_count, 4)
+
+    def test_router_follows_use_replica(self):
+        router = routers.PrimaryReplicaRouter()
+        self.assertEqual(router.db_for_read(None), DEFAULT_DB_ALIAS)
+        with routers.use_replica(1):
+            self.assertIn(router.db_for_read(None), ('replica_a', 'replica_b'))
+            self.assertEqual(router.db_for_write(None), DEFAULT_DB_ALIAS)
+        routers.mark_recent_write(1)
+        with routers.use_replica(1):
+            self.assertEqual(router.db_for_read(None), DEFAULT_DB_ALIAS)
+        self.assertFalse(router.allow_migrate('replica_a', 'transactions'))
+        self.assertTrue(router.allow_migrate(DEFAULT_DB_ALIAS, 'transactions'))
@@ -41,4 +41,10 @@ urlpatterns = [
     path('api/profilee/', include('profilee.urls')),
     path('api/', include('tax_api.urls')),
     path('api/', include('razarpay_payments.urls')),
+    path('api/dashboard/', include('dashboard.urls')),
+    path('', include('metrics.urls')),
+    path('api/recurring/', include('recurring.urls')),
+    path('api/forecast/', include('forecast.urls')),
+    path('api/anomalies/', include('anomalies.urls')),
+    path('api/ledger/', include('ledger.urls')),
 ]
@@ -0,0 +1,164 @@
+import functools
+import hashlib
+import threading
+import time
+from datetime import datetime
+from collections import defaultdict
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponseNotModified
+from django.utils.http import http_date, parse_http_date_safe
+from Trackex.routers import mark_recent_write
+from .tokens import resolve_token_from_request
+
+# Per-user data version.
+#
+# Every write path (add_transaction, delete_expense, process_payment, budget
+# and account changes) calls bump_data_version(user_id) after committing.
+# Read endpoints decorated with @conditional_on_data_version derive their
+# ETag / Last-Modified from that version, so a client polling with
+# If-None-Match / If-Modified-Since gets a 304 without the view running any
+# SQL or serializing anything.
+#
+# Versions live in the 'data_versions' cache alias (the default cache when
+# it is not configured), apart from disposable entries so they are not
+# culled. With more than one worker process it must point at a shared
+# backend (Redis/Memcached), otherwise a bump in one worker is invisible to
+# the others.
+#
+# A version is bumped with an atomic incr and starts at the current time in
+# microseconds rather than at 1. If the entry is ever lost (eviction,
+# restart) it restarts above every value it held before, so an old ETag can
+# never match again.
+
+VERSION_CACHE = 'data_versions'
+VERSION_KEY = "data_version:{user_id}"
+MODIFIED_KEY = "data_version_modified:{user_id}"
+
+def _cache():
+    return caches[VERSION_CACHE if VERSION_CACHE in settings.CACHES else 'default']
+
+def _version_key(user_id):
+    return VERSION_KEY.format(user_id=user_id)
+
+def _modified_key(user_id):
+    return MODIFIED_KEY.format(user_id=user_id)
+
+def _initial_version():
+    return time.time_ns() // 1000
+
+def get_data_version(user_id):
+    """
+    Returns (version, modified_at) for the user, initialising it on first use.
+    modified_at is a unix timestamp (seconds) of the last bump.
+    """
+    store = _cache()
+    values = store.get_many([_version_key(user_id), _modified_key(user_id)])
+    version = values.get(_version_key(user_id))
+    if version is None:
+        # add() keeps a concurrent initialisation or bump from being overwritten.
+        store.add(_version_key(user_id), _initial_version(), timeout=None)
+        version = store.get(_version_key(user_id))
+    modified_at = values.get(_modified_key(user_id))
+    if modified_at is None:
+        modified_at = int(time.time())
+        store.add(_modified_key(user_id), modified_at, timeout=None)
+    return version, modified_at
+
+def bump_data_version(user_id):
+    """
+    Marks the user's data as changed. Must be called after the write commits
+    so a reader that sees the new version also sees the new rows.
+    """
+    if user_id is None:
+        return None
+    store = _cache()
+    try:
+        version = store.incr(_version_key(user_id))
+    except ValueError:
+        store.add(_version_key(user_id), _initial_version(), timeout=None)
+        version = store.incr(_version_key(user_id))
+    # Last-Modified has one second resolution: always move strictly past the
+    # previous stamp so If-Modified-Since can never match a stale copy.
+    previous = store.get(_modified_key(user_id)) or 0
+    modified_at = max(previous + 1, int(time.time()) + 1)
+    store.set(_modified_key(user_id), modified_at, timeout=None)
+    # Keep the user's reads on the primary until replicas have caught up.
+    mark_recent_write(user_id)
+    return version, modified_at
+
+# Hit / miss counters per endpoint, exposed through accounts/cache-stats/.
+_stats_lock = threading.Lock()
+_stats = defaultdict(lambda: {'hits': 0, 'misses': 0})
+
+def _record(view_name, hit):
+    with _stats_lock:
+        _stats[view_name]['hits' if hit else 'misses'] += 1
+
+def cache_stats():
+    with _stats_lock:
+        return {name: dict(counts) for name, counts in _stats.items()}
+
+def _month_start():
+    now = datetime.now()
+    return datetime(now.year, now.month, 1)
+
+def _make_etag(user_id, version, modified_at, month, request):
+    # The query string is part of the tag: get_expenses filters and dashboard
+    # field selection return different payloads for the same version. The
+    # month is too, because "current month" totals roll over without a write.
+    raw = (f"{user_id}:{version}:{modified_at}:{month:%Y-%m}:{request.path}:"
+           f"{request.META.get('QUERY_STRING', '')}")
+    return '"%s"' % hashlib.md5(raw.encode()).hexdigest()
+
+def _etag_matches(header, etag):
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    return etag in [tag.strip() for tag in header.split(',')]
+
+def conditional_on_data_version(view):
+    """
+    Decorator for per-user GET endpoints (place it below @api_view).
+
+    The user's data version is read *before* the view runs, so the ETag of a
+    200 response can only ever be older than the data it carries, never newer.
+    """
+    view_name = view.__name__
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return view(request, *args, **kwargs)
+        user_id = resolve_token_from_request(request)
+        if user_id is None:
+            # Let the view produce its usual token error.
+            return view(request, *args, **kwargs)
+
+        version, modified_at = get_data_version(user_id)
+        month = _month_start()
+        etag = _make_etag(user_id, version, modified_at, month, request)
+        modified_at = max(modified_at, int(month.timestamp()))
+
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match is not None:
+            not_modified = _etag_matches(if_none_match, etag)
+        else:
+            since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE') or '')
+            not_modified = since is not None and modified_at <= since
+
+        if not_modified:
+            _record(view_name, hit=True)
+            response = HttpResponseNotModified()
+        else:
+            _record(view_name, hit=False)
+            response = view(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(modified_at)
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+    return wrapper
@@ -0,0 +1,45 @@
+import time
+from datetime import datetime
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+class Command(BaseCommand):
+    help = "Deletes expired rows from user_token in bounded chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='Rows deleted per statement (default: 1000).')
+        parser.add_argument('--sleep', type=float, default=0.1,
+                            help='Seconds to pause between chunks to limit lock pressure (default: 0.1).')
+        parser.add_argument('--max-chunks', type=int, default=0,
+                            help='Stop after this many chunks; 0 means until done.')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        cutoff = datetime.now()
+        total = 0
+        chunks = 0
+        # The derived table lets MySQL delete from the table it selects from;
+        # each statement touches at most chunk_size rows via idx_user_token_expires.
+        query = """
+            DELETE FROM user_token
+            WHERE token IN (
+                SELECT token FROM (
+                    SELECT token FROM user_token
+                    WHERE expires_at <= %s
+                    ORDER BY expires_at
+                    LIMIT %s
+                ) AS expired
+            )
+        """
+        while True:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(query, [cutoff, chunk_size])
+                deleted = cursor.rowcount
+            total += deleted
+            chunks += 1
+            if deleted < chunk_size or (options['max_chunks'] and chunks >= options['max_chunks']):
+                break
+            if options['sleep']:
+                time.sleep(options['sleep'])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {total} expired tokens in {chunks} chunk(s)."))
@@ -1,5 +1,6 @@
 from django.utils.deprecation import MiddlewareMixin
 from django.db import connection
+from .tokens import resolve_token
 
 # Function to execute database queries
 def execute_query(query, params=None, fetch_one=False):
@@ -18,12 +19,11 @@ class TokenMiddleware(MiddlewareMixin):
             if token.startswith("Bearer "):
                 token = token[7:]
             
-            # Validate the token by checking if it exists in the user_token table
-            query = "SELECT user_id FROM user_token WHERE token = %s"
-            result = execute_query(query, [token], fetch_one=True)
-            if result:
+            # Validate the token against the unexpired rows of user_token
+            user_id = resolve_token(token)
+            if user_id is not None:
                 request.token = token  # Attach the token to the request
-                request.user_id = result[0]  # Attach user_id to the request
+                request.user_id = user_id  # Attach user_id to the request
             else:
                 request.token = None
                 request.user_id = None
@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.db import migrations
+
+# user_token is created outside Django. This adds expiry / last-seen columns,
+# a unique index on token (the per-request lookup) and indexes for login's
+# user_id join and the expiry purge. Existing tokens get a full TTL from now
+# so nobody is logged out by the migration.
+
+COLUMNS = ('created_at', 'expires_at', 'last_seen_at')
+
+def forwards(apps, schema_editor):
+    execute = schema_editor.execute
+    if schema_editor.connection.vendor == 'mysql':
+        execute("ALTER TABLE user_token "
+                "ADD COLUMN created_at DATETIME NULL, "
+                "ADD COLUMN expires_at DATETIME NULL, "
+                "ADD COLUMN last_seen_at DATETIME NULL")
+    else:
+        for column in COLUMNS:
+            execute(f"ALTER TABLE user_token ADD COLUMN {column} DATETIME NULL")
+
+    now = datetime.now()
+    ttl = timedelta(days=getattr(settings, 'TOKEN_TTL_DAYS', 30))
+    execute("UPDATE user_token SET created_at = %s, expires_at = %s WHERE expires_at IS NULL", [now, now + ttl])
+
+    execute("CREATE UNIQUE INDEX uniq_user_token_token ON user_token (token)")
+    execute("CREATE INDEX idx_user_token_user ON user_token (user_id)")
+    execute("CREATE INDEX idx_user_token_expires ON user_token (expires_at)")
+
+def backwards(apps, schema_editor):
+    execute = schema_editor.execute
+    mysql = schema_editor.connection.vendor == 'mysql'
+    for index in ('uniq_user_token_token', 'idx_user_token_user', 'idx_user_token_expires'):
+        execute(f"DROP INDEX {index} ON user_token" if mysql else f"DROP INDEX {index}")
+    for column in COLUMNS:
+        execute(f"ALTER TABLE user_token DROP COLUMN {column}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = []
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
@@ -0,0 +1,39 @@
+from django.db import migrations
+
+# Signup relies on these to reject duplicate usernames and emails atomically
+# instead of checking first. Fails with a list of offenders if the table
+# already holds duplicates; resolve those by hand before migrating.
+
+INDEXES = (
+    ('uniq_user_username', 'username'),
+    ('uniq_user_email', 'email'),
+)
+
+def forwards(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        for _, column in INDEXES:
+            cursor.execute(
+                f"SELECT {column}, COUNT(*) FROM user GROUP BY {column} HAVING COUNT(*) > 1 LIMIT 20"
+            )
+            duplicates = cursor.fetchall()
+            if duplicates:
+                listed = ', '.join(f"{value!r} ({count})" for value, count in duplicates)
+                raise RuntimeError(f"Duplicate user.{column} values must be resolved first: {listed}")
+    for name, column in INDEXES:
+        schema_editor.execute(f"CREATE UNIQUE INDEX {name} ON user ({column})")
+
+def backwards(apps, schema_editor):
+    mysql = schema_editor.connection.vendor == 'mysql'
+    for name, _ in INDEXES:
+        schema_editor.execute(f"DROP INDEX {name} ON user" if mysql else f"DROP INDEX {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_user_token_lifecycle'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
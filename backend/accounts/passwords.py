@@ -0,0 +1,122 @@
+import functools
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+import bcrypt
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# bcrypt off the request threads.
+#
+# Hashing and verification run in a small dedicated process pool so a login
+# storm saturates at most PASSWORD_HASH_WORKERS cores instead of every
+# request thread. Admission is bounded: when PASSWORD_HASH_QUEUE jobs are
+# already waiting, callers get PasswordHasherBusy straight away (the views
+# turn that into a 503) rather than piling up behind the pool. A pool whose
+# worker died (e.g. OOM-killed) refuses all further work, so it is replaced
+# and the job tried once more.
+#
+# PASSWORD_HASH_WORKERS = 0 runs bcrypt inline, e.g. for local development.
+
+class PasswordHasherBusy(Exception):
+    pass
+
+_pool = None
+_pool_lock = threading.Lock()
+_slots = None
+
+def _config():
+    workers = getattr(settings, 'PASSWORD_HASH_WORKERS', 2)
+    queue = getattr(settings, 'PASSWORD_HASH_QUEUE', workers * 4)
+    timeout = getattr(settings, 'PASSWORD_HASH_TIMEOUT', 5.0)
+    return workers, queue, timeout
+
+def bcrypt_rounds():
+    return getattr(settings, 'BCRYPT_ROUNDS', 12)
+
+def _get_pool():
+    global _pool, _slots
+    with _pool_lock:
+        if _pool is None:
+            workers, queue, _ = _config()
+            _slots = threading.BoundedSemaphore(workers + queue)
+            _pool = ProcessPoolExecutor(max_workers=workers)
+        return _pool, _slots
+
+def _discard_pool(pool):
+    global _pool, _slots
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+            _slots = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+# Worker functions must be module level so they can be pickled.
+def _checkpw(password, hashed):
+    return bcrypt.checkpw(password, hashed)
+
+def _hashpw(password, rounds):
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds=rounds))
+
+def _release_slot(slots, future):
+    slots.release()
+
+def _submit(pool, slots, timeout, func, *args):
+    if not slots.acquire(blocking=False):
+        raise PasswordHasherBusy()
+    try:
+        future = pool.submit(func, *args)
+    except BaseException:
+        slots.release()
+        raise
+    # The slot is held until the job really finishes (or is cancelled), so a
+    # caller that gave up does not let more work into the pool. It goes back
+    # to the semaphore it came from even if the pool has been replaced since.
+    future.add_done_callback(functools.partial(_release_slot, slots))
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        future.cancel()
+        raise PasswordHasherBusy()
+
+def _run(func, *args):
+    workers, _, timeout = _config()
+    if workers <= 0:
+        return func(*args)
+    for attempt in range(2):
+        pool, slots = _get_pool()
+        try:
+            return _submit(pool, slots, timeout, func, *args)
+        except BrokenProcessPool as e:
+            logger.warning("Password hashing pool broke; starting a new one")
+            _discard_pool(pool)
+            if attempt:
+                raise PasswordHasherBusy() from e
+
+def check_password(password, stored_hash):
+    """
+    Returns True if the plain text password matches the stored bcrypt hash.
+    """
+    return _run(_checkpw, password.encode(), stored_hash.encode())
+
+def hash_password(password):
+    """
+    Returns a bcrypt hash of the password at the configured BCRYPT_ROUNDS.
+    """
+    return _run(_hashpw, password.encode(), bcrypt_rounds()).decode()
+
+def hash_cost(stored_hash):
+    # bcrypt hashes look like $2b$12$<salt+hash>; the second field is the cost.
+    try:
+        return int(stored_hash.split('$')[2])
+    except (IndexError, ValueError):
+        return None
+
+def needs_rehash(stored_hash):
+    """
+    True when the stored hash was made with a different cost than
+    BCRYPT_ROUNDS, so login can transparently upgrade (or cap) it.
+    """
+    return hash_cost(stored_hash) != bcrypt_rounds()
@@ -0,0 +1,111 @@
+import atexit
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+# Token lookup and lifecycle.
+#
+# Every view resolves its token through resolve_token(), which only accepts
+# unexpired tokens (unique index on user_token.token, so the probe stays a
+# single index lookup however large the table gets). last_seen_at is not
+# written per request: touches are buffered per process and flushed in one
+# batch every TOKEN_LAST_SEEN_FLUSH_SECONDS or TOKEN_LAST_SEEN_BATCH tokens.
+# Expired rows are removed by `manage.py purge_expired_tokens`.
+
+def token_ttl():
+    return timedelta(days=getattr(settings, 'TOKEN_TTL_DAYS', 30))
+
+def token_from_request(request):
+    """
+    Returns the raw token from the Authorization header or the 'token' query
+    parameter, with any "Bearer " prefix removed.
+    """
+    token = request.headers.get('Authorization') or request.GET.get('token')
+    if not token:
+        return None
+    if token.startswith("Bearer "):
+        token = token[7:]
+    return token
+
+def resolve_token(token):
+    """
+    Returns the user_id owning an unexpired token, or None.
+    """
+    if not token:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT user_id FROM user_token WHERE token = %s AND (expires_at IS NULL OR expires_at > %s)",
+            [token, datetime.now()]
+        )
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    touch(token)
+    return row[0]
+
+def resolve_token_from_request(request):
+    """
+    Returns the user_id for the request, reusing the lookup already done by
+    TokenMiddleware when the token came in the Authorization header.
+    """
+    user_id = getattr(request, 'user_id', None)
+    if user_id is not None:
+        return user_id
+    return resolve_token(token_from_request(request))
+
+def issue_token(cursor, user_id, token):
+    """
+    Inserts a new token for the user, valid for TOKEN_TTL_DAYS.
+    """
+    now = datetime.now()
+    cursor.execute(
+        "INSERT INTO user_token (user_id, token, created_at, expires_at, last_seen_at) VALUES (%s, %s, %s, %s, %s)",
+        [user_id, token, now, now + token_ttl(), now]
+    )
+
+# Write-behind buffer for last_seen_at.
+_seen = {}
+_seen_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+def touch(token):
+    global _last_flush
+    flush_seconds = getattr(settings, 'TOKEN_LAST_SEEN_FLUSH_SECONDS', 60)
+    batch_size = getattr(settings, 'TOKEN_LAST_SEEN_BATCH', 500)
+    with _seen_lock:
+        _seen[token] = datetime.now()
+        due = len(_seen) >= batch_size or time.monotonic() - _last_flush >= flush_seconds
+        if due:
+            pending = list(_seen.items())
+            _seen.clear()
+            _last_flush = time.monotonic()
+    if due:
+        flush_last_seen(pending)
+
+def flush_last_seen(pending=None):
+    """
+    Writes buffered last-seen times in one executemany. Failures are logged
+    and dropped: last_seen_at is advisory.
+    """
+    if pending is None:
+        with _seen_lock:
+            pending = list(_seen.items())
+            _seen.clear()
+    if not pending:
+        return
+    try:
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                "UPDATE user_token SET last_seen_at = %s WHERE token = %s",
+                [[seen_at, token] for token, seen_at in pending]
+            )
+    except Exception:
+        logger.exception("Could not flush last_seen_at for %d tokens", len(pending))
+
+atexit.register(flush_last_seen)
@@ -5,4 +5,5 @@ urlpatterns = [
     path('signup/', views.signup, name='signup'),
     path('login/', views.login, name='login'),
     path('logout/', views.logout, name='logout'),
+    path('cache-stats/', views.cache_stats, name='cache_stats'),
 ]
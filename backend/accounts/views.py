@@ -1,11 +1,14 @@
 from django.http import JsonResponse
-from django.db import connection
-import bcrypt
+from django.db import IntegrityError, connection
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from .serializers import SignupSerializer, LoginSerializer
+from .data_version import cache_stats as data_version_cache_stats
+from .tokens import issue_token
+from .passwords import PasswordHasherBusy, check_password, hash_password, needs_rehash
+from metrics.views import request_allowed
 from rest_framework.authtoken.models import Token
 import uuid
 from datetime import datetime
@@ -31,19 +34,22 @@ def signup(request):
             if password != re_password:
                 return Response({'error': 'Passwords do not match'}, status=400)
 
-            hashed_password = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
-            existing_user_query = "SELECT * FROM user WHERE username = %s OR email = %s"
-            existing_user = execute_query(existing_user_query, [username, email], fetch_one=True)
-            if existing_user:
-                return Response({'error': 'Username or email already exists'}, status=400)
+            try:
+                hashed_password = hash_password(password)
+            except PasswordHasherBusy:
+                return Response({'error': 'Server busy, please retry'}, status=503,
+                                headers={'Retry-After': '1'})
 
+            # The unique indexes on username and email reject duplicates, so
+            # there is no pre-check to race against.
             try:
-                # Insert new user into the database
                 query = "INSERT INTO user (username, email, password) VALUES (%s, %s, %s)"
                 execute_query(query, [username, email, hashed_password])
-                return Response({'message': 'User registered successfully'}, status=201)
+            except IntegrityError:
+                return Response({'error': 'Username or email already exists'}, status=400)
             except Exception as e:
                 return Response({'error': str(e)}, status=400)
+            return Response({'message': 'User registered successfully'}, status=201)
 
         return Response(serializer.errors, status=400)
 
@@ -57,25 +63,47 @@ def login(request):
             username = serializer.validated_data['username']
             password = serializer.validated_data['password']
 
-            # Retrieve user details
-            query = "SELECT user_id, password FROM user WHERE username = %s"
-            result = execute_query(query, [username], fetch_one=True)
+            # Retrieve user details together with any existing token.
+            query = """
+                SELECT u.user_id, u.password, t.token
+                FROM user u
+                LEFT JOIN user_token t
+                       ON t.user_id = u.user_id
+                      AND (t.expires_at IS NULL OR t.expires_at > %s)
+                WHERE u.username = %s
+                LIMIT 1
+            """
+            result = execute_query(query, [datetime.now(), username], fetch_one=True)
 
             if result:
-                user_id, stored_password = result
-                if bcrypt.checkpw(password.encode(), stored_password.encode()):
-                    # Check if a token already exists for the user
-                    token_query = "SELECT token FROM user_token WHERE user_id = %s"
-                    token_result = execute_query(token_query, [user_id], fetch_one=True)
-
-                    if token_result:
-                        # Return existing token
-                        token = token_result[0]
-                    else:
-                        # Generate and save a new token
+                user_id, stored_password, token = result
+                try:
+                    password_ok = check_password(password, stored_password)
+                except PasswordHasherBusy:
+                    return Response({'error': 'Server busy, please retry'}, status=503,
+                                    headers={'Retry-After': '1'})
+
+                if password_ok:
+                    if needs_rehash(stored_password):
+                        # Move the stored hash to the configured cost; the old
+                        # hash in the WHERE keeps a concurrent change from being lost.
+                        try:
+                            execute_query(
+                                "UPDATE user SET password = %s WHERE user_id = %s AND password = %s",
+                                [hash_password(password), user_id, stored_password]
+                            )
+                        except PasswordHasherBusy:
+                            pass
+
+                    if not token:
+                        # Generate and save a new token, dropping any expired ones.
                         token = uuid.uuid4().hex
-                        insert_token_query = "INSERT INTO user_token (user_id, token) VALUES (%s, %s)"
-                        execute_query(insert_token_query, [user_id, token])
+                        with connection.cursor() as cursor:
+                            cursor.execute(
+                                "DELETE FROM user_token WHERE user_id = %s AND expires_at <= %s",
+                                [user_id, datetime.now()]
+                            )
+                            issue_token(cursor, user_id, token)
 
                     return Response({'message': 'Login successful', 'token': token}, status=200)
 
@@ -101,3 +129,22 @@ def logout(request):
     except Exception as e:
         return Response({'error': str(e)}, status=500)
 
+
+@api_view(['GET'])
+def cache_stats(request):
+    """
+    Conditional-GET hit/miss counters per endpoint for this worker process.
+    Like /metrics, only answers addresses in METRICS_ALLOWED_IPS.
+    """
+    if not request_allowed(request):
+        return Response({'error': 'Forbidden'}, status=403)
+    stats = data_version_cache_stats()
+    hits = sum(counts['hits'] for counts in stats.values())
+    misses = sum(counts['misses'] for counts in stats.values())
+    total = hits + misses
+    return Response({
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / total, 4) if total else 0.0,
+        'endpoints': stats,
+    }, status=200)
@@ -3,6 +3,10 @@ from django.db import connection
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
+from accounts.tokens import resolve_token
+from accounts.data_version import bump_data_version, conditional_on_data_version
+from Trackex.routers import read_connection
+from ledger.balances import current_balance
 from .serializers import AddAccountDetailsSerializer, VerifyPinSerializer
 
 # Utility function to execute SQL queries.
@@ -18,9 +22,7 @@ def get_user_id_from_request(request):
         return None
     if token.startswith("Bearer "):
         token = token[7:]
-    query = "SELECT user_id FROM user_token WHERE token = %s"
-    user_token = execute_query(query, [token], fetch_one=True)
-    return user_token[0] if user_token else None
+    return resolve_token(token)
 
 # Masks all but the last 4 digits of the account number.
 def mask_account_number(account_number: str) -> str:
@@ -85,10 +87,12 @@ def add_account_details(request):
                 [user_id, bank_acc_id, pin_no]
             )
 
+        bump_data_version(user_id)
         return Response({"detail": "Account details successfully added/updated."}, status=status.HTTP_200_OK)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 @api_view(['GET'])
+@conditional_on_data_version
 def get_account_details(request):
     """
     GET endpoint to retrieve and return masked account details for the user.
@@ -98,14 +102,18 @@ def get_account_details(request):
         return Response({'error': 'Token is required or is invalid'}, status=status.HTTP_400_BAD_REQUEST)
 
     query = """
-        SELECT b.account_number, b.balance
+        SELECT b.account_number, b.bank_acc_id, b.balance
         FROM bank_accounts b
         JOIN app_accounts a ON b.bank_acc_id = a.bank_acc_id
         WHERE a.user_id = %s
     """
-    row = execute_query(query, [user_id], fetch_one=True)
+    with read_connection(user_id).cursor() as cursor:
+        cursor.execute(query, [user_id])
+        row = cursor.fetchone()
+        if row:
+            account_number, bank_acc_id, opening = row
+            balance = current_balance(cursor, bank_acc_id, opening)
     if row:
-        account_number, balance = row
         masked_account_number = mask_account_number(account_number)
         return Response(
             {"account_number": masked_account_number, "balance": str(balance)},
@@ -114,6 +122,7 @@ def get_account_details(request):
     return Response({"detail": "No account details found."}, status=status.HTTP_404_NOT_FOUND)
 
 @api_view(['GET'])
+@conditional_on_data_version
 def get_monthly_expense(request):
     """
     GET endpoint to retrieve the total monthly expense for the user.
@@ -134,7 +143,9 @@ def get_monthly_expense(request):
           AND YEAR(date) = %s
     """
 
-    row = execute_query(query, [user_id, current_month, current_year], fetch_one=True)
+    with read_connection(user_id).cursor() as cursor:
+        cursor.execute(query, [user_id, current_month, current_year])
+        row = cursor.fetchone()
     total_spent = row[0] if row else 0
 
     return Response({"total_spent": total_spent})
@@ -164,14 +175,16 @@ def verify_pin(request):
         if str(stored_pin) == str(pin):
             # PIN is correct; now fetch the actual balance.
             query = """
-                SELECT b.balance
+                SELECT b.bank_acc_id, b.balance
                 FROM bank_accounts b
                 JOIN app_accounts a ON b.bank_acc_id = a.bank_acc_id
                 WHERE a.user_id = %s
             """
-            account_row = execute_query(query, [user_id], fetch_one=True)
+            with connection.cursor() as cursor:
+                cursor.execute(query, [user_id])
+                account_row = cursor.fetchone()
+                balance = current_balance(cursor, *account_row) if account_row else None
             if account_row:
-                balance = account_row[0]
                 return Response({"balance": str(balance)}, status=status.HTTP_200_OK)
             else:
                 return Response({"detail": "Account not found."}, status=status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,108 @@
+import logging
+import math
+import time
+from django.db import OperationalError, transaction
+from .models import ExpenseAnomaly, SpendingStats
+
+logger = logging.getLogger(__name__)
+
+# Write-time anomaly checks.
+#
+# observe() is called once per new expense. It locks the user's stats row
+# for the category, scores the expense against the statistics *before* it,
+# folds it in with Welford's update and records any flags — a constant
+# amount of work regardless of how long the user's history is. The row is
+# upserted before it is read so the write lock comes first, and a check that
+# still loses a deadlock is retried.
+#
+# Expenses are flagged when
+#   - the amount is at least Z_THRESHOLD standard deviations and
+#     MIN_RATIO times above the category mean (high_amount), or
+#   - the payment method accounts for less than METHOD_RARE_SHARE of the
+#     category's earlier expenses (unusual_payment_method),
+# once there are MIN_HISTORY earlier expenses to compare against.
+
+MIN_HISTORY = 8
+Z_THRESHOLD = 3.0
+MIN_RATIO = 1.5
+METHOD_MIN_HISTORY = 20
+METHOD_RARE_SHARE = 0.02
+
+# Attempts for a check that hit a deadlock or a busy database.
+LOCK_RETRIES = 3
+
+def score(stats, amount, payment_method):
+    """
+    Returns [(reason, score)] for an expense against the given statistics.
+    """
+    flags = []
+    if stats.count >= MIN_HISTORY and stats.mean > 0:
+        std = math.sqrt(stats.m2 / (stats.count - 1)) if stats.count > 1 else 0.0
+        # A perfectly steady series has std 0; fall back to a share of the mean.
+        z = (amount - stats.mean) / max(std, stats.mean * 0.1)
+        if z >= Z_THRESHOLD and amount >= stats.mean * MIN_RATIO:
+            flags.append(('high_amount', round(z, 2)))
+    if payment_method and stats.count >= METHOD_MIN_HISTORY:
+        share = stats.method_counts.get(payment_method, 0) / stats.count
+        if share < METHOD_RARE_SHARE:
+            flags.append(('unusual_payment_method', round(share, 4)))
+    return flags
+
+def update(stats, amount, payment_method):
+    stats.count += 1
+    delta = amount - stats.mean
+    stats.mean += delta / stats.count
+    stats.m2 += delta * (amount - stats.mean)
+    if payment_method:
+        stats.method_counts[payment_method] = stats.method_counts.get(payment_method, 0) + 1
+
+def _locked_stats(user_id, category_id):
+    # Write first: the upsert creates the row if it is missing and takes its
+    # write lock (a row X lock on MySQL, the database write lock on SQLite)
+    # before anything is read. Reading first under SELECT ... FOR UPDATE let
+    # two first expenses of a new pair deadlock on MySQL's gap lock, and a
+    # deferred read-then-write transaction fail with "database is locked"
+    # on SQLite.
+    SpendingStats.objects.bulk_create(
+        [SpendingStats(user_id=user_id, category_id=category_id)],
+        update_conflicts=True, unique_fields=['user_id', 'category_id'], update_fields=['updated_at'],
+    )
+    return SpendingStats.objects.select_for_update().get(user_id=user_id, category_id=category_id)
+
+def _is_lock_error(error):
+    # MySQL deadlock (1213) / lock wait timeout (1205); SQLite busy.
+    code = error.args[0] if error.args else None
+    return code in (1205, 1213) or 'database is locked' in str(error)
+
+def observe(user_id, category_id, amount, payment_method=None, expense_id=None):
+    """
+    Scores a newly written expense, updates the running statistics and
+    stores any flags. Returns the list of flag reasons. Never raises: a
+    failure here must not fail the write that triggered it.
+    """
+    try:
+        amount = float(amount)
+        for attempt in range(LOCK_RETRIES):
+            try:
+                return _observe_once(user_id, category_id, amount, payment_method, expense_id)
+            except OperationalError as e:
+                if not _is_lock_error(e) or attempt == LOCK_RETRIES - 1:
+                    raise
+                time.sleep(0.05 * (attempt + 1))
+    except Exception:
+        logger.exception("Anomaly check failed for user %s", user_id)
+        return []
+
+def _observe_once(user_id, category_id, amount, payment_method, expense_id):
+    with transaction.atomic():
+        stats = _locked_stats(user_id, category_id)
+        expected = stats.mean
+        flags = score(stats, amount, payment_method)
+        update(stats, amount, payment_method)
+        stats.save(update_fields=['count', 'mean', 'm2', 'method_counts', 'updated_at'])
+        for reason, value in flags:
+            ExpenseAnomaly.objects.create(
+                user_id=user_id, expense_id=expense_id, category_id=category_id, amount=round(amount, 2),
+                payment_method=payment_method, reason=reason, score=value, expected_amount=expected,
+            )
+    return [reason for reason, _ in flags]
@@ -0,0 +1,47 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SpendingStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.IntegerField()),
+                ('category_id', models.IntegerField()),
+                ('count', models.BigIntegerField(default=0)),
+                ('mean', models.FloatField(default=0)),
+                ('m2', models.FloatField(default=0)),
+                ('method_counts', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user_id', 'category_id'), name='uniq_stats_user_category')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ExpenseAnomaly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.IntegerField()),
+                ('expense_id', models.IntegerField(blank=True, null=True)),
+                ('category_id', models.IntegerField()),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('payment_method', models.CharField(blank=True, max_length=100, null=True)),
+                ('reason', models.CharField(choices=[('high_amount', 'Amount far above usual'), ('unusual_payment_method', 'Unusual payment method')], max_length=30)),
+                ('score', models.FloatField()),
+                ('expected_amount', models.FloatField()),
+                ('acknowledged', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user_id', 'created_at'], name='idx_anomaly_user_created')],
+            },
+        ),
+    ]
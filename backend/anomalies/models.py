@@ -0,0 +1,50 @@
+from django.db import models
+
+class SpendingStats(models.Model):
+    """
+    Running statistics of one user's spend in one category, updated with
+    Welford's algorithm on every expense: count, mean and m2 (sum of squared
+    deviations, variance = m2 / (count - 1)), plus how often each payment
+    method was used.
+    """
+    user_id = models.IntegerField()
+    category_id = models.IntegerField()
+    count = models.BigIntegerField(default=0)
+    mean = models.FloatField(default=0)
+    m2 = models.FloatField(default=0)
+    method_counts = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user_id', 'category_id'], name='uniq_stats_user_category'),
+        ]
+
+    def __str__(self):
+        return f"user {self.user_id} category {self.category_id}: n={self.count} mean={self.mean:.2f}"
+
+class ExpenseAnomaly(models.Model):
+    REASON_CHOICES = [
+        ('high_amount', 'Amount far above usual'),
+        ('unusual_payment_method', 'Unusual payment method'),
+    ]
+
+    user_id = models.IntegerField()
+    expense_id = models.IntegerField(null=True, blank=True)
+    category_id = models.IntegerField()
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    payment_method = models.CharField(max_length=100, null=True, blank=True)
+    reason = models.CharField(max_length=30, choices=REASON_CHOICES)
+    score = models.FloatField()
+    # Mean amount for the category before this expense.
+    expected_amount = models.FloatField()
+    acknowledged = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user_id', 'created_at'], name='idx_anomaly_user_created'),
+        ]
+
+    def __str__(self):
+        return f"{self.reason} for user {self.user_id}: {self.amount}"
@@ -0,0 +1,7 @@
+from django.urls import path
+from .views import acknowledge_anomaly, get_anomalies
+
+urlpatterns = [
+    path('', get_anomalies, name='get_anomalies'),
+    path('<int:anomaly_id>/acknowledge/', acknowledge_anomaly, name='acknowledge_anomaly'),
+]
@@ -0,0 +1,43 @@
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from rest_framework import status
+from accounts.tokens import resolve_token_from_request
+from .models import ExpenseAnomaly
+
+@api_view(['GET'])
+def get_anomalies(request):
+    """
+    Lists flagged expenses for the authenticated user, newest first.
+    Optional query parameters:
+      - include_acknowledged ('true' to include flags already dismissed)
+      - limit (default 50, max 200)
+    """
+    user_id = resolve_token_from_request(request)
+    if user_id is None:
+        return Response({'error': 'Invalid or missing token'}, status=status.HTTP_401_UNAUTHORIZED)
+    try:
+        limit = min(max(int(request.GET.get('limit', 50)), 1), 200)
+    except ValueError:
+        return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+    queryset = ExpenseAnomaly.objects.filter(user_id=user_id)
+    if request.GET.get('include_acknowledged', '').lower() != 'true':
+        queryset = queryset.filter(acknowledged=False)
+    results = list(queryset.order_by('-created_at').values(
+        'id', 'expense_id', 'category_id', 'amount', 'payment_method', 'reason', 'score',
+        'expected_amount', 'acknowledged', 'created_at',
+    )[:limit])
+    return Response(results, status=status.HTTP_200_OK)
+
+@api_view(['POST'])
+def acknowledge_anomaly(request, anomaly_id):
+    """
+    Dismisses one flag of the authenticated user.
+    """
+    user_id = resolve_token_from_request(request)
+    if user_id is None:
+        return Response({'error': 'Invalid or missing token'}, status=status.HTTP_401_UNAUTHORIZED)
+    updated = ExpenseAnomaly.objects.filter(id=anomaly_id, user_id=user_id).update(acknowledged=True)
+    if not updated:
+        return Response({'error': 'Anomaly not found'}, status=status.HTTP_404_NOT_FOUND)
+    return Response({'message': 'Anomaly acknowledged'}, status=status.HTTP_200_OK)
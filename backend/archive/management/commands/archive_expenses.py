@@ -0,0 +1,120 @@
+import time
+from datetime import date, datetime, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+from accounts.data_version import bump_data_version
+from archive.models import ExpenseArchive
+from archive.storage import (
+    COLUMNS, ArchiveUnavailable, _pyarrow, archive_path, month_start, next_month, read_expense_ids, write_archive,
+)
+
+def _month_bounds(month):
+    return datetime.combine(month, datetime.min.time()), datetime.combine(next_month(month), datetime.min.time())
+
+def iter_month_rows(month, batch_size):
+    """
+    Yields the month's expense rows in COLUMNS order, in expense_id keyset
+    chunks so no single statement runs long.
+    """
+    start, end = _month_bounds(month)
+    last_id = 0
+    while True:
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT {', '.join(COLUMNS)}
+                FROM expense
+                WHERE date >= %s AND date < %s AND expense_id > %s
+                ORDER BY expense_id
+                LIMIT %s
+            """, [start, end, last_id, batch_size])
+            rows = cursor.fetchall()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+def delete_archived(archive, batch_size):
+    """
+    Removes the archive's rows from expense in short transactions, then
+    marks it archived. Safe to repeat after a crash. Returns the user ids
+    whose data changed.
+    """
+    ids = read_expense_ids(archive)
+    users = set()
+    for offset in range(0, len(ids), batch_size):
+        chunk = ids[offset:offset + batch_size]
+        placeholders = ', '.join(['%s'] * len(chunk))
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"SELECT DISTINCT user_id FROM expense WHERE expense_id IN ({placeholders})", chunk)
+            users.update(row[0] for row in cursor.fetchall())
+            cursor.execute(f"DELETE FROM expense WHERE expense_id IN ({placeholders})", chunk)
+    archive.status = 'archived'
+    archive.save(update_fields=['status'])
+    return users
+
+class Command(BaseCommand):
+    help = "Moves expenses older than --keep-months into compressed Parquet archive files."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep-months', type=int, default=12,
+                            help='Months kept in the expense table, counting the current one (default: 12).')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per read and delete (default: 5000).')
+        parser.add_argument('--dry-run', action='store_true', help='List the months that would be archived.')
+
+    def handle(self, *args, **options):
+        try:
+            _pyarrow()
+        except ArchiveUnavailable as e:
+            raise CommandError(str(e))
+        if options['keep_months'] < 1:
+            raise CommandError("--keep-months must be at least 1.")
+        batch_size = options['batch_size']
+        started = time.monotonic()
+        changed_users = set()
+
+        # Finish archives whose deletes were interrupted.
+        if not options['dry_run']:
+            for archive in ExpenseArchive.objects.filter(status='copied').order_by('month', 'part'):
+                changed_users |= delete_archived(archive, batch_size)
+                self.stdout.write(f"Finished {archive}")
+
+        cutoff = month_start(date.today())
+        for _ in range(options['keep_months'] - 1):
+            cutoff = month_start(cutoff - timedelta(days=1))
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT MIN(date) FROM expense WHERE date < %s",
+                           [datetime.combine(cutoff, datetime.min.time())])
+            oldest = cursor.fetchone()[0]
+        if oldest is None:
+            self.stdout.write(f"Nothing older than {cutoff:%Y-%m} to archive.")
+            month = cutoff
+        else:
+            month = month_start(oldest if isinstance(oldest, date) else datetime.fromisoformat(str(oldest)))
+
+        totals = {'months': 0, 'rows': 0, 'bytes': 0}
+        while month < cutoff:
+            if options['dry_run']:
+                self.stdout.write(f"Would archive {month:%Y-%m}")
+                month = next_month(month)
+                continue
+            part = (ExpenseArchive.objects.filter(month=month).aggregate(last=Max('part'))['last'] or 0) + 1
+            path = archive_path(month, part)
+            info = write_archive(path, iter_month_rows(month, batch_size))
+            if info is not None:
+                archive = ExpenseArchive.objects.create(month=month, part=part, path=path, **info)
+                changed_users |= delete_archived(archive, batch_size)
+                totals['months'] += 1
+                totals['rows'] += info['row_count']
+                totals['bytes'] += info['size_bytes']
+                self.stdout.write(f"Archived {month:%Y-%m} part {part}: {info['row_count']} rows, "
+                                  f"{info['size_bytes'] / 1e6:.1f} MB")
+            month = next_month(month)
+
+        # Cached ETags of the affected users describe rows that moved.
+        for user_id in changed_users:
+            bump_data_version(user_id)
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {totals['rows']} rows from {totals['months']} months ({totals['bytes'] / 1e6:.1f} MB) "
+            f"in {time.monotonic() - started:.1f}s"
+        ))
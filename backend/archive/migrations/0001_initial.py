@@ -0,0 +1,31 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExpenseArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('part', models.IntegerField(default=1)),
+                ('path', models.CharField(max_length=500)),
+                ('row_count', models.IntegerField()),
+                ('size_bytes', models.BigIntegerField()),
+                ('sha256', models.CharField(max_length=64)),
+                ('min_expense_id', models.BigIntegerField()),
+                ('max_expense_id', models.BigIntegerField()),
+                ('status', models.CharField(choices=[('copied', 'Copied'), ('archived', 'Archived')], default='copied', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('month', 'part'), name='uniq_archive_month_part')],
+            },
+        ),
+    ]
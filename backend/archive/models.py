@@ -0,0 +1,33 @@
+from django.db import models
+
+class ExpenseArchive(models.Model):
+    """
+    One Parquet file of expenses moved out of the expense table by
+    `manage.py archive_expenses`. A month can have several parts when
+    back-dated expenses arrive after it was archived.
+    """
+    STATUS_CHOICES = [
+        # Written and verified; the rows may still be in expense.
+        ('copied', 'Copied'),
+        # The rows have been deleted from expense.
+        ('archived', 'Archived'),
+    ]
+
+    month = models.DateField()
+    part = models.IntegerField(default=1)
+    path = models.CharField(max_length=500)
+    row_count = models.IntegerField()
+    size_bytes = models.BigIntegerField()
+    sha256 = models.CharField(max_length=64)
+    min_expense_id = models.BigIntegerField()
+    max_expense_id = models.BigIntegerField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='copied')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['month', 'part'], name='uniq_archive_month_part'),
+        ]
+
+    def __str__(self):
+        return f"{self.month:%Y-%m} part {self.part} ({self.row_count} rows, {self.status})"
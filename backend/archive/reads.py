@@ -0,0 +1,138 @@
+import heapq
+from datetime import datetime, timedelta
+from django.db import connection
+from django.db.models import Max
+from transaction_history.search import decode_cursor
+from .models import ExpenseArchive
+from .storage import _as_datetime, iter_rows_newest_first, month_start, next_month, read_rows
+
+# Read paths over archived expenses.
+#
+# Default queries only ever see the expense table, which archive_expenses
+# keeps to the recent months. Endpoints that take include_archived=true add
+# the matching archived rows here; the manifest is consulted first, so a
+# range that does not reach back into archived months costs one small query
+# and opens no files.
+
+SEARCH_COLUMNS = ('expense_id', 'category_id', 'date', 'amount', 'payment_method', 'description')
+
+def archive_horizon():
+    """
+    First day after the newest archived month, or None when nothing has been
+    archived. Ranges starting on or after it have no archived rows.
+    """
+    latest = ExpenseArchive.objects.aggregate(latest=Max('month'))['latest']
+    return next_month(latest) if latest else None
+
+def archives_between(start=None, end=None):
+    """
+    Manifest rows for months overlapping [start, end) (datetimes or dates).
+    """
+    archives = ExpenseArchive.objects.all()
+    if start is not None:
+        archives = archives.filter(month__gte=month_start(start))
+    if end is not None:
+        archives = archives.filter(month__lt=end)
+    return list(archives.order_by('month', 'part'))
+
+def _category_names():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT category_id, name FROM categories")
+        return dict(cursor.fetchall())
+
+def archived_expenses(user_id, start=None, end=None):
+    """
+    The user's archived expenses with start <= date < end, newest first, as
+    (expense_id, category, date, amount, payment_method, description) rows
+    like the expense listing queries return. Rows are streamed one Parquet
+    row group at a time, so long exports stay bounded in memory.
+    """
+    horizon = archive_horizon()
+    if horizon is None or (start is not None and _as_datetime(start) >= datetime.combine(horizon, datetime.min.time())):
+        return
+    archives = archives_between(start, end)
+    if not archives:
+        return
+    names = _category_names()
+    by_month = {}
+    for archive in archives:
+        by_month.setdefault(archive.month, []).append(archive)
+    # Months never overlap; the parts of one month are merged.
+    for month in sorted(by_month, reverse=True):
+        streams = [iter_rows_newest_first(archive, user_id, start, end, SEARCH_COLUMNS)
+                   for archive in by_month[month]]
+        for expense_id, category_id, dt, amount, payment_method, description in heapq.merge(
+                *streams, key=_sort_key, reverse=True):
+            yield expense_id, names.get(category_id), dt, amount, payment_method, description
+
+def _sort_key(row):
+    return _as_datetime(row[2]), row[0]
+
+def merge_newest_first(hot_rows, archived_rows):
+    """
+    Merges two (date DESC, expense_id DESC) sorted row streams. A row still
+    in the expense table while its archive is being finalised appears in
+    both; the hot copy is kept.
+    """
+    last_id = None
+    for row in heapq.merge(hot_rows, archived_rows, key=_sort_key, reverse=True):
+        if row[0] != last_id:
+            yield row
+        last_id = row[0]
+
+def matches_search(row, filters):
+    """
+    Python counterpart of search.build_search_query's conditions for one
+    archived row.
+    """
+    expense_id, category, dt, amount, payment_method, description = row
+    dt = _as_datetime(dt)
+    if filters.get('q'):
+        text = (description or '').lower()
+        if not all(term.lower() in text for term in filters['q'].split()):
+            return False
+    if filters.get('min_amount') is not None and amount < filters['min_amount']:
+        return False
+    if filters.get('max_amount') is not None and amount > filters['max_amount']:
+        return False
+    if filters.get('payment_method') and payment_method != filters['payment_method']:
+        return False
+    if filters.get('categories') and category not in filters['categories']:
+        return False
+    if filters.get('start_date') and dt < datetime.combine(filters['start_date'], datetime.min.time()):
+        return False
+    if filters.get('end_date') and dt >= datetime.combine(filters['end_date'] + timedelta(days=1), datetime.min.time()):
+        return False
+    return True
+
+def search_range(filters):
+    start = datetime.combine(filters['start_date'], datetime.min.time()) if filters.get('start_date') else None
+    end = (datetime.combine(filters['end_date'] + timedelta(days=1), datetime.min.time())
+           if filters.get('end_date') else None)
+    return start, end
+
+def archived_search_rows(user_id, filters):
+    """
+    Archived rows matching validated ExpenseSearchSerializer data, newest
+    first, after the cursor if there is one.
+    """
+    start, end = search_range(filters)
+    after = decode_cursor(filters['cursor']) if filters.get('cursor') else None
+    for row in archived_expenses(user_id, start, end):
+        if after is not None and _sort_key(row) >= after:
+            continue
+        if matches_search(row, filters):
+            yield row
+
+def archived_fingerprints(user_id, dates):
+    """
+    Fingerprints of the user's archived expenses in the months of `dates`,
+    so re-importing an old statement does not duplicate archived rows.
+    """
+    months = {month_start(_as_datetime(value)) for value in dates}
+    horizon = archive_horizon()
+    months = {month for month in months if horizon is not None and month < horizon}
+    if not months:
+        return set()
+    archives = list(ExpenseArchive.objects.filter(month__in=months))
+    return {fingerprint for (fingerprint,) in read_rows(archives, user_id, columns=('fingerprint',)) if fingerprint}
@@ -0,0 +1,163 @@
+import hashlib
+import os
+from datetime import date, datetime
+from decimal import Decimal
+from django.conf import settings
+
+# Cold storage for old expenses.
+#
+# Each archived month is one or more Parquet files (zstd) holding the full
+# expense rows of every user, sorted by (user_id, date, expense_id) and
+# written in row groups of ROW_GROUP_SIZE. Parquet keeps min/max statistics
+# per row group, so reading one user's rows back only decompresses the few
+# row groups whose user_id range contains them. pyarrow is optional: without
+# it nothing can be archived and ArchiveUnavailable is raised.
+
+COLUMNS = ('expense_id', 'user_id', 'category_id', 'amount', 'date', 'payment_method', 'description',
+           'fingerprint')
+ROW_GROUP_SIZE = 16384
+
+class ArchiveUnavailable(Exception):
+    pass
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ArchiveUnavailable("Expense archives require pyarrow to be installed on the server.")
+    return pa, pc, pq
+
+def archive_dir():
+    return getattr(settings, 'EXPENSE_ARCHIVE_DIR', os.path.join(settings.BASE_DIR, 'expense_archive'))
+
+def archive_path(month, part):
+    return os.path.join(archive_dir(), f"expense-{month:%Y-%m}-part{part}.parquet")
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+def next_month(month):
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+def _as_datetime(value):
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value))
+
+def _schema(pa):
+    return pa.schema([
+        ('expense_id', pa.int64()),
+        ('user_id', pa.int64()),
+        ('category_id', pa.int64()),
+        ('amount', pa.decimal128(12, 2)),
+        ('date', pa.timestamp('s')),
+        ('payment_method', pa.string()),
+        ('description', pa.string()),
+        ('fingerprint', pa.string()),
+    ])
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for block in iter(lambda: handle.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def write_archive(path, chunks):
+    """
+    Writes the rows from `chunks` (lists of tuples in COLUMNS order) to
+    `path`, atomically. Returns a dict of row_count, size_bytes, sha256,
+    min_expense_id and max_expense_id, or None when there were no rows.
+    """
+    pa, pc, pq = _pyarrow()
+    schema = _schema(pa)
+    batches = []
+    for rows in chunks:
+        columns = list(zip(*rows))
+        batches.append(pa.record_batch([
+            pa.array(columns[0], pa.int64()),
+            pa.array(columns[1], pa.int64()),
+            pa.array(columns[2], pa.int64()),
+            pa.array([Decimal(str(value)).quantize(Decimal('0.01')) for value in columns[3]], pa.decimal128(12, 2)),
+            pa.array([_as_datetime(value) for value in columns[4]], pa.timestamp('s')),
+            pa.array(columns[5], pa.string()),
+            pa.array(columns[6], pa.string()),
+            pa.array(columns[7], pa.string()),
+        ], schema=schema))
+    if not batches:
+        return None
+    table = pa.Table.from_batches(batches, schema=schema).sort_by(
+        [('user_id', 'ascending'), ('date', 'ascending'), ('expense_id', 'ascending')])
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f"{path}.tmp"
+    pq.write_table(table, temporary, row_group_size=ROW_GROUP_SIZE, compression='zstd')
+    with open(temporary, 'rb') as handle:
+        os.fsync(handle.fileno())
+    if pq.read_metadata(temporary).num_rows != table.num_rows:
+        os.remove(temporary)
+        raise OSError(f"Archive {temporary} did not verify")
+    os.replace(temporary, path)
+
+    ids = table.column('expense_id')
+    return {
+        'row_count': table.num_rows,
+        'size_bytes': os.path.getsize(path),
+        'sha256': _sha256(path),
+        'min_expense_id': pc.min(ids).as_py(),
+        'max_expense_id': pc.max(ids).as_py(),
+    }
+
+def read_rows(archives, user_id, start=None, end=None, columns=COLUMNS):
+    """
+    Returns the user's rows (tuples of `columns`) from the given
+    ExpenseArchive files, optionally limited to start <= date < end.
+    """
+    if not archives:
+        return []
+    pa, pc, pq = _pyarrow()
+    filters = [('user_id', '=', user_id)]
+    if start is not None:
+        filters.append(('date', '>=', start))
+    if end is not None:
+        filters.append(('date', '<', end))
+    rows = []
+    for archive in archives:
+        table = pq.read_table(archive.path, columns=list(columns), filters=filters)
+        rows.extend(zip(*(table.column(name).to_pylist() for name in columns)))
+    return rows
+
+def iter_rows_newest_first(archive, user_id, start=None, end=None, columns=COLUMNS):
+    """
+    Yields the user's rows (tuples of `columns`) from one ExpenseArchive
+    file in (date, expense_id) descending order, optionally limited to
+    start <= date < end. Files are sorted by (user_id, date, expense_id), so
+    row groups are read one at a time from the end, those whose user_id
+    statistics rule the user out are skipped, and at most one row group is
+    held in memory.
+    """
+    pa, pc, pq = _pyarrow()
+    parquet = pq.ParquetFile(archive.path)
+    needed = list(dict.fromkeys(list(columns) + ['user_id', 'date']))
+    user_column = parquet.schema_arrow.get_field_index('user_id')
+    for index in reversed(range(parquet.num_row_groups)):
+        stats = parquet.metadata.row_group(index).column(user_column).statistics
+        if stats is not None and stats.has_min_max and not stats.min <= user_id <= stats.max:
+            continue
+        table = parquet.read_row_group(index, columns=needed)
+        mask = pc.equal(table.column('user_id'), user_id)
+        if start is not None:
+            mask = pc.and_(mask, pc.greater_equal(table.column('date'),
+                                                  pa.scalar(_as_datetime(start), pa.timestamp('s'))))
+        if end is not None:
+            mask = pc.and_(mask, pc.less(table.column('date'), pa.scalar(_as_datetime(end), pa.timestamp('s'))))
+        table = table.filter(mask)
+        if table.num_rows:
+            rows = list(zip(*(table.column(name).to_pylist() for name in columns)))
+            yield from reversed(rows)
+
+def read_expense_ids(archive):
+    pa, pc, pq = _pyarrow()
+    return pq.read_table(archive.path, columns=['expense_id']).column('expense_id').to_pylist()
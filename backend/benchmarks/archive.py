@@ -0,0 +1,95 @@
+"""
+Hot/cold expense tiers.
+
+    python -m benchmarks.archive --expenses 2000000 --keep-months 3
+
+Seeds two years of expenses, times full-history /api/expenses/ listings,
+runs archive_expenses to move everything but the last --keep-months into
+Parquet files, and times the listings again, with and without
+include_archived=true. Fails unless every user's expenses are all still
+returned with include_archived (by listing and by paging through search)
+and the default listing only returns the hot months. Needs pyarrow.
+"""
+
+import argparse
+import random
+import sys
+import time
+from .run import percentile, prepare_database, setup_django
+
+def timed_listing(client, users, params, requests, rng):
+    latencies, sizes = [], {}
+    for _ in range(requests):
+        user = rng.choice(users)
+        started = time.perf_counter()
+        response = client.get('/api/expenses/', params, HTTP_AUTHORIZATION=f"Bearer {user['token']}")
+        latencies.append(time.perf_counter() - started)
+        sizes[user['user_id']] = len(response.json())
+    latencies.sort()
+    return percentile(latencies, 0.5), percentile(latencies, 0.99), sizes
+
+def search_count(client, user):
+    count, cursor = 0, None
+    while True:
+        params = {'include_archived': 'true', 'limit': 200}
+        if cursor:
+            params['cursor'] = cursor
+        body = client.get('/api/expenses/search/', params, HTTP_AUTHORIZATION=f"Bearer {user['token']}").json()
+        count += len(body['results'])
+        cursor = body['next_cursor']
+        if not cursor:
+            return count
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--keep-months', type=int, default=3)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--expenses', type=int, default=200_000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db-path')
+    parser.add_argument('--reuse-db', action='store_true')
+    args = parser.parse_args(argv)
+
+    setup_django(args)
+    ctx = prepare_database(args)
+    from django.core.management import call_command
+    from django.db import connection
+    from django.test import Client
+
+    client = Client()
+    rng = random.Random(args.seed)
+    users = ctx['users']
+    p50, p99, _ = timed_listing(client, users, {}, args.requests, rng)
+    print(f"before archiving: full listing p50 {p50 * 1000:.1f}ms, p99 {p99 * 1000:.1f}ms")
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT user_id, COUNT(*) FROM expense GROUP BY user_id")
+        totals = dict(cursor.fetchall())
+
+    started = time.perf_counter()
+    call_command('archive_expenses', '--keep-months', str(args.keep_months))
+    print(f"archive_expenses: {time.perf_counter() - started:.1f}s")
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT user_id, COUNT(*) FROM expense GROUP BY user_id")
+        hot = dict(cursor.fetchall())
+
+    p50, p99, hot_sizes = timed_listing(client, users, {}, args.requests, rng)
+    print(f"hot only: full listing p50 {p50 * 1000:.1f}ms, p99 {p99 * 1000:.1f}ms")
+    p50, p99, all_sizes = timed_listing(client, users, {'include_archived': 'true'}, args.requests, rng)
+    print(f"include_archived: full listing p50 {p50 * 1000:.1f}ms, p99 {p99 * 1000:.1f}ms")
+
+    failed = []
+    if any(size != hot.get(user_id, 0) for user_id, size in hot_sizes.items()):
+        failed.append('the default listing returned archived rows')
+    if any(size != totals.get(user_id, 0) for user_id, size in all_sizes.items()):
+        failed.append('include_archived listings lost rows')
+    user = rng.choice(users)
+    if search_count(client, user) != totals.get(user['user_id'], 0):
+        failed.append('include_archived search lost rows')
+    if failed:
+        print("FAILED: " + '; '.join(failed) + '.')
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""
+Razorpay gateway behaviour against a slow or failing provider.
+
+    python -m benchmarks.gateway --calls 500 --concurrency 8
+
+Starts a local FakeRazorpayServer, points RAZORPAY_API_BASE_URL at it and
+drives /api/create_order/ in three phases:
+
+  healthy   the provider answers after --latency; reports p50/p99;
+  outage    the provider stalls past the read timeout; calls must time out
+            and, once the circuit opens, fail fast with 503 without
+            reaching the provider;
+  recovery  after the breaker's reset time the provider is healthy again;
+            one trial call closes the breaker and then calls must succeed.
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from .run import percentile, prepare_database, setup_django
+from .stubs import FakeRazorpayServer
+
+def drive(calls, concurrency):
+    from django.db import connection
+    from django.test import Client
+
+    results = []
+    lock = threading.Lock()
+
+    def work(count):
+        client = Client()
+        local = []
+        try:
+            for i in range(count):
+                started = time.perf_counter()
+                response = client.post('/api/create_order/', {'amount': 10000 + i, 'category': 'Bench'},
+                                       content_type='application/json')
+                local.append((response.status_code, time.perf_counter() - started))
+        finally:
+            connection.close()
+        with lock:
+            results.extend(local)
+
+    threads = [threading.Thread(target=work, args=(calls // concurrency + (i < calls % concurrency),))
+               for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+def report(phase, results, server_requests):
+    latencies = sorted(elapsed for _, elapsed in results)
+    statuses = {}
+    for code, _ in results:
+        statuses[code] = statuses.get(code, 0) + 1
+    print(f"{phase}: {len(results)} calls, p50 {percentile(latencies, 0.5) * 1000:.1f}ms, "
+          f"p99 {percentile(latencies, 0.99) * 1000:.1f}ms, statuses {statuses}, "
+          f"provider saw {server_requests} requests")
+    return statuses
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.02, help='Healthy provider latency in seconds.')
+    parser.add_argument('--read-timeout', type=float, default=0.5)
+    parser.add_argument('--breaker-failures', type=int, default=5)
+    parser.add_argument('--breaker-reset', type=float, default=2.0)
+    parser.add_argument('--users', type=int, default=5)
+    parser.add_argument('--expenses', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db-path')
+    parser.add_argument('--reuse-db', action='store_true')
+    args = parser.parse_args(argv)
+
+    server = FakeRazorpayServer(delay=args.latency).start()
+    os.environ['RAZORPAY_API_BASE_URL'] = server.base_url
+    setup_django(args)
+    prepare_database(args)
+    from django.conf import settings
+    settings.RAZORPAY_API_BASE_URL = server.base_url
+    settings.RAZORPAY_READ_TIMEOUT = args.read_timeout
+    settings.RAZORPAY_POOL_SIZE = args.concurrency
+    settings.RAZORPAY_BREAKER_FAILURES = args.breaker_failures
+    settings.RAZORPAY_BREAKER_RESET_SECONDS = args.breaker_reset
+
+    failed = []
+    try:
+        seen = server.requests
+        statuses = report('healthy', drive(args.calls, args.concurrency), server.requests - seen)
+        if statuses.get(200) != args.calls:
+            failed.append('healthy calls did not all succeed')
+
+        server.delay = args.read_timeout * 4
+        seen = server.requests
+        statuses = report('outage', drive(args.calls, args.concurrency), server.requests - seen)
+        reached = server.requests - seen
+        # Each thread may have had a call in flight when the circuit opened.
+        if statuses.get(503, 0) != args.calls or reached > args.breaker_failures + args.concurrency:
+            failed.append('outage calls were not all refused fast')
+
+        server.delay = args.latency
+        time.sleep(args.breaker_reset)
+        # The half-open breaker lets exactly one trial call through and
+        # refuses the rest until it succeeds, so probe once before the burst.
+        seen = server.requests
+        statuses = report('probe', drive(1, 1), server.requests - seen)
+        if statuses.get(200) != 1:
+            failed.append('the trial call after the reset time did not succeed')
+        seen = server.requests
+        statuses = report('recovery', drive(args.calls, args.concurrency), server.requests - seen)
+        if statuses.get(200) != args.calls:
+            failed.append('calls did not recover after the breaker closed')
+    finally:
+        server.stop()
+
+    if failed:
+        print("FAILED: " + '; '.join(failed) + '.')
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
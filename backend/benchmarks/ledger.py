@@ -0,0 +1,117 @@
+"""
+Concurrent payments through the ledger.
+
+    python -m benchmarks.ledger --payments 4000 --concurrency 8
+
+Every user pays the same recipient (a "popular" account) from several
+threads at once, so on a row-locking database the payments would queue on
+the recipient's balance row if it were still updated in place. Reports
+p50/p99 latency of /api/payment/process/, then checks that no payment
+failed with a server error, money was conserved, no balance went
+negative, every payment wrote exactly two entries, and that balances are
+unchanged after `snapshot_balances`.
+"""
+
+import argparse
+import random
+import sys
+import threading
+import time
+from decimal import Decimal
+from .run import percentile, prepare_database, setup_django
+from .seed import PIN
+
+def balances(cursor):
+    from ledger.balances import current_balance
+    cursor.execute("SELECT bank_acc_id, balance FROM bank_accounts")
+    return {acc_id: current_balance(cursor, acc_id, opening) for acc_id, opening in cursor.fetchall()}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--payments', type=int, default=4000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--expenses', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db-path')
+    parser.add_argument('--reuse-db', action='store_true')
+    args = parser.parse_args(argv)
+
+    setup_django(args)
+    ctx = prepare_database(args)
+    from django.core.management import call_command
+    from django.db import connection
+    from django.test import Client
+    from ledger.models import BalanceSnapshot, LedgerEntry
+
+    with connection.cursor() as cursor:
+        before = balances(cursor)
+    entries_before = LedgerEntry.objects.count()
+    recipient = ctx['recipients'][0]
+    rng = random.Random(args.seed)
+    plan = [(rng.choice(ctx['users']), f"{rng.uniform(1, 500):.2f}") for _ in range(args.payments)]
+
+    latencies, statuses = [], {}
+    lock = threading.Lock()
+
+    def pay(chunk):
+        client = Client()
+        local_latencies, local_statuses = [], {}
+        try:
+            for user, amount in chunk:
+                started = time.perf_counter()
+                response = client.post('/api/payment/process/', dict(recipient, amount=amount, pin_no=PIN),
+                                       content_type='application/json',
+                                       HTTP_AUTHORIZATION=f"Bearer {user['token']}")
+                local_latencies.append(time.perf_counter() - started)
+                local_statuses[response.status_code] = local_statuses.get(response.status_code, 0) + 1
+        finally:
+            connection.close()
+        with lock:
+            latencies.extend(local_latencies)
+            for key, count in local_statuses.items():
+                statuses[key] = statuses.get(key, 0) + count
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=pay, args=(plan[i::args.concurrency],)) for i in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    print(f"payments: {len(plan)} in {elapsed:.2f}s ({len(plan) / elapsed:.0f}/s), "
+          f"p50 {percentile(latencies, 0.5) * 1000:.1f}ms, p99 {percentile(latencies, 0.99) * 1000:.1f}ms, "
+          f"{statuses}")
+
+    with connection.cursor() as cursor:
+        after = balances(cursor)
+    succeeded = statuses.get(200, 0)
+    entries = LedgerEntry.objects.count() - entries_before
+    failures = []
+    server_errors = sum(count for code, count in statuses.items() if code >= 500)
+    if server_errors:
+        failures.append(f"{server_errors} payments failed with a server error")
+    if sum(after.values()) != sum(before.values()):
+        failures.append(f"total moved from {sum(before.values())} to {sum(after.values())}")
+    negative = [acc_id for acc_id, balance in after.items() if balance < Decimal('0')]
+    if negative:
+        failures.append(f"{len(negative)} accounts went negative")
+    if entries != 2 * succeeded:
+        failures.append(f"{entries} ledger entries for {succeeded} payments")
+
+    started = time.perf_counter()
+    # All payments have committed, so no settle window is needed.
+    call_command('snapshot_balances', '--settle-seconds', '0', '--verify')
+    print(f"snapshot: {BalanceSnapshot.objects.count()} snapshots in {time.perf_counter() - started:.2f}s")
+    with connection.cursor() as cursor:
+        if balances(cursor) != after:
+            failures.append("balances changed after snapshot_balances")
+
+    if failures:
+        print("FAILED: " + "; ".join(failures) + ".")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,40 @@
+"""
+Login throughput at increasing concurrency.
+
+    python -m benchmarks.login --levels 1,2,4,8,16 --requests 400
+    BENCH_BCRYPT_ROUNDS=12 BENCH_PASSWORD_HASH_WORKERS=4 python -m benchmarks.login
+
+Every level runs the same number of logins; compare req/s and p99 across
+levels to see where the bcrypt pool saturates. 503s (pool full) are
+reported separately from successful logins.
+"""
+
+import argparse
+import sys
+from .run import prepare_database, run_mix, setup_django
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--levels', default='1,2,4,8,16')
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--expenses', type=int, default=10_000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db-path')
+    parser.add_argument('--reuse-db', action='store_true')
+    args = parser.parse_args(argv)
+
+    setup_django(args)
+    from django.conf import settings
+    ctx = prepare_database(args)
+
+    print(f"bcrypt cost {settings.BCRYPT_ROUNDS}, {settings.PASSWORD_HASH_WORKERS} hash workers")
+    print(f"{'concurrency':>12}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'5xx':>6}")
+    for level in [int(value) for value in args.levels.split(',')]:
+        report = run_mix(ctx, 'login', args.requests, level, args.seed)
+        row = report['endpoints']['login']
+        print(f"{level:>12}{report['throughput_rps']:>10.1f}{row['p50_ms']:>10.2f}{row['p99_ms']:>10.2f}{row['errors']:>6}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""
+Nightly order reconciliation at volume.
+
+    python -m benchmarks.reconcile --orders 200000 --concurrency 8
+
+Inserts --orders payments stuck in 'initiated' over the last --days days and
+registers matching Razorpay payments on a local FakeRazorpayServer: most
+captured, some failed, some failed then captured, the rest never paid. Runs
+reconcile_razorpay_orders against it and fails unless every payment ended
+in the expected state within --max-seconds.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import timedelta
+from .run import prepare_database, setup_django
+from .stubs import FakeRazorpayServer
+
+OUTCOMES = (('captured', 0.7), ('failed', 0.1), ('retried', 0.05), ('abandoned', 0.15))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', type=int, default=200_000)
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.01, help='Fake Razorpay latency per page.')
+    parser.add_argument('--max-seconds', type=float, default=600)
+    parser.add_argument('--users', type=int, default=5)
+    parser.add_argument('--expenses', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db-path')
+    parser.add_argument('--reuse-db', action='store_true')
+    args = parser.parse_args(argv)
+
+    server = FakeRazorpayServer(delay=args.latency).start()
+    os.environ['RAZORPAY_API_BASE_URL'] = server.base_url
+    setup_django(args)
+    prepare_database(args)
+    from django.conf import settings
+    from django.core.management import call_command
+    from django.utils import timezone
+    from razarpay_payments.models import Payment
+    settings.RAZORPAY_API_BASE_URL = server.base_url
+    settings.RAZORPAY_POOL_SIZE = args.concurrency
+
+    rng = random.Random(args.seed)
+    now = timezone.now()
+    Payment.objects.all().delete()
+    expected = {}
+    payments = []
+    for i in range(args.orders):
+        order_id = f"order_rec{i:010d}"
+        created_at = now - timedelta(seconds=rng.randrange(3600 * 2, 86400 * args.days))
+        payments.append(Payment(order_id=order_id, amount=rng.randrange(10, 5000), created_at=created_at))
+        roll, outcome = rng.random(), OUTCOMES[-1][0]
+        for name, share in OUTCOMES:
+            if roll < share:
+                outcome = name
+                break
+            roll -= share
+        paid_at = created_at.timestamp() + rng.randrange(30, 600)
+        if outcome in ('failed', 'retried'):
+            server.add_payment(order_id, 'failed', created_at=paid_at)
+        if outcome in ('captured', 'retried'):
+            server.add_payment(order_id, 'captured', created_at=paid_at + 60)
+        expected[order_id] = 'failed' if outcome in ('failed', 'abandoned') else 'successful'
+
+    started = time.perf_counter()
+    # bulk_create lets auto_now_add overwrite created_at on these very
+    # objects, so keep the backdated values to put them back afterwards.
+    by_order = {payment.order_id: payment.created_at for payment in payments}
+    created = Payment.objects.bulk_create(payments, batch_size=1000)
+    stored = list(Payment.objects.only('id', 'order_id', 'created_at'))
+    for payment in stored:
+        payment.created_at = by_order[payment.order_id]
+    Payment.objects.bulk_update(stored, ['created_at'], batch_size=1000)
+    print(f"Inserted {len(created)} stale payments in {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    try:
+        call_command('reconcile_razorpay_orders', '--lookback-days', str(args.days + 1), '--abandon-hours', '1',
+                     '--concurrency', str(args.concurrency), '--max-minutes', str(args.max_seconds / 60))
+    finally:
+        server.stop()
+    elapsed = time.perf_counter() - started
+    print(f"reconcile: {args.orders} orders in {elapsed:.1f}s ({args.orders / elapsed:.0f}/s), "
+          f"{server.requests} Razorpay requests")
+
+    wrong = sum(1 for order_id, status in Payment.objects.values_list('order_id', 'status')
+                if expected[order_id] != status)
+    if wrong or elapsed > args.max_seconds:
+        print(f"FAILED: {wrong} payments in the wrong state, {elapsed:.1f}s (limit {args.max_seconds:.0f}s).")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
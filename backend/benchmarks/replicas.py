@@ -0,0 +1,130 @@
+"""
+Read-replica routing.
+
+    python -m benchmarks.replicas --reads 2000
+
+Seeds the primary SQLite database and copies it to a second file that
+stands in for a replica which then stops replicating. Checks that
+  - read endpoints are served by the replica,
+  - a user who just wrote reads from the primary and sees the write, while
+    other users stay on the replica,
+  - every read falls back to the primary when the replica reports more lag
+    than REPLICA_MAX_LAG_SECONDS.
+With BENCH_DB_ENGINE=mysql and BENCH_REPLICA_HOST pointing at a real
+replica, the copy step is skipped.
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+from collections import Counter
+from datetime import date
+from .run import prepare_database, setup_django
+
+READS = (
+    ('/api/expenses/', {}),
+    ('/api/transactions/latest/', {}),
+    ('/api/monthly_expense/', {}),
+    ('/api/dashboard/', {}),
+    ('/api/categories/', {}),
+)
+
+def served_by(aliases):
+    """
+    Installs execute wrappers counting statements per alias.
+    """
+    from django.db import connections
+    counts = Counter()
+
+    def wrapper_for(alias):
+        def wrapper(execute, sql, params, many, context):
+            counts[alias] += 1
+            return execute(sql, params, many, context)
+        return wrapper
+
+    for alias in aliases:
+        connections[alias].execute_wrappers.append(wrapper_for(alias))
+    return counts
+
+def read(client, user, rng):
+    path, params = rng.choice(READS)
+    return client.get(path, params, HTTP_AUTHORIZATION=f"Bearer {user['token']}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--reads', type=int, default=2000)
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--expenses', type=int, default=20_000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db-path')
+    parser.add_argument('--replica-path')
+    parser.add_argument('--reuse-db', action='store_true')
+    args = parser.parse_args(argv)
+
+    if os.environ.get('BENCH_DB_ENGINE') != 'mysql':
+        os.environ['BENCH_REPLICA_PATH'] = args.replica_path or os.path.join(
+            os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'bench_replica.sqlite3')
+    setup_django(args)
+    ctx = prepare_database(args)
+    from django.conf import settings
+    from django.db import connections
+    from django.test import Client
+    from Trackex import routers
+
+    if 'replica' not in settings.DATABASES:
+        print("FAILED: no replica configured (set BENCH_REPLICA_HOST for MySQL).")
+        return 1
+    if connections['replica'].vendor == 'sqlite':
+        connections.close_all()
+        shutil.copyfile(settings.DATABASES['default']['NAME'], settings.DATABASES['replica']['NAME'])
+
+    rng = random.Random(args.seed)
+    client = Client()
+    counts = served_by(['default', 'replica'])
+    failed = []
+
+    # 1. Reads go to the replica.
+    for _ in range(args.reads):
+        read(client, rng.choice(ctx['users']), rng)
+    print(f"steady reads: statements by alias {dict(counts)}")
+    if counts['replica'] == 0:
+        failed.append('reads were not sent to the replica')
+
+    # 2. Read-your-writes: the writer is pinned to the primary.
+    writer, other = ctx['users'][0], ctx['users'][1]
+    description = f"replica check {rng.random()}"
+    client.post('/api/transactions/add/', {
+        'category_name': ctx['categories'][0], 'category_description': description,
+        'amount': '42.00', 'date': date.today().isoformat(), 'payment_method': 'UPI',
+    }, content_type='application/json', HTTP_AUTHORIZATION=f"Bearer {writer['token']}")
+    counts.clear()
+    response = client.get('/api/expenses/', HTTP_AUTHORIZATION=f"Bearer {writer['token']}")
+    seen = any(row.get('description') == description for row in response.json())
+    print(f"writer after write: sees own write {seen}, statements by alias {dict(counts)}")
+    if not seen or counts['replica']:
+        failed.append('the writer did not read its own write from the primary')
+    counts.clear()
+    client.get('/api/expenses/', HTTP_AUTHORIZATION=f"Bearer {other['token']}")
+    print(f"other user: statements by alias {dict(counts)}")
+    if not counts['replica']:
+        failed.append('other users left the replica after an unrelated write')
+
+    # 3. Lagging replica: everything falls back to the primary.
+    routers.measure_lag = lambda alias: settings.REPLICA_MAX_LAG_SECONDS + 60.0
+    routers._lag.clear()
+    counts.clear()
+    for _ in range(args.reads // 10 or 1):
+        read(client, rng.choice(ctx['users']), rng)
+    print(f"lagging replica: statements by alias {dict(counts)}")
+    if counts['replica']:
+        failed.append('reads still went to a lagging replica')
+
+    if failed:
+        print("FAILED: " + '; '.join(failed) + '.')
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
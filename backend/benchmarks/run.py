@@ -0,0 +1,218 @@
+"""
+Benchmark driver for the REST API.
+
+    python -m benchmarks.run --users 200 --expenses 2000000 --requests 5000
+    python -m benchmarks.run --reuse-db --mix read_heavy --concurrency 8
+    python -m benchmarks.run --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json
+
+Builds (or reuses) a local database seeded with synthetic data, drives a
+weighted mix of API calls through Django's test client and reports
+throughput, p50/p99 latency and SQL statements per endpoint. With
+--baseline it exits non-zero when an endpoint regressed past the tolerance.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+def setup_django(args):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+    if args.db_path:
+        os.environ['BENCH_DB_PATH'] = args.db_path
+    from . import stubs
+    stubs.install()
+    import django
+    django.setup()
+
+def prepare_database(args):
+    from django.core.management import call_command
+    from django.db import connection
+    from . import schema, seed
+
+    schema.register_functions()
+    if args.reuse_db and schema.tables_exist():
+        return seed.load_context()
+
+    if connection.vendor == 'sqlite':
+        connection.close()
+        path = connection.settings_dict['NAME']
+        if os.path.exists(path):
+            os.remove(path)
+    schema.create_tables()
+    call_command('migrate', verbosity=0, interactive=False)
+    started = time.perf_counter()
+    ctx = seed.seed(users=args.users, expenses=args.expenses, seed_value=args.seed)
+    print(f"Seeded {args.users} users and {args.expenses} expenses in {time.perf_counter() - started:.1f}s")
+    return ctx
+
+def worker(ctx, plan, results, lock, seed_value):
+    from django.db import connection
+    from django.test import Client
+    from metrics.middleware import QueryRecorder
+    from .scenarios import SCENARIOS
+
+    client = Client()
+    rng = random.Random(seed_value)
+    local = defaultdict(lambda: {'latencies': [], 'queries': [], 'errors': 0})
+    try:
+        for name in plan:
+            recorder = QueryRecorder()
+            start = time.perf_counter()
+            with connection.execute_wrapper(recorder):
+                response = SCENARIOS[name](client, ctx, rng)
+            elapsed = time.perf_counter() - start
+            entry = local[name]
+            entry['latencies'].append(elapsed)
+            entry['queries'].append(recorder.count)
+            if response.status_code >= 500:
+                entry['errors'] += 1
+    finally:
+        connection.close()
+    with lock:
+        for name, entry in local.items():
+            merged = results[name]
+            merged['latencies'].extend(entry['latencies'])
+            merged['queries'].extend(entry['queries'])
+            merged['errors'] += entry['errors']
+
+def run_mix(ctx, mix_name, total_requests, concurrency, seed_value):
+    from .scenarios import MIXES
+
+    mix = MIXES[mix_name]
+    rng = random.Random(seed_value)
+    names = list(mix)
+    plan = rng.choices(names, weights=[mix[name] for name in names], k=total_requests)
+
+    results = defaultdict(lambda: {'latencies': [], 'queries': [], 'errors': 0})
+    lock = threading.Lock()
+    threads = [
+        threading.Thread(target=worker, args=(ctx, plan[i::concurrency], results, lock, seed_value + i))
+        for i in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+    return summarize(results, wall)
+
+def summarize(results, wall):
+    endpoints = {}
+    for name, entry in sorted(results.items()):
+        latencies = sorted(entry['latencies'])
+        endpoints[name] = {
+            'requests': len(latencies),
+            'errors': entry['errors'],
+            'throughput_rps': round(len(latencies) / wall, 2) if wall else 0.0,
+            'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+            'mean_queries': round(sum(entry['queries']) / len(entry['queries']), 2) if entry['queries'] else 0.0,
+            'max_queries': max(entry['queries']) if entry['queries'] else 0,
+        }
+    total = sum(endpoint['requests'] for endpoint in endpoints.values())
+    return {
+        'wall_seconds': round(wall, 3),
+        'total_requests': total,
+        'throughput_rps': round(total / wall, 2) if wall else 0.0,
+        'endpoints': endpoints,
+    }
+
+def print_report(report):
+    header = f"{'endpoint':<26}{'reqs':>7}{'err':>5}{'rps':>10}{'p50 ms':>10}{'p99 ms':>10}{'queries':>9}"
+    print(header)
+    print('-' * len(header))
+    for name, row in report['endpoints'].items():
+        print(f"{name:<26}{row['requests']:>7}{row['errors']:>5}{row['throughput_rps']:>10.1f}"
+              f"{row['p50_ms']:>10.2f}{row['p99_ms']:>10.2f}{row['mean_queries']:>9.2f}")
+    print('-' * len(header))
+    print(f"{report['total_requests']} requests in {report['wall_seconds']:.2f}s "
+          f"({report['throughput_rps']:.1f} req/s)")
+
+def compare(report, baseline, tolerance, query_tolerance):
+    """
+    Returns a list of human readable regressions against the baseline.
+    """
+    regressions = []
+    for name, base in baseline.get('endpoints', {}).items():
+        current = report['endpoints'].get(name)
+        if not current:
+            continue
+        for metric in ('p50_ms', 'p99_ms'):
+            if base[metric] and current[metric] > base[metric] * (1 + tolerance):
+                regressions.append(f"{name}: {metric} {current[metric]:.2f} > baseline {base[metric]:.2f} "
+                                   f"(+{tolerance:.0%} allowed)")
+        if current['mean_queries'] > base['mean_queries'] + query_tolerance:
+            regressions.append(f"{name}: mean_queries {current['mean_queries']} > baseline {base['mean_queries']}")
+        if current['errors'] > base.get('errors', 0):
+            regressions.append(f"{name}: {current['errors']} server errors (baseline {base.get('errors', 0)})")
+    return regressions
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--expenses', type=int, default=200_000)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--mix', default='default')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db-path', help='SQLite file to use (default: backend/bench.sqlite3)')
+    parser.add_argument('--reuse-db', action='store_true', help='Skip seeding when the database already exists')
+    parser.add_argument('--warmup', type=int, default=100, help='Requests to run before measuring')
+    parser.add_argument('--output', help='Write the JSON report here')
+    parser.add_argument('--baseline', help='Fail when results regress against this JSON report')
+    parser.add_argument('--save-baseline', help='Write the JSON report as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed latency regression (fraction)')
+    parser.add_argument('--query-tolerance', type=float, default=0.5,
+                        help='Allowed increase in mean SQL statements per request')
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    setup_django(args)
+    ctx = prepare_database(args)
+
+    from .scenarios import MIXES
+    if args.mix not in MIXES:
+        print(f"Unknown mix '{args.mix}'. Available: {', '.join(MIXES)}")
+        return 2
+
+    if args.warmup:
+        run_mix(ctx, args.mix, args.warmup, 1, args.seed + 1000)
+    report = run_mix(ctx, args.mix, args.requests, args.concurrency, args.seed)
+    report['meta'] = {
+        'mix': args.mix, 'concurrency': args.concurrency, 'users': args.users,
+        'expenses': args.expenses, 'seed': args.seed,
+    }
+    print_report(report)
+
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, 'w') as handle:
+            json.dump(report, handle, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as handle:
+            baseline = json.load(handle)
+        regressions = compare(report, baseline, args.tolerance, args.query_tolerance)
+        if regressions:
+            print('\nRegressions against baseline:')
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print('\nNo regressions against baseline.')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
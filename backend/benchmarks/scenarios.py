@@ -0,0 +1,137 @@
+"""
+Request scenarios and traffic mixes driven by benchmarks.run.
+
+Each scenario takes (client, ctx, rng) and issues exactly one request,
+returning the response. The key is used as the endpoint name in reports.
+"""
+
+from datetime import date, timedelta
+from .seed import BENCH_PASSWORD, PIN
+
+def _auth(user):
+    return {'HTTP_AUTHORIZATION': f"Bearer {user['token']}"}
+
+def signup(client, ctx, rng):
+    n = ctx['signup_counter'] = ctx.get('signup_counter', 0) + 1
+    name = f"new{rng.getrandbits(40):x}{n}"
+    return client.post('/api/accounts/signup/', {
+        'username': name,
+        'email': f"{name}@example.com",
+        'password': 'p4ssw0rd!',
+        're_password': 'p4ssw0rd!',
+    }, content_type='application/json')
+
+def login(client, ctx, rng):
+    user = rng.choice(ctx['users'])
+    return client.post('/api/accounts/login/', {
+        'username': user['username'],
+        'password': BENCH_PASSWORD,
+    }, content_type='application/json')
+
+def add_transaction(client, ctx, rng):
+    user = rng.choice(ctx['users'])
+    return client.post('/api/transactions/add/', {
+        'category_name': rng.choice(ctx['categories']),
+        'category_description': 'Bench expense',
+        'amount': f"{rng.uniform(10, 5000):.2f}",
+        'date': date.today().isoformat(),
+        'payment_method': 'UPI',
+    }, content_type='application/json', **_auth(user))
+
+def get_expenses(client, ctx, rng):
+    user = rng.choice(ctx['users'])
+    params = {}
+    if rng.random() < 0.7:
+        params['start_date'] = (date.today() - timedelta(days=30)).isoformat()
+        params['end_date'] = date.today().isoformat()
+    if rng.random() < 0.3:
+        params['category'] = rng.choice(ctx['categories'])
+    return client.get('/api/expenses/', params, **_auth(user))
+
+def search_expenses(client, ctx, rng):
+    params = {'q': rng.choice(['swiggy', 'uber', 'bill', 'netflix', 'pharmacy'])}
+    if rng.random() < 0.3:
+        params['min_amount'] = 500
+    if rng.random() < 0.3:
+        params['categories'] = ','.join(rng.sample(ctx['categories'], 2))
+    return client.get('/api/expenses/search/', params, **_auth(rng.choice(ctx['users'])))
+
+def get_recent_transaction(client, ctx, rng):
+    return client.get('/api/transactions/latest/', **_auth(rng.choice(ctx['users'])))
+
+def get_monthly_expense(client, ctx, rng):
+    return client.get('/api/monthly_expense/', **_auth(rng.choice(ctx['users'])))
+
+def dashboard(client, ctx, rng):
+    return client.get('/api/dashboard/', **_auth(rng.choice(ctx['users'])))
+
+def get_budget(client, ctx, rng):
+    return client.get('/api/categorize/budget/', {'category_name': rng.choice(ctx['categories'])},
+                      **_auth(rng.choice(ctx['users'])))
+
+def update_budget(client, ctx, rng):
+    return client.post('/api/categorize/budget/update/', {
+        'category_name': rng.choice(ctx['categories']),
+        'budget': rng.choice([2000, 5000, 10000]),
+    }, content_type='application/json', **_auth(rng.choice(ctx['users'])))
+
+def process_payment(client, ctx, rng):
+    recipient = rng.choice(ctx['recipients'])
+    return client.post('/api/payment/process/', dict(recipient, amount=f"{rng.uniform(1, 500):.2f}", pin_no=PIN),
+                       content_type='application/json', **_auth(rng.choice(ctx['users'])))
+
+def process_batch_payment(client, ctx, rng):
+    payments = [dict(recipient, amount=f"{rng.uniform(1, 500):.2f}")
+                for recipient in rng.sample(ctx['recipients'], min(20, len(ctx['recipients'])))]
+    return client.post('/api/payment/process/batch/', {'pin_no': PIN, 'payments': payments},
+                       content_type='application/json', **_auth(rng.choice(ctx['users'])))
+
+def create_order(client, ctx, rng):
+    return client.post('/api/create_order/', {'amount': rng.randrange(100, 100000), 'category': 'Food'},
+                       content_type='application/json')
+
+def calculate_tax(client, ctx, rng):
+    return client.post('/api/calculate-tax/', {
+        'gross_income': rng.randrange(300000, 4000000),
+        'deduction_80c': rng.choice([0, 50000, 150000]),
+        'deduction_80d': rng.choice([0, 25000]),
+    }, content_type='application/json')
+
+SCENARIOS = {
+    'signup': signup,
+    'login': login,
+    'add_transaction': add_transaction,
+    'get_expenses': get_expenses,
+    'search_expenses': search_expenses,
+    'get_recent_transaction': get_recent_transaction,
+    'get_monthly_expense': get_monthly_expense,
+    'dashboard': dashboard,
+    'get_budget': get_budget,
+    'update_budget': update_budget,
+    'process_payment': process_payment,
+    'process_batch_payment': process_batch_payment,
+    'create_order': create_order,
+    'calculate_tax': calculate_tax,
+}
+
+# Relative weights per scenario.
+MIXES = {
+    # Roughly what the mobile app generates: launch reads dominate.
+    'default': {
+        'login': 4, 'signup': 1, 'dashboard': 15, 'get_recent_transaction': 10,
+        'get_monthly_expense': 10, 'get_expenses': 20, 'add_transaction': 12, 'get_budget': 8,
+        'update_budget': 3, 'process_payment': 5, 'create_order': 3, 'calculate_tax': 4,
+    },
+    'read_heavy': {
+        'dashboard': 25, 'get_recent_transaction': 15, 'get_monthly_expense': 15,
+        'get_expenses': 30, 'search_expenses': 5, 'get_budget': 10,
+    },
+    'write_heavy': {
+        'add_transaction': 50, 'process_payment': 20, 'update_budget': 10, 'signup': 5,
+        'get_expenses': 15,
+    },
+    # One 20-recipient batch against the 20 single payments it replaces.
+    'payouts': {'process_payment': 20, 'process_batch_payment': 1},
+    'auth': {'login': 80, 'signup': 20},
+    'login': {'login': 1},
+}
@@ -0,0 +1,83 @@
+"""
+DDL for the tables the views query with raw SQL.
+
+These tables are not managed by Django models in production, so the
+benchmark database creates them directly before running migrations.
+"""
+
+from django.db import connection
+from django.db.backends.signals import connection_created
+
+def _auto_pk(name):
+    if connection.vendor == 'sqlite':
+        return f"{name} INTEGER PRIMARY KEY AUTOINCREMENT"
+    return f"{name} INT AUTO_INCREMENT PRIMARY KEY"
+
+def table_statements():
+    return [
+        f"""CREATE TABLE user (
+            {_auto_pk('user_id')},
+            username VARCHAR(100) NOT NULL,
+            email VARCHAR(255) NOT NULL,
+            password VARCHAR(255) NOT NULL
+        )""",
+        """CREATE TABLE user_token (
+            user_id INT NOT NULL,
+            token VARCHAR(64) NOT NULL
+        )""",
+        f"""CREATE TABLE bank_accounts (
+            {_auto_pk('bank_acc_id')},
+            account_number VARCHAR(50) NOT NULL,
+            account_holder_name VARCHAR(100) NOT NULL,
+            bank_name VARCHAR(100) NOT NULL,
+            branch_name VARCHAR(100) NOT NULL,
+            ifsc_code VARCHAR(20) NOT NULL,
+            unique_code VARCHAR(6) NOT NULL,
+            balance DECIMAL(14, 2) NOT NULL DEFAULT 0
+        )""",
+        f"""CREATE TABLE app_accounts (
+            {_auto_pk('app_acc_id')},
+            user_id INT NOT NULL,
+            bank_acc_id INT,
+            pin_no VARCHAR(4)
+        )""",
+        f"""CREATE TABLE categories (
+            {_auto_pk('category_id')},
+            name VARCHAR(100) NOT NULL
+        )""",
+        f"""CREATE TABLE expense (
+            {_auto_pk('expense_id')},
+            user_id INT NOT NULL,
+            category_id INT NOT NULL,
+            amount DECIMAL(10, 2) NOT NULL,
+            date DATETIME NOT NULL,
+            payment_method VARCHAR(100),
+            description VARCHAR(255)
+        )""",
+        f"""CREATE TABLE categorize (
+            {_auto_pk('categorize_id')},
+            user_id INT NOT NULL,
+            category_id INT NOT NULL,
+            budget DECIMAL(10, 2) NOT NULL
+        )""",
+    ]
+
+def create_tables():
+    with connection.cursor() as cursor:
+        for statement in table_statements():
+            cursor.execute(statement)
+
+def tables_exist():
+    return 'expense' in connection.introspection.table_names()
+
+def _register_mysql_functions(sender, connection, **kwargs):
+    # The views use MySQL's MONTH()/YEAR(); give SQLite equivalents.
+    if connection.vendor != 'sqlite':
+        return
+    connection.connection.create_function('MONTH', 1, lambda value: int(str(value)[5:7]) if value else None,
+                                          deterministic=True)
+    connection.connection.create_function('YEAR', 1, lambda value: int(str(value)[:4]) if value else None,
+                                          deterministic=True)
+
+def register_functions():
+    connection_created.connect(_register_mysql_functions, dispatch_uid='benchmarks.schema.functions')
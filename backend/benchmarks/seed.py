@@ -0,0 +1,147 @@
+"""
+Synthetic data for the benchmark database.
+
+Everything is derived from a seeded random.Random so two runs with the same
+arguments produce the same rows (and comparable numbers).
+"""
+
+import random
+import uuid
+from datetime import datetime, timedelta
+import bcrypt
+from django.conf import settings
+from django.db import connection, transaction
+
+CATEGORIES = [
+    'Food', 'Groceries', 'Healthcare', 'Transportation', 'Utilities',
+    'Education', 'Entertainment', 'ACCOUNT TRANSFER',
+]
+PAYMENT_METHODS = ['UPI', 'Card', 'Cash', 'Net Banking']
+DESCRIPTIONS = {
+    'Food': ['Swiggy order', 'Zomato dinner', 'Cafe coffee', 'Lunch canteen'],
+    'Groceries': ['BigBasket weekly', 'Local kirana', 'DMart groceries'],
+    'Healthcare': ['Apollo pharmacy', 'Doctor consultation', 'Health insurance premium'],
+    'Transportation': ['Uber ride', 'Metro card recharge', 'Petrol pump'],
+    'Utilities': ['Electricity bill', 'Airtel broadband', 'Mobile recharge'],
+    'Education': ['Udemy course', 'Books', 'College fees'],
+    'Entertainment': ['Netflix subscription', 'Movie tickets', 'Spotify premium'],
+    'ACCOUNT TRANSFER': ['Paid to landlord', 'Paid to friend'],
+}
+
+# Every bench user shares one password, hashed once at BCRYPT_ROUNDS so
+# logins measure the configured cost without triggering rehash-on-login.
+BENCH_PASSWORD = 'bench-password'
+PIN = '1234'
+CHUNK = 5000
+
+def _chunks(rows, size=CHUNK):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+def seed(users=200, expenses=200_000, days=730, seed_value=42):
+    """
+    Inserts categories, users with tokens, one bank account per user (plus a
+    pool of recipient accounts), budgets and `expenses` expense rows spread
+    over the last `days` days. Returns a context dict for the driver.
+    """
+    rng = random.Random(seed_value)
+    password_hash = bcrypt.hashpw(BENCH_PASSWORD.encode(), bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)).decode()
+    now = datetime.now().replace(microsecond=0)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany("INSERT INTO categories (name) VALUES (%s)", [[name] for name in CATEGORIES])
+        cursor.execute("SELECT category_id, name FROM categories")
+        category_ids = {name: category_id for category_id, name in cursor.fetchall()}
+
+        cursor.executemany(
+            "INSERT INTO user (username, email, password) VALUES (%s, %s, %s)",
+            [[f"bench{i}", f"bench{i}@example.com", password_hash] for i in range(users)]
+        )
+        cursor.execute("SELECT user_id, username FROM user ORDER BY user_id")
+        user_rows = cursor.fetchall()
+
+        tokens = {user_id: uuid.UUID(int=rng.getrandbits(128)).hex for user_id, _ in user_rows}
+        cursor.executemany("INSERT INTO user_token (user_id, token) VALUES (%s, %s)",
+                           [[user_id, token] for user_id, token in tokens.items()])
+
+        # One account per user plus as many recipient-only accounts.
+        accounts = []
+        for i in range(users * 2):
+            accounts.append([f"{50000000000 + i}", f"Holder {i}", 'Bench Bank', 'Main',
+                             f"BNCH000{i % 1000:04d}", f"{i % 1000000:06d}", 10_000_000])
+        cursor.executemany("""
+            INSERT INTO bank_accounts
+                (account_number, account_holder_name, bank_name, branch_name, ifsc_code, unique_code, balance)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """, accounts)
+        cursor.execute("SELECT bank_acc_id, account_number, account_holder_name, ifsc_code FROM bank_accounts ORDER BY bank_acc_id")
+        bank_rows = cursor.fetchall()
+
+        cursor.executemany("INSERT INTO app_accounts (user_id, bank_acc_id, pin_no) VALUES (%s, %s, %s)",
+                           [[user_id, bank_rows[i][0], PIN] for i, (user_id, _) in enumerate(user_rows)])
+
+        budgets = [[user_id, category_id, rng.choice([2000, 5000, 10000, 20000])]
+                   for user_id, _ in user_rows for category_id in category_ids.values()]
+        cursor.executemany("INSERT INTO categorize (user_id, category_id, budget) VALUES (%s, %s, %s)", budgets)
+
+        user_ids = [user_id for user_id, _ in user_rows]
+        names = list(category_ids)
+        rows = []
+        for _ in range(expenses):
+            name = rng.choice(names)
+            when = now - timedelta(seconds=rng.randrange(days * 86400))
+            rows.append([
+                rng.choice(user_ids),
+                category_ids[name],
+                round(rng.lognormvariate(6, 1), 2),
+                when.strftime("%Y-%m-%d %H:%M:%S"),
+                rng.choice(PAYMENT_METHODS),
+                rng.choice(DESCRIPTIONS[name]),
+            ])
+            if len(rows) == CHUNK:
+                _insert_expenses(cursor, rows)
+                rows = []
+        if rows:
+            _insert_expenses(cursor, rows)
+
+    return {
+        'users': [{'user_id': user_id, 'username': username, 'token': tokens[user_id]}
+                  for user_id, username in user_rows],
+        'recipients': [{'account_number': number, 'recipient_name': holder, 'ifsc_code': ifsc}
+                       for _, number, holder, ifsc in bank_rows[users:]],
+        'categories': [name for name in CATEGORIES if name != 'ACCOUNT TRANSFER'],
+    }
+
+def _insert_expenses(cursor, rows):
+    cursor.executemany("""
+        INSERT INTO expense (user_id, category_id, amount, date, payment_method, description)
+        VALUES (%s, %s, %s, %s, %s, %s)
+    """, rows)
+
+def load_context():
+    """
+    Rebuilds the driver context from an already seeded database.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            SELECT u.user_id, u.username, MIN(t.token)
+            FROM user u JOIN user_token t ON t.user_id = u.user_id
+            WHERE u.username LIKE 'bench%%'
+            GROUP BY u.user_id, u.username
+            ORDER BY u.user_id
+        """)
+        users = [{'user_id': user_id, 'username': username, 'token': token}
+                 for user_id, username, token in cursor.fetchall()]
+        cursor.execute("""
+            SELECT b.account_number, b.account_holder_name, b.ifsc_code
+            FROM bank_accounts b
+            LEFT JOIN app_accounts a ON a.bank_acc_id = b.bank_acc_id
+            WHERE a.app_acc_id IS NULL
+        """)
+        recipients = [{'account_number': number, 'recipient_name': holder, 'ifsc_code': ifsc}
+                      for number, holder, ifsc in cursor.fetchall()]
+    return {
+        'users': users,
+        'recipients': recipients,
+        'categories': [name for name in CATEGORIES if name != 'ACCOUNT TRANSFER'],
+    }
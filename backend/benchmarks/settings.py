@@ -0,0 +1,68 @@
+"""
+Settings for the benchmark harness.
+
+Runs the real project settings against a local stand-in database:
+SQLite by default, or MySQL when BENCH_DB_ENGINE=mysql (BENCH_DB_NAME,
+BENCH_DB_USER, BENCH_DB_PASSWORD, BENCH_DB_HOST, BENCH_DB_PORT).
+"""
+
+import os
+
+from Trackex.settings import *  # noqa: F401,F403
+from Trackex.settings import INSTALLED_APPS, MIDDLEWARE
+
+DEBUG = False
+ALLOWED_HOSTS = ['testserver', 'localhost', '127.0.0.1']
+
+ROOT_URLCONF = 'benchmarks.urls'
+
+# 'tax-api' is not an importable module name; the package is tax_api.
+INSTALLED_APPS = [app if app != 'tax-api' else 'tax_api' for app in INSTALLED_APPS]
+MIDDLEWARE = list(MIDDLEWARE)
+
+if os.environ.get('BENCH_DB_ENGINE') == 'mysql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.mysql',
+            'NAME': os.environ.get('BENCH_DB_NAME', 'trackex_bench'),
+            'USER': os.environ.get('BENCH_DB_USER', 'root'),
+            'PASSWORD': os.environ.get('BENCH_DB_PASSWORD', ''),
+            'HOST': os.environ.get('BENCH_DB_HOST', '127.0.0.1'),
+            'PORT': os.environ.get('BENCH_DB_PORT', '3306'),
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('BENCH_DB_PATH', os.path.join(BASE_DIR, 'bench.sqlite3')),
+            'OPTIONS': {'timeout': 30},
+        }
+    }
+
+# Optional read replica (benchmarks/replicas.py): a second SQLite file, or a
+# MySQL replica host sharing the primary's credentials.
+if os.environ.get('BENCH_REPLICA_PATH') and DATABASES['default']['ENGINE'].endswith('sqlite3'):
+    DATABASES['replica'] = dict(DATABASES['default'], NAME=os.environ['BENCH_REPLICA_PATH'])
+    DATABASE_REPLICAS = ['replica']
+elif os.environ.get('BENCH_REPLICA_HOST') and DATABASES['default']['ENGINE'].endswith('mysql'):
+    DATABASES['replica'] = dict(DATABASES['default'], HOST=os.environ['BENCH_REPLICA_HOST'])
+    DATABASE_REPLICAS = ['replica']
+
+# The driver counts queries itself; keep the middleware out of the way.
+QUERY_METRICS = {'SAMPLE_RATE': 0.0}
+
+# Override to measure login at production cost (12); seeding hashes once.
+BCRYPT_ROUNDS = int(os.environ.get('BENCH_BCRYPT_ROUNDS', '10'))
+PASSWORD_HASH_WORKERS = int(os.environ.get('BENCH_PASSWORD_HASH_WORKERS', '2'))
+PASSWORD_HASH_QUEUE = PASSWORD_HASH_WORKERS * 4
+
+RAZORPAY_KEY_ID = 'rzp_test_bench'
+RAZORPAY_KEY_SECRET = 'bench_secret'
+RAZORPAY_WEBHOOK_SECRET = 'bench_webhook_secret'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'root': {'handlers': [], 'level': 'ERROR'},
+}
@@ -0,0 +1,128 @@
+"""
+Concurrent signup stress test.
+
+    python -m benchmarks.signup --names 300 --attempts 3 --concurrency 8
+    BENCH_DB_ENGINE=mysql python -m benchmarks.signup --concurrency 32
+
+Every username (and its email) is submitted --attempts times from different
+threads at the same moment, so duplicate signups race each other. The run
+fails (exit status 1) unless exactly one attempt per name returned 201, all
+others returned 400, and the user table holds no duplicate username or email.
+Throughput and latency are reported for the whole run.
+"""
+
+import argparse
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from .run import percentile, prepare_database, setup_django
+
+def attempt_plan(names, attempts, concurrency, rng):
+    """
+    Spreads the attempts for each name over distinct threads where possible.
+    """
+    plan = [[] for _ in range(concurrency)]
+    for index, name in enumerate(names):
+        for attempt in range(attempts):
+            plan[(index + attempt) % concurrency].append(name)
+    for entries in plan:
+        rng.shuffle(entries)
+    return plan
+
+def worker(names, barrier, results, lock):
+    from django.db import connection
+    from django.test import Client
+
+    client = Client()
+    local = []
+    barrier.wait()
+    try:
+        for name in names:
+            start = time.perf_counter()
+            response = client.post('/api/accounts/signup/', {
+                'username': name,
+                'email': f"{name}@example.com",
+                'password': 'p4ssw0rd!',
+                're_password': 'p4ssw0rd!',
+            }, content_type='application/json')
+            local.append((name, response.status_code, time.perf_counter() - start))
+    finally:
+        connection.close()
+    with lock:
+        results.extend(local)
+
+def duplicate_rows():
+    from django.db import connection
+    with connection.cursor() as cursor:
+        found = {}
+        for column in ('username', 'email'):
+            cursor.execute(f"SELECT {column} FROM user GROUP BY {column} HAVING COUNT(*) > 1")
+            found[column] = [row[0] for row in cursor.fetchall()]
+    return found
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--names', type=int, default=300, help='Distinct usernames to register')
+    parser.add_argument('--attempts', type=int, default=3, help='Signups submitted per username')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--expenses', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db-path')
+    parser.add_argument('--reuse-db', action='store_true')
+    args = parser.parse_args(argv)
+
+    setup_django(args)
+    prepare_database(args)
+
+    rng = random.Random(args.seed)
+    run_id = f"{rng.getrandbits(32):08x}{int(time.time()):x}"
+    names = [f"stress{run_id}n{i}" for i in range(args.names)]
+    plan = attempt_plan(names, args.attempts, args.concurrency, rng)
+
+    results = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(args.concurrency)
+    threads = [threading.Thread(target=worker, args=(entries, barrier, results, lock)) for entries in plan]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    statuses = Counter(status for _, status, _ in results)
+    created = Counter(name for name, status, _ in results if status == 201)
+    latencies = sorted(elapsed for _, _, elapsed in results)
+
+    print(f"{len(results)} signups for {len(names)} names in {wall:.2f}s "
+          f"({len(results) / wall:.1f} req/s), p50 {percentile(latencies, 0.5) * 1000:.2f} ms, "
+          f"p99 {percentile(latencies, 0.99) * 1000:.2f} ms")
+    print("status codes: " + ', '.join(f"{code}={count}" for code, count in sorted(statuses.items())))
+
+    failures = []
+    missing = [name for name in names if created[name] == 0]
+    doubled = [name for name, count in created.items() if count > 1]
+    if missing:
+        failures.append(f"{len(missing)} names never registered (e.g. {missing[0]})")
+    if doubled:
+        failures.append(f"{len(doubled)} names registered more than once (e.g. {doubled[0]})")
+    unexpected = {code: count for code, count in statuses.items() if code not in (201, 400)}
+    if unexpected:
+        failures.append(f"unexpected status codes: {unexpected}")
+    for column, values in duplicate_rows().items():
+        if values:
+            failures.append(f"{len(values)} duplicate {column} rows in the user table")
+
+    if failures:
+        print('\nFAILED:')
+        for line in failures:
+            print(f"  {line}")
+        return 1
+    print('\nOK: one account per name, duplicates rejected with 400.')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,155 @@
+"""
+Account statements with running balances.
+
+    python -m benchmarks.statement --transfers 200000 --months 6
+
+Writes that many backdated transfers between the seeded accounts, spread
+over the last `--months` months, closes the past months with
+`close_statement_months`, then pages through every month of one busy
+account via /api/ledger/statement/. Reports p50/p99 page latency for
+closed and open months and fails unless the balances chain: each entry's
+balance is the previous one plus its amount, each month opens at the
+previous month's closing balance and the last balance equals the current
+balance.
+"""
+
+import argparse
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from .run import percentile, prepare_database, setup_django
+
+def month_back(day, months):
+    index = day.year * 12 + day.month - 1 - months
+    return date(index // 12, index % 12 + 1, 1)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--transfers', type=int, default=200000)
+    parser.add_argument('--months', type=int, default=6)
+    parser.add_argument('--limit', type=int, default=100)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--expenses', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db-path')
+    parser.add_argument('--reuse-db', action='store_true')
+    args = parser.parse_args(argv)
+
+    setup_django(args)
+    ctx = prepare_database(args)
+    from django.core.cache import cache
+    from django.core.management import call_command
+    from django.db import connection
+    from django.test import Client
+    from django.utils import timezone
+    from ledger.balances import current_balance, to_amount
+    from ledger.models import BalanceSnapshot, LedgerEntry, MonthlyStatement
+
+    LedgerEntry.objects.all().delete()
+    BalanceSnapshot.objects.all().delete()
+    MonthlyStatement.objects.all().delete()
+    cache.clear()
+    user = ctx['users'][0]
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT bank_acc_id FROM app_accounts WHERE user_id = %s", [user['user_id']])
+        busy = cursor.fetchone()[0]
+        cursor.execute("SELECT bank_acc_id FROM bank_accounts")
+        accounts = [acc_id for (acc_id,) in cursor.fetchall()]
+
+    # Every fourth transfer touches the busy account so it has a long statement.
+    rng = random.Random(args.seed)
+    now = timezone.now()
+    start = month_back(now.date(), args.months)
+    first = timezone.make_aware(datetime(start.year, start.month, 1))
+    span = (now - first).total_seconds()
+    moments = sorted(first + timedelta(seconds=rng.uniform(0, span)) for _ in range(args.transfers))
+    started = time.perf_counter()
+    entries = []
+    for i, when in enumerate(moments):
+        payer, payee = rng.sample(accounts, 2)
+        if i % 4 == 0:
+            payer, payee = (busy, payee) if rng.random() < 0.5 else (payer, busy)
+            if payer == payee:
+                continue
+        amount = to_amount(rng.uniform(1, 500))
+        transfer_id = f"bench{i:027d}"
+        entries += [
+            LedgerEntry(transfer_id=transfer_id, bank_acc_id=payer, counterparty_acc_id=payee,
+                        entry_type='debit', amount=-amount, created_at=when),
+            LedgerEntry(transfer_id=transfer_id, bank_acc_id=payee, counterparty_acc_id=payer,
+                        entry_type='credit', amount=amount, created_at=when),
+        ]
+    LedgerEntry.objects.bulk_create(entries, batch_size=5000)
+    print(f"ledger: {len(entries)} entries in {time.perf_counter() - started:.1f}s")
+
+    months = [month_back(now.date(), back) for back in range(args.months, -1, -1)]
+    started = time.perf_counter()
+    for month in months[:-1]:
+        call_command('close_statement_months', '--month', f"{month:%Y-%m}", verbosity=0)
+    print(f"close: {len(months) - 1} months in {time.perf_counter() - started:.1f}s")
+
+    client = Client()
+    auth = {'HTTP_AUTHORIZATION': f"Bearer {user['token']}"}
+    latencies = {'closed': [], 'open': [], 'closed (cached)': []}
+    failures = []
+    balance = None
+    for passes in (1, 2):
+        previous_closing = None
+        for month in months:
+            page_cursor = None
+            body = None
+            while True:
+                params = {'month': f"{month:%Y-%m}", 'limit': args.limit}
+                if page_cursor:
+                    params['cursor'] = page_cursor
+                started = time.perf_counter()
+                response = client.get('/api/ledger/statement/', params, **auth)
+                elapsed = time.perf_counter() - started
+                if response.status_code != 200:
+                    failures.append(f"{month:%Y-%m}: HTTP {response.status_code} {response.content[:200]!r}")
+                    body = None
+                    break
+                body = response.json()
+                kind = 'open' if not body['closed'] else 'closed' if passes == 1 else 'closed (cached)'
+                latencies[kind].append(elapsed)
+                if page_cursor is None:
+                    opening = Decimal(body['opening_balance'])
+                    if previous_closing is not None and opening != previous_closing:
+                        failures.append(f"{month:%Y-%m} opens at {opening}, previous month closed at {previous_closing}")
+                    balance = opening
+                for entry in body['entries']:
+                    balance += Decimal(entry['amount'])
+                    if Decimal(entry['balance']) != balance:
+                        failures.append(f"entry {entry['entry_id']}: balance {entry['balance']}, expected {balance}")
+                        break
+                page_cursor = body['next_cursor']
+                if not page_cursor:
+                    break
+            if body is None:
+                # The month could not be read; its balances cannot be chained.
+                previous_closing = None
+                continue
+            if body.get('closing_balance') is not None and Decimal(body['closing_balance']) != balance:
+                failures.append(f"{month:%Y-%m} closes at {body['closing_balance']}, entries end at {balance}")
+            previous_closing = balance
+
+    for kind, values in latencies.items():
+        values.sort()
+        print(f"{kind}: {len(values)} pages, p50 {percentile(values, 0.5) * 1000:.1f}ms, "
+              f"p99 {percentile(values, 0.99) * 1000:.1f}ms")
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT balance FROM bank_accounts WHERE bank_acc_id = %s", [busy])
+        current = current_balance(cursor, busy, cursor.fetchone()[0])
+    if balance is None or balance != current:
+        failures.append(f"statement ends at {balance}, current balance is {current}")
+
+    if failures:
+        print("FAILED: " + "; ".join(failures[:10]) + ".")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""
+Statement import throughput.
+
+    python -m benchmarks.statement_import --lines 50000
+
+Generates a synthetic bank CSV, uploads it to /api/transactions/import/ for
+one bench user and reports the import time. The same file is then uploaded
+again; the second run must insert nothing (every line is a duplicate).
+"""
+
+import argparse
+import io
+import random
+import sys
+import time
+from datetime import date, timedelta
+from .run import prepare_database, setup_django
+from .seed import DESCRIPTIONS
+
+def build_statement(lines, rng):
+    out = io.StringIO()
+    out.write("Date,Narration,Withdrawal Amt.,Deposit Amt.\n")
+    start = date.today() - timedelta(days=365)
+    descriptions = [text for texts in DESCRIPTIONS.values() for text in texts]
+    for i in range(lines):
+        day = start + timedelta(days=i * 365 // max(lines, 1))
+        if rng.random() < 0.1:
+            out.write(f"{day:%d/%m/%Y},Salary credit,,{rng.randrange(30000, 90000)}.00\n")
+        else:
+            out.write(f'{day:%d/%m/%Y},{rng.choice(descriptions)} #{i},"{rng.uniform(10, 5000):,.2f}",\n')
+    return out.getvalue().encode()
+
+def upload(client, user, payload):
+    handle = io.BytesIO(payload)
+    handle.name = 'statement.csv'
+    started = time.perf_counter()
+    response = client.post('/api/transactions/import/', {'file': handle, 'default_category': 'Utilities'},
+                           HTTP_AUTHORIZATION=f"Bearer {user['token']}")
+    return response, time.perf_counter() - started
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lines', type=int, default=50_000)
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--expenses', type=int, default=10_000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db-path')
+    parser.add_argument('--reuse-db', action='store_true')
+    args = parser.parse_args(argv)
+
+    setup_django(args)
+    ctx = prepare_database(args)
+    from django.test import Client
+
+    rng = random.Random(args.seed)
+    payload = build_statement(args.lines, rng)
+    user = rng.choice(ctx['users'])
+    client = Client()
+
+    first, elapsed = upload(client, user, payload)
+    body = first.json()
+    print(f"import: {args.lines} lines ({len(payload) / 1e6:.1f} MB) in {elapsed:.2f}s "
+          f"({args.lines / elapsed:.0f} lines/s) -> HTTP {first.status_code}, "
+          f"inserted {body.get('inserted')}, credits {body.get('credits')}, errors {body.get('error_count')}")
+
+    second, elapsed = upload(client, user, payload)
+    body = second.json()
+    print(f"re-import: {elapsed:.2f}s -> HTTP {second.status_code}, inserted {body.get('inserted')}, "
+          f"duplicates {body.get('duplicates')}")
+    if first.status_code != 201 or body.get('inserted') != 0:
+        print("FAILED: the re-import should insert nothing.")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
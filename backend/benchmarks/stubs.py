@@ -0,0 +1,250 @@
+"""
+Offline stand-ins for the third-party services the API talks to.
+
+install() registers fake ``razorpay`` and ``yfinance`` modules in
+sys.modules before Django imports any views, so a benchmark run never
+touches the network and Razorpay latency does not pollute the numbers.
+
+By default the fake Razorpay client answers in memory. Given a
+``base_url`` (RAZORPAY_API_BASE_URL) it sends real HTTP requests through
+the gateway's session instead, e.g. to a FakeRazorpayServer whose latency
+and failures the benchmark controls.
+"""
+
+import hashlib
+import hmac
+import itertools
+import json
+import re
+import sys
+import threading
+import time
+import types
+from urllib.parse import parse_qs, urlsplit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class BadRequestError(Exception):
+    pass
+
+class ServerError(Exception):
+    pass
+
+class GatewayError(Exception):
+    pass
+
+class SignatureVerificationError(Exception):
+    pass
+
+def _new_order(order_id, data):
+    return {
+        'id': order_id,
+        'entity': 'order',
+        'amount': data.get('amount'),
+        'currency': data.get('currency', 'INR'),
+        'receipt': data.get('receipt'),
+        'status': 'created',
+        'created_at': int(time.time()),
+    }
+
+class _FakeOrders:
+    def __init__(self, client):
+        self._client = client
+        self._ids = itertools.count(1)
+
+    def create(self, data=None, **kwargs):
+        data = data or {}
+        if self._client.base_url:
+            return self._client.request('post', '/orders', json=data)
+        order = _new_order(f"order_bench{next(self._ids):010d}", data)
+        self._client.orders[order['id']] = order
+        return order
+
+    def fetch(self, order_id, data=None, **kwargs):
+        if self._client.base_url:
+            return self._client.request('get', f'/orders/{order_id}')
+        return self._client.orders[order_id]
+
+def _list_payments(payments, params):
+    # Newest first, like the real listing.
+    start = int(params.get('from', 0))
+    end = int(params.get('to', 2 ** 62))
+    count = min(int(params.get('count', 10)), 100)
+    skip = int(params.get('skip', 0))
+    matched = [p for p in payments if start <= p['created_at'] <= end]
+    matched.sort(key=lambda p: (p['created_at'], p['id']), reverse=True)
+    items = matched[skip:skip + count]
+    return {'entity': 'collection', 'count': len(items), 'items': items}
+
+class _FakePayments:
+    def __init__(self, client):
+        self._client = client
+
+    def all(self, data=None, **kwargs):
+        data = data or {}
+        if self._client.base_url:
+            return self._client.request('get', '/payments', params=data)
+        return _list_payments(self._client.payments, data)
+
+class _FakeUtility:
+    def __init__(self, client):
+        self._client = client
+
+    def verify_payment_signature(self, parameters):
+        message = f"{parameters['razorpay_order_id']}|{parameters['razorpay_payment_id']}"
+        expected = sign(self._client.secret, message)
+        if not hmac.compare_digest(expected, parameters.get('razorpay_signature') or ''):
+            raise SignatureVerificationError('Razorpay Signature Verification Failed')
+        return True
+
+    def verify_webhook_signature(self, body, signature, secret):
+        if not hmac.compare_digest(sign(secret, body), signature or ''):
+            raise SignatureVerificationError('Razorpay Signature Verification Failed')
+        return True
+
+class FakeRazorpayClient:
+    def __init__(self, session=None, auth=None, **options):
+        self.session = session
+        self.auth = auth
+        self.secret = auth[1] if auth else ''
+        self.base_url = options.get('base_url')
+        self.orders = {}
+        self.payments = []
+        self.order = _FakeOrders(self)
+        self.payment = _FakePayments(self)
+        self.utility = _FakeUtility(self)
+
+    def request(self, method, path, **kwargs):
+        response = getattr(self.session, method)(f"{self.base_url}{path}", auth=self.auth, **kwargs)
+        if response.status_code >= 500:
+            raise ServerError(response.text)
+        if response.status_code >= 400:
+            raise BadRequestError(response.text)
+        return response.json()
+
+class FakeRazorpayServer:
+    """
+    A local HTTP server speaking enough of the Razorpay orders API for the
+    gateway. `delay` (seconds) and `fail` (answer 503) can be changed while
+    it runs to simulate a slow or failing provider. Payments to be listed
+    are registered with add_payment.
+    """
+
+    def __init__(self, delay=0.0, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.requests = 0
+        self.orders = {}
+        self.payments = []
+        self._ids = itertools.count(1)
+        self._payment_ids = itertools.count(1)
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status, body):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                data = json.loads(self.rfile.read(length) or b'{}')
+                status, body = server.handle('POST', self.path, data)
+                self._reply(status, body)
+
+            def do_GET(self):
+                status, body = server.handle('GET', self.path, None)
+                self._reply(status, body)
+
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def handle(self, method, path, data):
+        with self._lock:
+            self.requests += 1
+        if self.delay:
+            time.sleep(self.delay)
+        if self.fail:
+            return 503, {'error': {'code': 'SERVER_ERROR', 'description': 'Service unavailable'}}
+        if method == 'POST' and path == '/v1/orders':
+            with self._lock:
+                order = _new_order(f"order_fake{next(self._ids):010d}", data)
+                self.orders[order['id']] = order
+            return 200, order
+        url = urlsplit(path)
+        if method == 'GET' and url.path == '/v1/payments':
+            params = {key: values[0] for key, values in parse_qs(url.query).items()}
+            return 200, _list_payments(self.payments, params)
+        match = re.fullmatch(r'/v1/orders/([\w]+)', path)
+        if method == 'GET' and match and match.group(1) in self.orders:
+            return 200, self.orders[match.group(1)]
+        return 400, {'error': {'code': 'BAD_REQUEST_ERROR', 'description': 'The id provided does not exist'}}
+
+    def add_payment(self, order_id, status, method='upi', created_at=None):
+        payment = {
+            'id': f"pay_fake{next(self._payment_ids):010d}",
+            'entity': 'payment',
+            'order_id': order_id,
+            'status': status,
+            'method': method,
+            'created_at': int(created_at if created_at is not None else time.time()),
+        }
+        with self._lock:
+            self.payments.append(payment)
+        return payment
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+def sign(secret, message):
+    """
+    HMAC-SHA256 hex digest, the scheme Razorpay uses for payment and
+    webhook signatures.
+    """
+    if isinstance(message, str):
+        message = message.encode()
+    return hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+
+def _fake_yf_download(*args, **kwargs):
+    raise RuntimeError('yfinance is stubbed out in benchmarks')
+
+class _FakeTicker:
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.info = {}
+
+def install():
+    errors = types.ModuleType('razorpay.errors')
+    errors.BadRequestError = BadRequestError
+    errors.ServerError = ServerError
+    errors.GatewayError = GatewayError
+    errors.SignatureVerificationError = SignatureVerificationError
+    razorpay = types.ModuleType('razorpay')
+    razorpay.Client = FakeRazorpayClient
+    razorpay.errors = errors
+    sys.modules['razorpay'] = razorpay
+    sys.modules['razorpay.errors'] = errors
+
+    yfinance = types.ModuleType('yfinance')
+    yfinance.download = _fake_yf_download
+    yfinance.Ticker = _FakeTicker
+    sys.modules['yfinance'] = yfinance
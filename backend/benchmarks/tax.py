@@ -0,0 +1,65 @@
+"""
+Scalar vs vectorized tax computation.
+
+    python -m benchmarks.tax --scenarios 100,1000,10000
+
+Times calculate_old_regime_tax / calculate_new_regime_tax in a Python loop
+against tax_api.batch.evaluate_scenarios over the same random scenarios,
+and checks both produce the same figures.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+def make_scenarios(count, rng):
+    return [{
+        'gross_income': rng.randrange(0, 5_000_000),
+        'deduction_80c': rng.choice([0, 50000, 150000]),
+        'deduction_80d': rng.choice([0, 25000, 50000]),
+        'nps_contribution': rng.choice([0, 50000]),
+        'home_loan_interest': rng.choice([0, 200000]),
+    } for _ in range(count)]
+
+def best_of(repeats, func, *args):
+    best = float('inf')
+    result = None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenarios', default='100,1000,10000')
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+    import django
+    django.setup()
+    from tax_api.batch import evaluate_scenarios, parse_deductions
+    from tax_api.views import calculate_new_regime_tax, calculate_old_regime_tax
+
+    def scalar(scenarios):
+        return [(calculate_old_regime_tax(float(s['gross_income']), parse_deductions(s)),
+                 calculate_new_regime_tax(float(s['gross_income']))) for s in scenarios]
+
+    rng = random.Random(7)
+    print(f"{'scenarios':>10}{'scalar ms':>12}{'vector ms':>12}{'speedup':>9}")
+    for count in [int(value) for value in args.scenarios.split(',')]:
+        scenarios = make_scenarios(count, rng)
+        scalar_time, expected = best_of(args.repeats, scalar, scenarios)
+        vector_time, results = best_of(args.repeats, evaluate_scenarios, scenarios)
+        for (old, new), row in zip(expected, results):
+            if abs(old - row["Old Regime Tax"]) > 0.01 or abs(new - row["New Regime Tax"]) > 0.01:
+                print(f"Mismatch: scalar ({old}, {new}) vs vectorized {row}")
+                return 1
+        print(f"{count:>10}{scalar_time * 1000:>12.2f}{vector_time * 1000:>12.2f}{scalar_time / vector_time:>8.1f}x")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,22 @@
+from django.urls import path, include
+
+# Same routes as Trackex.urls minus stock_prediction, whose views load
+# TensorFlow models at import time and call out to Yahoo Finance.
+urlpatterns = [
+    path('api/accounts/', include('accounts.urls')),
+    path('api/transactions/', include('transactions.urls')),
+    path('api/categories/', include('categories.urls')),
+    path('api/', include('transaction_history.urls')),
+    path('api/payment/', include('payment.urls')),
+    path('', include('add_account.urls')),
+    path('api/categorize/', include('categorize.urls')),
+    path('api/profilee/', include('profilee.urls')),
+    path('api/', include('tax_api.urls')),
+    path('api/', include('razarpay_payments.urls')),
+    path('api/dashboard/', include('dashboard.urls')),
+    path('', include('metrics.urls')),
+    path('api/recurring/', include('recurring.urls')),
+    path('api/forecast/', include('forecast.urls')),
+    path('api/anomalies/', include('anomalies.urls')),
+    path('api/ledger/', include('ledger.urls')),
+]
@@ -0,0 +1,126 @@
+"""
+Razorpay webhook ingestion.
+
+    python -m benchmarks.webhooks --orders 2000 --concurrency 8
+
+Creates orders through /api/create_order/, then fires signed
+payment.captured webhooks for each of them from several threads, every
+event delivered twice and a stale payment.failed mixed in for some orders.
+Reports the endpoint's p50/p99 latency, drains the inbox with
+`process_webhook_events --once` and fails unless every payment ended up
+successful and every event was stored exactly once.
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from .run import percentile, prepare_database, setup_django
+from .stubs import sign
+
+def webhook(event_id, event, order_id, payment_id):
+    body = json.dumps({
+        'entity': 'event',
+        'event': event,
+        'payload': {'payment': {'entity': {
+            'id': payment_id, 'order_id': order_id, 'method': 'upi',
+            'status': 'captured' if event == 'payment.captured' else 'failed',
+        }}},
+    }).encode()
+    return event_id, body
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=1,
+                        help='process_webhook_events workers (keep 1 on SQLite).')
+    parser.add_argument('--failed-share', type=float, default=0.2)
+    parser.add_argument('--users', type=int, default=5)
+    parser.add_argument('--expenses', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db-path')
+    parser.add_argument('--reuse-db', action='store_true')
+    args = parser.parse_args(argv)
+
+    setup_django(args)
+    prepare_database(args)
+    from django.conf import settings
+    from django.core.management import call_command
+    from django.db import connection
+    from django.test import Client
+    from razarpay_payments.models import Payment, WebhookEvent
+
+    Payment.objects.all().delete()
+    WebhookEvent.objects.all().delete()
+    client = Client()
+    order_ids = []
+    for i in range(args.orders):
+        response = client.post('/api/create_order/', {'amount': 10000 + i, 'category': 'Bench'},
+                               content_type='application/json')
+        order_ids.append(response.json()['order_id'])
+
+    rng = random.Random(args.seed)
+    deliveries = []
+    for i, order_id in enumerate(order_ids):
+        payment_id = f"pay_bench{i:010d}"
+        captured = webhook(f"evt_cap_{i}", 'payment.captured', order_id, payment_id)
+        deliveries += [captured, captured]
+        if rng.random() < args.failed_share:
+            deliveries.append(webhook(f"evt_fail_{i}", 'payment.failed', order_id, payment_id))
+    rng.shuffle(deliveries)
+
+    secret = settings.RAZORPAY_WEBHOOK_SECRET
+    latencies, statuses = [], {}
+    lock = threading.Lock()
+
+    def fire(chunk):
+        local_client = Client()
+        local_latencies, local_statuses = [], {}
+        try:
+            for event_id, body in chunk:
+                started = time.perf_counter()
+                response = local_client.post('/api/razorpay/webhook/', body, content_type='application/json',
+                                             HTTP_X_RAZORPAY_SIGNATURE=sign(secret, body),
+                                             HTTP_X_RAZORPAY_EVENT_ID=event_id)
+                local_latencies.append(time.perf_counter() - started)
+                key = response.json().get('status', response.status_code)
+                local_statuses[key] = local_statuses.get(key, 0) + 1
+        finally:
+            connection.close()
+        with lock:
+            latencies.extend(local_latencies)
+            for key, count in local_statuses.items():
+                statuses[key] = statuses.get(key, 0) + count
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=fire, args=(deliveries[i::args.concurrency],))
+               for i in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    print(f"webhooks: {len(deliveries)} deliveries in {elapsed:.2f}s ({len(deliveries) / elapsed:.0f}/s), "
+          f"p50 {percentile(latencies, 0.5) * 1000:.1f}ms, p99 {percentile(latencies, 0.99) * 1000:.1f}ms, "
+          f"{statuses}")
+
+    started = time.perf_counter()
+    call_command('process_webhook_events', '--once', '--workers', str(args.workers))
+    print(f"worker: drained in {time.perf_counter() - started:.2f}s")
+
+    unique_events = len({event_id for event_id, _ in deliveries})
+    stored = WebhookEvent.objects.count()
+    pending = WebhookEvent.objects.exclude(status__in=['processed', 'ignored']).count()
+    not_successful = Payment.objects.exclude(status='successful').count()
+    if stored != unique_events or pending or not_successful:
+        print(f"FAILED: {stored} events stored for {unique_events} unique, {pending} unprocessed, "
+              f"{not_successful} payments not successful.")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
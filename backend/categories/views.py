@@ -1,7 +1,7 @@
-from django.db import connection
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
+from Trackex.routers import read_connection
 from .serializers import CategorySerializer
 
 @api_view(['GET'])
@@ -10,7 +10,7 @@ def get_categories(request):
     Retrieves all categories from the categories table using raw SQL.
     """
     try:
-        with connection.cursor() as cursor:
+        with read_connection().cursor() as cursor:
             query = "SELECT name FROM categories"
             cursor.execute(query)
             rows = cursor.fetchall()
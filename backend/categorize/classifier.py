@@ -0,0 +1,181 @@
+import math
+import os
+import re
+import threading
+import time
+import zlib
+import numpy as np
+from django.conf import settings
+
+# Expense category prediction.
+#
+# A multinomial naive Bayes model over hashed features: word tokens and
+# character trigrams of the description, a log2 amount bucket and the
+# payment method. Features are hashed with crc32 into HASH_DIM buckets, so
+# the model is a dense (classes x HASH_DIM) float32 matrix of log
+# likelihoods and predicting is a column gather plus a sum — a few
+# microseconds, cheap enough to run inline on every write.
+#
+# `manage.py train_categorizer` fits the model from labelled expense rows and
+# writes it to CATEGORIZER_MODEL_PATH. Each process loads it on first use and
+# picks up a retrained file within MODEL_CHECK_SECONDS.
+
+HASH_DIM = 1 << 16
+MODEL_CHECK_SECONDS = 60
+MAX_DESCRIPTION_CHARS = 64
+
+_digits = re.compile(r'\d+')
+_spaces = re.compile(r'\s+')
+_words = re.compile(r'[a-z]{2,}')
+
+def normalize(description):
+    text = _digits.sub('0', (description or '').lower())
+    return _spaces.sub(' ', text).strip()[:MAX_DESCRIPTION_CHARS]
+
+def features(description, amount=None, payment_method=None):
+    """
+    Returns the list of hashed feature indices for one expense.
+    """
+    text = normalize(description)
+    tokens = ['w:' + word for word in _words.findall(text)]
+    padded = f" {text} "
+    tokens.extend('c:' + padded[i:i + 3] for i in range(len(padded) - 2))
+    if amount is not None:
+        try:
+            tokens.append(f"a:{int(math.log2(float(amount) + 1))}")
+        except (TypeError, ValueError):
+            pass
+    if payment_method:
+        tokens.append('p:' + payment_method.strip().lower())
+    return [zlib.crc32(token.encode('utf-8')) & (HASH_DIM - 1) for token in tokens]
+
+class CategoryClassifier:
+
+    def __init__(self, classes, log_prior, log_likelihood):
+        self.classes = list(classes)
+        self.log_prior = np.asarray(log_prior, dtype=np.float32)
+        # Stored feature-major so one prediction gathers contiguous rows.
+        self.weights = np.ascontiguousarray(np.asarray(log_likelihood, dtype=np.float32).T)
+
+    @classmethod
+    def fit(cls, class_counts, feature_counts, classes, alpha=0.1):
+        """
+        Builds a model from per-class row counts and a (classes x HASH_DIM)
+        matrix of feature counts, with additive smoothing `alpha`.
+        """
+        class_counts = np.asarray(class_counts, dtype=np.float64)
+        feature_counts = np.asarray(feature_counts, dtype=np.float64)
+        log_prior = np.log(class_counts / class_counts.sum())
+        smoothed = feature_counts + alpha
+        log_likelihood = np.log(smoothed / smoothed.sum(axis=1, keepdims=True))
+        return cls(classes, log_prior, log_likelihood)
+
+    def _probabilities(self, scores):
+        scores = scores - scores.max(axis=-1, keepdims=True)
+        exp = np.exp(scores)
+        return exp / exp.sum(axis=-1, keepdims=True)
+
+    def predict(self, description, amount=None, payment_method=None):
+        """
+        Returns (category, probability) for one expense.
+        """
+        indices = features(description, amount, payment_method)
+        scores = self.log_prior + self.weights[indices].sum(axis=0)
+        best = int(scores.argmax())
+        return self.classes[best], float(self._probabilities(scores)[best])
+
+    def predict_many(self, items):
+        """
+        Returns [(category, probability)] for an iterable of
+        (description, amount, payment_method) tuples, scored in one pass.
+        """
+        rows = [features(*item) for item in items]
+        if not rows:
+            return []
+        lengths = np.fromiter((len(row) for row in rows), dtype=np.int64, count=len(rows))
+        flat = np.fromiter((index for row in rows for index in row), dtype=np.int64, count=int(lengths.sum()))
+        gathered = self.weights[flat]
+        offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        # reduceat misbehaves on empty segments; those rows fall back to the prior.
+        sums = np.zeros((len(rows), len(self.classes)), dtype=np.float32)
+        non_empty = lengths > 0
+        if non_empty.any():
+            sums[non_empty] = np.add.reduceat(gathered, offsets[non_empty], axis=0)
+        scores = sums + self.log_prior
+        probabilities = self._probabilities(scores)
+        best = scores.argmax(axis=1)
+        return [(self.classes[i], float(probabilities[row, i])) for row, i in enumerate(best)]
+
+    def save(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = f"{path}.tmp.npz"
+        np.savez_compressed(temporary, classes=np.array(self.classes), log_prior=self.log_prior,
+                            log_likelihood=self.weights.T, hash_dim=np.array(HASH_DIM))
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            if int(data['hash_dim']) != HASH_DIM:
+                raise ValueError(f"{path} was trained with a different HASH_DIM")
+            return cls([str(name) for name in data['classes']], data['log_prior'], data['log_likelihood'])
+
+def model_path():
+    return getattr(settings, 'CATEGORIZER_MODEL_PATH',
+                   os.path.join(settings.BASE_DIR, 'ML_models', 'categorizer.npz'))
+
+def min_confidence():
+    return getattr(settings, 'CATEGORIZER_MIN_CONFIDENCE', 0.5)
+
+_model = None
+_model_mtime = None
+_checked_at = 0.0
+_model_lock = threading.Lock()
+
+def get_classifier():
+    """
+    Returns the process-wide classifier, or None when no model is trained.
+    """
+    global _model, _model_mtime, _checked_at
+    now = time.monotonic()
+    if now - _checked_at < MODEL_CHECK_SECONDS and _checked_at:
+        return _model
+    with _model_lock:
+        if now - _checked_at < MODEL_CHECK_SECONDS and _checked_at:
+            return _model
+        path = model_path()
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            mtime = None
+        if mtime != _model_mtime:
+            _model = CategoryClassifier.load(path) if mtime is not None else None
+            _model_mtime = mtime
+        _checked_at = now
+    return _model
+
+def predict_category(description, amount=None, payment_method=None):
+    """
+    Returns the predicted category name, or None when there is no model or
+    it is less than CATEGORIZER_MIN_CONFIDENCE sure.
+    """
+    model = get_classifier()
+    if model is None:
+        return None
+    category, probability = model.predict(description, amount, payment_method)
+    return category if probability >= min_confidence() else None
+
+def predict_categories(items):
+    """
+    Batch version of predict_category for (description, amount,
+    payment_method) tuples.
+    """
+    model = get_classifier()
+    items = list(items)
+    if model is None:
+        return [None] * len(items)
+    threshold = min_confidence()
+    return [category if probability >= threshold else None
+            for category, probability in model.predict_many(items)]
@@ -0,0 +1,81 @@
+import time
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from categorize.classifier import HASH_DIM, CategoryClassifier, features, model_path
+
+class Command(BaseCommand):
+    help = "Trains the expense category classifier from labelled expense rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='Where to write the model (default: CATEGORIZER_MODEL_PATH).')
+        parser.add_argument('--chunk-size', type=int, default=20000,
+                            help='Rows read per query (default: 20000).')
+        parser.add_argument('--max-rows', type=int, default=0,
+                            help='Train on at most this many of the newest rows; 0 means all.')
+        parser.add_argument('--min-examples', type=int, default=20,
+                            help='Drop categories with fewer labelled rows than this (default: 20).')
+        parser.add_argument('--alpha', type=float, default=0.1, help='Additive smoothing (default: 0.1).')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT category_id, name FROM categories")
+            names = dict(cursor.fetchall())
+        class_ids = sorted(names)
+        class_index = {category_id: i for i, category_id in enumerate(class_ids)}
+
+        class_counts = np.zeros(len(class_ids), dtype=np.int64)
+        feature_counts = np.zeros((len(class_ids), HASH_DIM), dtype=np.float64)
+        rows_seen = 0
+        last_id = None
+        # Keyset over expense_id, newest first, so memory stays at one chunk.
+        while True:
+            query = "SELECT expense_id, category_id, description, amount, payment_method FROM expense"
+            params = []
+            if last_id is not None:
+                query += " WHERE expense_id < %s"
+                params.append(last_id)
+            query += " ORDER BY expense_id DESC LIMIT %s"
+            limit = options['chunk_size']
+            if options['max_rows']:
+                limit = min(limit, options['max_rows'] - rows_seen)
+            params.append(limit)
+            with connection.cursor() as cursor:
+                cursor.execute(query, params)
+                rows = cursor.fetchall()
+            if not rows:
+                break
+
+            labels, indices = [], []
+            for _, category_id, description, amount, payment_method in rows:
+                if category_id not in class_index or not description:
+                    continue
+                row_features = features(description, amount, payment_method)
+                labels.extend([class_index[category_id]] * len(row_features))
+                indices.extend(row_features)
+                class_counts[class_index[category_id]] += 1
+            flat = np.array(labels, dtype=np.int64) * HASH_DIM + np.array(indices, dtype=np.int64)
+            feature_counts += np.bincount(flat, minlength=feature_counts.size).reshape(feature_counts.shape)
+
+            rows_seen += len(rows)
+            last_id = rows[-1][0]
+            if len(rows) < limit or (options['max_rows'] and rows_seen >= options['max_rows']):
+                break
+
+        keep = class_counts >= options['min_examples']
+        if keep.sum() < 2:
+            raise CommandError(
+                f"Need at least two categories with {options['min_examples']} labelled rows; "
+                f"found {int(keep.sum())} after reading {rows_seen} rows."
+            )
+        classes = [names[class_ids[i]] for i in np.flatnonzero(keep)]
+        model = CategoryClassifier.fit(class_counts[keep], feature_counts[keep], classes, alpha=options['alpha'])
+        path = options['output'] or model_path()
+        model.save(path)
+
+        summary = ', '.join(f"{name}={int(count)}" for name, count in zip(classes, class_counts[keep]))
+        self.stdout.write(self.style.SUCCESS(
+            f"Trained on {int(class_counts[keep].sum())} rows in {time.perf_counter() - started:.1f}s "
+            f"({summary}); wrote {path}"
+        ))
@@ -3,6 +3,9 @@ from django.db import connection
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
+from accounts.tokens import resolve_token
+from accounts.data_version import bump_data_version, conditional_on_data_version
+from Trackex.routers import read_connection
 
 def get_user_id_from_token(request):
     """
@@ -15,16 +18,15 @@ def get_user_id_from_token(request):
     if token.startswith("Bearer "):
         token = token[7:]
     try:
-        with connection.cursor() as cursor:
-            cursor.execute("SELECT user_id FROM user_token WHERE token = %s", [token])
-            user_token = cursor.fetchone()
-        if not user_token:
+        user_id = resolve_token(token)
+        if user_id is None:
             return None, Response({"error": "Invalid token."}, status=status.HTTP_401_UNAUTHORIZED)
-        return user_token[0], None
+        return user_id, None
     except Exception as e:
         return None, Response({"error": f"Token validation error: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @api_view(['GET'])
+@conditional_on_data_version
 def get_budget_by_category(request):
     """
     Retrieves the budget for a given category for the authenticated user.
@@ -41,7 +43,7 @@ def get_budget_by_category(request):
         return Response({"error": "Parameter 'category_name' is required."}, status=status.HTTP_400_BAD_REQUEST)
     
     try:
-        with connection.cursor() as cursor:
+        with read_connection(user_id).cursor() as cursor:
             sql = """
                 SELECT cat.budget
                 FROM categorize cat
@@ -87,6 +89,7 @@ def insert_budget_by_category(request):
                 VALUES (%s, %s, %s)
             """
             cursor.execute(insert_sql, [user_id, category_id, budget])
+        bump_data_version(user_id)
         return Response({"message": "Budget inserted successfully."}, status=status.HTTP_201_CREATED)
     except Exception as e:
         return Response({"error": f"An error occurred while inserting the budget: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -122,11 +125,13 @@ def update_budget_by_category(request):
                 WHERE user_id = %s AND category_id = %s
             """
             cursor.execute(update_sql, [budget, user_id, category_id])
+        bump_data_version(user_id)
         return Response({"message": "Budget updated successfully."}, status=status.HTTP_200_OK)
     except Exception as e:
         return Response({"error": f"An error occurred while updating the budget: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @api_view(['GET'])
+@conditional_on_data_version
 def get_expense_for_category_current_month(request):
     """
     Retrieves all expenses for a given category for the current month for the authenticated user.
@@ -147,7 +152,7 @@ def get_expense_for_category_current_month(request):
     current_year = now.year
 
     try:
-        with connection.cursor() as cursor:
+        with read_connection(user_id).cursor() as cursor:
             sql = """
                 SELECT expense_id, amount, date, payment_method, description
                 FROM expense
@@ -0,0 +1,21 @@
+from rest_framework import serializers
+
+# Sections the home screen can ask for in a single /api/dashboard/ call.
+DASHBOARD_FIELDS = (
+    'account',
+    'account_holder_name',
+    'monthly_expense',
+    'recent_transactions',
+)
+
+class DashboardQuerySerializer(serializers.Serializer):
+    fields = serializers.CharField(required=False, allow_blank=True)
+
+    def validate_fields(self, value):
+        requested = [field.strip() for field in value.split(',') if field.strip()]
+        unknown = [field for field in requested if field not in DASHBOARD_FIELDS]
+        if unknown:
+            raise serializers.ValidationError(
+                f"Unknown field(s): {', '.join(unknown)}. Allowed: {', '.join(DASHBOARD_FIELDS)}."
+            )
+        return requested or list(DASHBOARD_FIELDS)
@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import get_dashboard
+
+urlpatterns = [
+    path('', get_dashboard, name='dashboard'),
+]
@@ -0,0 +1,126 @@
+from datetime import datetime
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from rest_framework import status
+from accounts.data_version import conditional_on_data_version
+from accounts.tokens import resolve_token_from_request
+from Trackex.routers import read_connection
+from ledger.balances import current_balance
+from .serializers import DASHBOARD_FIELDS, DashboardQuerySerializer
+
+# Masks all but the last 4 digits of the account number.
+def mask_account_number(account_number: str) -> str:
+    account_number = str(account_number)
+    return account_number if len(account_number) <= 4 else "x" * (len(account_number) - 4) + account_number[-4:]
+
+# Returns the [start, end) datetimes of the current month so the expense
+# query can use a plain range on e.date instead of MONTH()/YEAR().
+def current_month_range(now=None):
+    now = now or datetime.now()
+    start = datetime(now.year, now.month, 1)
+    if now.month == 12:
+        end = datetime(now.year + 1, 1, 1)
+    else:
+        end = datetime(now.year, now.month + 1, 1)
+    return start, end
+
+def fetch_account(cursor, user_id):
+    """
+    Returns (account_number, balance, account_holder_name) or None.
+    """
+    cursor.execute("""
+        SELECT b.account_number, b.balance, b.account_holder_name, b.bank_acc_id
+        FROM app_accounts a
+        JOIN bank_accounts b ON a.bank_acc_id = b.bank_acc_id
+        WHERE a.user_id = %s
+    """, [user_id])
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    account_number, opening, holder_name, bank_acc_id = row
+    return account_number, current_balance(cursor, bank_acc_id, opening), holder_name
+
+def fetch_monthly_expense(cursor, user_id):
+    start, end = current_month_range()
+    cursor.execute("""
+        SELECT COALESCE(SUM(amount), 0)
+        FROM expense
+        WHERE user_id = %s
+          AND date >= %s
+          AND date < %s
+    """, [user_id, start, end])
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+def fetch_recent_transactions(cursor, user_id, limit=3):
+    cursor.execute("""
+        SELECT c.name, e.description, e.amount, e.date
+        FROM expense e
+        JOIN categories c ON e.category_id = c.category_id
+        WHERE e.user_id = %s
+        ORDER BY e.date DESC, e.expense_id DESC
+        LIMIT %s
+    """, [user_id, limit])
+    results = []
+    for cat_name, description, amount, dt in cursor.fetchall():
+        if not isinstance(dt, datetime):
+            try:
+                dt = datetime.strptime(str(dt), "%Y-%m-%d %H:%M:%S")
+            except Exception:
+                dt = datetime.now()
+        results.append({
+            'category': cat_name,
+            'description': description,
+            'amount': amount,
+            'date': dt.strftime("%Y-%m-%d"),
+            'time': dt.strftime("%H:%M:%S"),
+        })
+    return results
+
+@api_view(['GET'])
+@conditional_on_data_version
+def get_dashboard(request):
+    """
+    GET endpoint returning everything the home screen renders in one payload.
+
+    Replaces the separate calls to users_acc/account_details, account_details,
+    monthly_expense, transactions/latest and profilee/account-holder: the token
+    is resolved once and all sections are read over a single cursor.
+
+    Optional query parameter:
+      - fields: comma separated subset of account, account_holder_name,
+                monthly_expense, recent_transactions (default: all)
+    """
+    serializer = DashboardQuerySerializer(data=request.query_params)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    fields = serializer.validated_data.get('fields') or list(DASHBOARD_FIELDS)
+
+    try:
+        # Reuses the lookup TokenMiddleware already made for header tokens.
+        user_id = resolve_token_from_request(request)
+        if user_id is None:
+            return Response({'error': 'Token is required or is invalid'}, status=status.HTTP_400_BAD_REQUEST)
+
+        with read_connection(user_id).cursor() as cursor:
+            data = {}
+            # account and account_holder_name come from the same join.
+            if 'account' in fields or 'account_holder_name' in fields:
+                row = fetch_account(cursor, user_id)
+                if 'account' in fields:
+                    data['account'] = {
+                        'account_number': row[0],
+                        'masked_account_number': mask_account_number(row[0]),
+                        'balance': float(row[1]),
+                    } if row else None
+                if 'account_holder_name' in fields:
+                    data['account_holder_name'] = row[2] if row else None
+            if 'monthly_expense' in fields:
+                data['monthly_expense'] = {'total_spent': fetch_monthly_expense(cursor, user_id)}
+            if 'recent_transactions' in fields:
+                data['recent_transactions'] = fetch_recent_transactions(cursor, user_id)
+
+        return Response(data, status=status.HTTP_200_OK)
+
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
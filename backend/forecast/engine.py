@@ -0,0 +1,161 @@
+import logging
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+import numpy as np
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from .models import SpendForecast
+
+logger = logging.getLogger(__name__)
+
+# Month-end spend projection.
+#
+# Every (user, category) series is a row of a dense matrix of daily totals
+# over the last HISTORY_DAYS complete days, so the model for thousands of
+# series is fitted with a few matrix operations:
+#
+#   daily rate  = exponentially weighted mean of daily spend (half-life
+#                 HALF_LIFE_DAYS), so recent habits count most;
+#   weekday mix = spend per weekday relative to the series mean, shrunk
+#                 towards 1 by WEEKDAY_SHRINKAGE so sparse series stay flat;
+#   projection  = spent so far this month
+#                 + rate * sum of weekday factors over the days left.
+#
+# Adding an expense during the day moves spent_to_date and projected_total
+# by the same amount (record_expense); the rate is only refitted nightly.
+
+HISTORY_DAYS = 91
+HALF_LIFE_DAYS = 14.0
+WEEKDAY_SHRINKAGE = 2.0
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+def month_end(day):
+    if day.month == 12:
+        return date(day.year, 12, 31)
+    return date(day.year, day.month + 1, 1) - timedelta(days=1)
+
+def fit(daily, first_day, today):
+    """
+    Fits every series at once. `daily` is an (n_series, days) array of daily
+    spend whose column 0 is `first_day` and whose last column is the day
+    before `today`. Returns (daily_rate, remaining_factor): the expected
+    spend per day and the weekday-weighted number of days left this month
+    after today, both of shape (n_series,).
+    """
+    daily = np.asarray(daily, dtype=np.float64)
+    n_series, days = daily.shape
+    age = np.arange(days - 1, -1, -1, dtype=np.float64)
+    weights = 0.5 ** (age / HALF_LIFE_DAYS)
+    rate = daily @ weights / weights.sum()
+
+    # Weekday profile: mean spend per weekday over the series mean.
+    weekday_of_column = (first_day.weekday() + np.arange(days)) % 7
+    one_hot = np.eye(7)[weekday_of_column]
+    weekday_mean = (daily @ one_hot) / np.maximum(one_hot.sum(axis=0), 1)
+    overall_mean = daily.mean(axis=1, keepdims=True)
+    k = WEEKDAY_SHRINKAGE
+    factor = np.where(overall_mean > 0, (weekday_mean + k * overall_mean) / np.maximum((1 + k) * overall_mean, 1e-9), 1.0)
+
+    remaining = np.zeros(7)
+    day = today + timedelta(days=1)
+    last = month_end(today)
+    while day <= last:
+        remaining[day.weekday()] += 1
+        day += timedelta(days=1)
+    remaining_factor = factor @ remaining
+    return rate, remaining_factor
+
+def load_daily_totals(user_ids, since, until):
+    """
+    Returns {(user_id, category_id): {date: amount}} of daily totals for
+    the given users between since (inclusive) and until (exclusive).
+    """
+    placeholders = ', '.join(['%s'] * len(user_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            SELECT user_id, category_id, DATE(date) AS day, SUM(amount)
+            FROM expense
+            WHERE user_id IN ({placeholders}) AND date >= %s AND date < %s
+            GROUP BY user_id, category_id, DATE(date)
+        """, list(user_ids) + [since, until])
+        rows = cursor.fetchall()
+    series = {}
+    for user_id, category_id, day, amount in rows:
+        if not isinstance(day, date):
+            day = datetime.strptime(str(day)[:10], "%Y-%m-%d").date()
+        series.setdefault((user_id, category_id), {})[day] = float(amount)
+    return series
+
+def forecast_users(user_ids, today=None):
+    """
+    Fits and returns unsaved SpendForecast objects for every (user, category)
+    of `user_ids` with spend in the history window or this month.
+    """
+    today = today or date.today()
+    first_day = today - timedelta(days=HISTORY_DAYS)
+    start_of_month = month_start(today)
+    window_start = min(first_day, start_of_month)
+    series = load_daily_totals(user_ids, window_start, today + timedelta(days=1))
+    if not series:
+        return []
+
+    keys = list(series)
+    index = {day: column for column, day in
+             enumerate(first_day + timedelta(days=offset) for offset in range(HISTORY_DAYS))}
+    daily = np.zeros((len(keys), HISTORY_DAYS))
+    spent = np.zeros(len(keys))
+    for row, key in enumerate(keys):
+        for day, amount in series[key].items():
+            column = index.get(day)
+            if column is not None:
+                daily[row, column] = amount
+            if start_of_month <= day <= today:
+                spent[row] += amount
+
+    rate, remaining_factor = fit(daily, first_day, today)
+    projected = spent + rate * remaining_factor
+    fitted_at = datetime.now()
+    return [
+        SpendForecast(
+            user_id=user_id, category_id=category_id, month=start_of_month,
+            spent_to_date=Decimal(f"{spent[row]:.2f}"), projected_total=Decimal(f"{projected[row]:.2f}"),
+            daily_rate=float(rate[row]), fitted_at=fitted_at,
+        )
+        for row, (user_id, category_id) in enumerate(keys)
+    ]
+
+def record_expense(user_id, category_id, amount, when=None):
+    """
+    Intraday update after an expense is added (or, with a negative amount,
+    deleted): one UPDATE of the current month's row, or an insert when the
+    series is new.
+    """
+    when = when or datetime.now()
+    day = when.date() if isinstance(when, datetime) else when
+    if month_start(day) != month_start(date.today()):
+        return
+    amount = Decimal(str(amount))
+    month = month_start(day)
+    try:
+        updated = SpendForecast.objects.filter(user_id=user_id, category_id=category_id, month=month).update(
+            spent_to_date=F('spent_to_date') + amount, projected_total=F('projected_total') + amount
+        )
+        if not updated and amount < 0:
+            # Nothing recorded yet for the series; the next refresh counts
+            # from the remaining expenses.
+            return
+        if not updated:
+            try:
+                with transaction.atomic():
+                    SpendForecast.objects.create(user_id=user_id, category_id=category_id, month=month,
+                                                 spent_to_date=amount, projected_total=amount)
+            except IntegrityError:
+                # Created concurrently; apply the amount to that row instead.
+                SpendForecast.objects.filter(user_id=user_id, category_id=category_id, month=month).update(
+                    spent_to_date=F('spent_to_date') + amount, projected_total=F('projected_total') + amount
+                )
+    except Exception:
+        # Forecasts are advisory; never fail the write that triggered this.
+        logger.exception("Could not update spend forecast for user %s", user_id)
@@ -0,0 +1,57 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand
+from django.db import connection
+from forecast.engine import HISTORY_DAYS, forecast_users, month_start
+from forecast.models import SpendForecast
+
+UPDATE_FIELDS = ['spent_to_date', 'projected_total', 'daily_rate', 'fitted_at', 'updated_at']
+
+def fit_chunk(user_ids, today):
+    try:
+        forecasts = forecast_users(user_ids, today)
+        if forecasts:
+            SpendForecast.objects.bulk_create(
+                forecasts, batch_size=1000, update_conflicts=True,
+                unique_fields=['user_id', 'month', 'category_id'], update_fields=UPDATE_FIELDS,
+            )
+        return len(forecasts)
+    finally:
+        connection.close()
+
+class Command(BaseCommand):
+    help = "Refits month-end spend forecasts for every user with recent expenses."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-users', type=int, default=2000,
+                            help='Users fitted together in one matrix (default: 2000).')
+        parser.add_argument('--workers', type=int, default=2, help='Parallel worker threads (default: 2).')
+        parser.add_argument('--keep-months', type=int, default=13,
+                            help='Delete forecasts older than this many months (default: 13).')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        today = date.today()
+        since = min(today - timedelta(days=HISTORY_DAYS), month_start(today))
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT DISTINCT user_id FROM expense WHERE date >= %s", [since])
+            user_ids = sorted(row[0] for row in cursor.fetchall())
+
+        chunk = max(1, options['chunk_users'])
+        chunks = [user_ids[i:i + chunk] for i in range(0, len(user_ids), chunk)]
+        fitted = 0
+        if chunks:
+            with ThreadPoolExecutor(max_workers=max(1, options['workers'])) as pool:
+                for count in pool.map(lambda ids: fit_chunk(ids, today), chunks):
+                    fitted += count
+
+        cutoff = month_start(today)
+        for _ in range(options['keep_months']):
+            cutoff = month_start(cutoff - timedelta(days=1))
+        deleted, _ = SpendForecast.objects.filter(month__lt=cutoff).delete()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Fitted {fitted} forecasts for {len(user_ids)} users in {time.perf_counter() - started:.1f}s; "
+            f"removed {deleted} old rows."
+        ))
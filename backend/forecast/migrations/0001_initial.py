@@ -0,0 +1,29 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SpendForecast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.IntegerField()),
+                ('category_id', models.IntegerField()),
+                ('month', models.DateField()),
+                ('spent_to_date', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('projected_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('daily_rate', models.FloatField(default=0)),
+                ('fitted_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user_id', 'month', 'category_id'), name='uniq_forecast_user_month_category')],
+            },
+        ),
+    ]
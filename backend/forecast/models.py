@@ -0,0 +1,25 @@
+from django.db import models
+
+class SpendForecast(models.Model):
+    """
+    Month-end spend projection for one user and category. Fitted nightly by
+    `manage.py forecast_spending`; spent_to_date and projected_total are
+    bumped in place as expenses are added during the day.
+    """
+    user_id = models.IntegerField()
+    category_id = models.IntegerField()
+    month = models.DateField()
+    spent_to_date = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    projected_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    # Expected spend per remaining day of the month, from the fitted model.
+    daily_rate = models.FloatField(default=0)
+    fitted_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user_id', 'month', 'category_id'], name='uniq_forecast_user_month_category'),
+        ]
+
+    def __str__(self):
+        return f"user {self.user_id} category {self.category_id} {self.month:%Y-%m}: {self.projected_total}"
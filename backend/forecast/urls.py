@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import get_spend_forecast
+
+urlpatterns = [
+    path('', get_spend_forecast, name='get_spend_forecast'),
+]
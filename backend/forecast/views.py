@@ -0,0 +1,61 @@
+from datetime import date
+from django.db import connection
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from rest_framework import status
+from accounts.tokens import resolve_token_from_request
+from .engine import month_start
+from .models import SpendForecast
+
+@api_view(['GET'])
+def get_spend_forecast(request):
+    """
+    Returns the current month's spend forecast for the authenticated user,
+    per category and in total, alongside the budgets set in categorize.
+    """
+    user_id = resolve_token_from_request(request)
+    if user_id is None:
+        return Response({'error': 'Invalid or missing token'}, status=status.HTTP_401_UNAUTHORIZED)
+
+    month = month_start(date.today())
+    forecasts = list(SpendForecast.objects.filter(user_id=user_id, month=month))
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            SELECT c.category_id, c.name, cat.budget
+            FROM categorize cat
+            JOIN categories c ON cat.category_id = c.category_id
+            WHERE cat.user_id = %s
+        """, [user_id])
+        budgets = {category_id: (name, budget) for category_id, name, budget in cursor.fetchall()}
+        missing = {forecast.category_id for forecast in forecasts} - set(budgets)
+        if missing:
+            placeholders = ', '.join(['%s'] * len(missing))
+            cursor.execute(f"SELECT category_id, name FROM categories WHERE category_id IN ({placeholders})",
+                           list(missing))
+            budgets.update({category_id: (name, None) for category_id, name in cursor.fetchall()})
+
+    categories = []
+    total_spent = total_projected = total_budget = 0
+    for forecast in sorted(forecasts, key=lambda item: item.projected_total, reverse=True):
+        name, budget = budgets.get(forecast.category_id, (None, None))
+        categories.append({
+            'category': name,
+            'spent_to_date': forecast.spent_to_date,
+            'projected_total': forecast.projected_total,
+            'budget': budget,
+            'projected_over_budget': budget is not None and forecast.projected_total > budget,
+            'fitted_at': forecast.fitted_at,
+        })
+        total_spent += forecast.spent_to_date
+        total_projected += forecast.projected_total
+    for _, budget in budgets.values():
+        if budget is not None:
+            total_budget += budget
+
+    return Response({
+        'month': month.strftime("%Y-%m"),
+        'spent_to_date': total_spent,
+        'projected_total': total_projected,
+        'budget': total_budget,
+        'categories': categories,
+    }, status=status.HTTP_200_OK)
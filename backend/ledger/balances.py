@@ -0,0 +1,82 @@
+import uuid
+from decimal import Decimal
+from .models import LedgerEntry
+
+# Account balances from the ledger.
+#
+# bank_accounts.balance is the opening balance from before the ledger and is
+# no longer written. An account's balance is its latest BalanceSnapshot (or
+# the opening balance when it has none) plus the sum of its ledger entries
+# after the snapshot: two short queries on (bank_acc_id, ...) indexes, with
+# the tail kept small by `manage.py snapshot_balances`.
+#
+# Transfers only append. The payer's bank_accounts row is locked to make the
+# balance check and the debit atomic per payer; the payee's row is never
+# touched, so many concurrent payments to one popular account do not queue
+# behind each other.
+
+CENTS = Decimal('0.01')
+
+def to_amount(value):
+    return Decimal(str(value)).quantize(CENTS)
+
+def lock_account(cursor, bank_acc_id):
+    """
+    Locks the account's bank_accounts row for the rest of the transaction
+    and returns its opening balance, or None when it does not exist.
+    """
+    if cursor.db.features.has_select_for_update:
+        cursor.execute("SELECT balance FROM bank_accounts WHERE bank_acc_id = %s FOR UPDATE", [bank_acc_id])
+    else:
+        # No row locks (SQLite): a no-op write takes the database write lock
+        # up front, so concurrent payers wait for it instead of failing with
+        # "database is locked" when their deferred transaction tries to write.
+        cursor.execute("UPDATE bank_accounts SET balance = balance WHERE bank_acc_id = %s", [bank_acc_id])
+        cursor.execute("SELECT balance FROM bank_accounts WHERE bank_acc_id = %s", [bank_acc_id])
+    row = cursor.fetchone()
+    return None if row is None else to_amount(row[0])
+
+def current_balance(cursor, bank_acc_id, opening, through=None):
+    """
+    Balance of one account given its opening balance (bank_accounts.balance),
+    or its balance right after ledger entry `through` when given.
+    """
+    bound, params = ("AND last_entry_id <= %s", [through]) if through is not None else ("", [])
+    cursor.execute(f"""
+        SELECT balance, last_entry_id FROM balance_snapshot
+        WHERE bank_acc_id = %s {bound}
+        ORDER BY last_entry_id DESC
+        LIMIT 1
+    """, [bank_acc_id] + params)
+    row = cursor.fetchone()
+    base, after = (to_amount(row[0]), row[1]) if row else (to_amount(opening), 0)
+    bound = "AND id <= %s" if through is not None else ""
+    cursor.execute(f"SELECT COALESCE(SUM(amount), 0) FROM ledger_entry WHERE bank_acc_id = %s AND id > %s {bound}",
+                   [bank_acc_id, after] + params)
+    return base + to_amount(cursor.fetchone()[0])
+
+def new_transfer_id():
+    return uuid.uuid4().hex
+
+def transfer_entries(transfer_id, from_acc_id, to_acc_id, amount, description='', user_id=None, expense_id=None):
+    """
+    The unsaved debit and credit LedgerEntry of one transfer.
+    """
+    amount = to_amount(amount)
+    return [
+        LedgerEntry(transfer_id=transfer_id, bank_acc_id=from_acc_id, counterparty_acc_id=to_acc_id,
+                    entry_type='debit', amount=-amount, user_id=user_id, expense_id=expense_id,
+                    description=description[:255]),
+        LedgerEntry(transfer_id=transfer_id, bank_acc_id=to_acc_id, counterparty_acc_id=from_acc_id,
+                    entry_type='credit', amount=amount, user_id=user_id, description=description[:255]),
+    ]
+
+def post_transfer(from_acc_id, to_acc_id, amount, description='', user_id=None, expense_id=None):
+    """
+    Appends the debit and credit entries of one transfer and returns its id.
+    Call inside the transaction that locked and checked the payer.
+    """
+    transfer_id = new_transfer_id()
+    LedgerEntry.objects.bulk_create(
+        transfer_entries(transfer_id, from_acc_id, to_acc_id, amount, description, user_id, expense_id))
+    return transfer_id
@@ -0,0 +1,51 @@
+import time
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from ledger.models import MonthlyStatement
+from ledger.statements import is_closed, month_range, parse_month, summarize
+
+class Command(BaseCommand):
+    help = ("Precomputes the monthly statement totals of every account with ledger entries "
+            "in a closed month, so statements for it are served without summing the ledger.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', help='YYYY-MM (default: the previous month).')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Accounts per query and bulk insert (default: 1000).')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if options['month']:
+            try:
+                month = parse_month(options['month'])
+            except ValueError:
+                raise CommandError("--month must be in YYYY-MM format.")
+        else:
+            today = timezone.now().date()
+            month = date(today.year - 1, 12, 1) if today.month == 1 else date(today.year, today.month - 1, 1)
+        if not is_closed(month):
+            raise CommandError(f"{month:%Y-%m} is not closed yet.")
+
+        batch_size = options['batch_size']
+        created = 0
+        with connection.cursor() as cursor:
+            after_id, last_id = month_range(cursor, month)
+            cursor.execute("""
+                SELECT DISTINCT bank_acc_id FROM ledger_entry
+                WHERE id > %s AND id <= %s
+            """, [after_id, last_id])
+            accounts = sorted(acc_id for (acc_id,) in cursor.fetchall())
+            done = set(MonthlyStatement.objects.filter(month=month, bank_acc_id__in=accounts)
+                       .values_list('bank_acc_id', flat=True)) if accounts else set()
+            pending = [acc_id for acc_id in accounts if acc_id not in done]
+            for i in range(0, len(pending), batch_size):
+                statements = summarize(cursor, month, after_id, last_id, pending[i:i + batch_size])
+                MonthlyStatement.objects.bulk_create(statements, ignore_conflicts=True)
+                created += len(statements)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Closed {month:%Y-%m} for {created} accounts ({len(done)} already closed) "
+            f"in {time.perf_counter() - started:.1f}s."
+        ))
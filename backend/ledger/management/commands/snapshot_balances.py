@@ -0,0 +1,108 @@
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from ledger.balances import to_amount
+from ledger.models import BalanceSnapshot, LedgerEntry
+
+class Command(BaseCommand):
+    help = ("Snapshots the balance of every account with new ledger entries so balance "
+            "reads only sum the entries written since.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--settle-seconds', type=int, default=60,
+                            help='Leave entries newer than this out of the snapshot, so transactions '
+                                 'still committing are not skipped (default: 60).')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Accounts per query and bulk insert (default: 1000).')
+        parser.add_argument('--verify', action='store_true',
+                            help='Check the new snapshots against a full sum of the ledger.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        batch_size = options['batch_size']
+        # Snapshots share one watermark: every snapshot written by a run
+        # covers the entries with id <= W. The previous run's watermark P is
+        # the highest last_entry_id, so only accounts with entries in (P, W]
+        # change. W stops short of recent entries because ids are handed out
+        # before commit: a transaction still open may hold a lower id than
+        # one already visible.
+        previous = BalanceSnapshot.objects.aggregate(p=Max('last_entry_id'))['p'] or 0
+        cutoff = timezone.now() - timedelta(seconds=options['settle_seconds'])
+        watermark = (LedgerEntry.objects.filter(created_at__lt=cutoff, id__gt=previous)
+                     .aggregate(w=Max('id'))['w'])
+        if not watermark:
+            self.stdout.write("No settled ledger entries since the last snapshot.")
+            return
+
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT bank_acc_id, SUM(amount)
+                FROM ledger_entry
+                WHERE id > %s AND id <= %s
+                GROUP BY bank_acc_id
+            """, [previous, watermark])
+            deltas = {acc_id: to_amount(total) for acc_id, total in cursor.fetchall()}
+
+            accounts = sorted(deltas)
+            bases = {}
+            for i in range(0, len(accounts), batch_size):
+                chunk = accounts[i:i + batch_size]
+                placeholders = ', '.join(['%s'] * len(chunk))
+                cursor.execute(f"SELECT bank_acc_id, balance FROM bank_accounts WHERE bank_acc_id IN ({placeholders})",
+                               chunk)
+                for acc_id, opening in cursor.fetchall():
+                    bases[acc_id] = to_amount(opening)
+                cursor.execute(f"""
+                    SELECT s.bank_acc_id, s.balance
+                    FROM balance_snapshot s
+                    JOIN (
+                        SELECT bank_acc_id, MAX(last_entry_id) AS last_entry_id
+                        FROM balance_snapshot
+                        WHERE bank_acc_id IN ({placeholders})
+                        GROUP BY bank_acc_id
+                    ) latest ON latest.bank_acc_id = s.bank_acc_id AND latest.last_entry_id = s.last_entry_id
+                """, chunk)
+                for acc_id, balance in cursor.fetchall():
+                    bases[acc_id] = to_amount(balance)
+
+        snapshots = [
+            BalanceSnapshot(bank_acc_id=acc_id, balance=bases.get(acc_id, to_amount(0)) + delta,
+                            last_entry_id=watermark)
+            for acc_id, delta in deltas.items()
+        ]
+        with transaction.atomic():
+            BalanceSnapshot.objects.bulk_create(snapshots, batch_size=batch_size)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Snapshotted {len(snapshots)} accounts through entry {watermark} "
+            f"in {time.perf_counter() - started:.1f}s."
+        ))
+        if options['verify']:
+            self.verify(snapshots, watermark, batch_size)
+
+    def verify(self, snapshots, watermark, batch_size):
+        mismatched = 0
+        with connection.cursor() as cursor:
+            for i in range(0, len(snapshots), batch_size):
+                chunk = snapshots[i:i + batch_size]
+                placeholders = ', '.join(['%s'] * len(chunk))
+                cursor.execute(f"""
+                    SELECT b.bank_acc_id, b.balance + COALESCE(SUM(l.amount), 0)
+                    FROM bank_accounts b
+                    LEFT JOIN ledger_entry l ON l.bank_acc_id = b.bank_acc_id AND l.id <= %s
+                    WHERE b.bank_acc_id IN ({placeholders})
+                    GROUP BY b.bank_acc_id, b.balance
+                """, [watermark] + [s.bank_acc_id for s in chunk])
+                expected = {acc_id: to_amount(total) for acc_id, total in cursor.fetchall()}
+                for snapshot in chunk:
+                    if expected.get(snapshot.bank_acc_id) != snapshot.balance:
+                        mismatched += 1
+                        self.stderr.write(f"Account {snapshot.bank_acc_id}: snapshot {snapshot.balance}, "
+                                          f"ledger {expected.get(snapshot.bank_acc_id)}")
+        if mismatched:
+            self.stderr.write(self.style.ERROR(f"{mismatched} snapshots do not match the ledger."))
+        else:
+            self.stdout.write(self.style.SUCCESS("All snapshots match the ledger."))
@@ -0,0 +1,46 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('transfer_id', models.CharField(max_length=32)),
+                ('bank_acc_id', models.IntegerField()),
+                ('counterparty_acc_id', models.IntegerField()),
+                ('entry_type', models.CharField(choices=[('debit', 'Debit'), ('credit', 'Credit')], max_length=10)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('user_id', models.IntegerField(blank=True, null=True)),
+                ('expense_id', models.BigIntegerField(blank=True, null=True)),
+                ('description', models.CharField(blank=True, default='', max_length=255)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'ledger_entry',
+                'indexes': [models.Index(fields=['bank_acc_id', 'id'], name='idx_ledger_account_id'), models.Index(fields=['created_at'], name='idx_ledger_created'), models.Index(fields=['transfer_id'], name='idx_ledger_transfer')],
+            },
+        ),
+        migrations.CreateModel(
+            name='BalanceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bank_acc_id', models.IntegerField()),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('last_entry_id', models.BigIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'balance_snapshot',
+                'constraints': [models.UniqueConstraint(fields=('bank_acc_id', 'last_entry_id'), name='uniq_snapshot_account_entry')],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ledger', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ledgerentry',
+            index=models.Index(fields=['created_at', 'id'], name='idx_ledger_created_id'),
+        ),
+        migrations.CreateModel(
+            name='MonthlyStatement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bank_acc_id', models.IntegerField()),
+                ('month', models.DateField()),
+                ('after_entry_id', models.BigIntegerField()),
+                ('last_entry_id', models.BigIntegerField()),
+                ('opening_balance', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('closing_balance', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('total_debits', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('total_credits', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('entry_count', models.IntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'monthly_statement',
+                'constraints': [models.UniqueConstraint(fields=('bank_acc_id', 'month'), name='uniq_statement_account_month')],
+            },
+        ),
+    ]
@@ -0,0 +1,85 @@
+from django.db import models
+from django.utils import timezone
+
+class LedgerEntry(models.Model):
+    """
+    Append-only record of money moving between bank accounts. Every
+    transfer writes one debit (negative amount) on the payer's account and
+    one credit (positive amount) on the payee's, sharing a transfer_id, so
+    the amounts of a transfer always sum to zero. Rows are never updated or
+    deleted; a correction is a new transfer.
+    """
+    ENTRY_TYPE_CHOICES = [
+        ('debit', 'Debit'),
+        ('credit', 'Credit'),
+    ]
+
+    transfer_id = models.CharField(max_length=32)
+    bank_acc_id = models.IntegerField()
+    counterparty_acc_id = models.IntegerField()
+    entry_type = models.CharField(max_length=10, choices=ENTRY_TYPE_CHOICES)
+    amount = models.DecimalField(max_digits=14, decimal_places=2)
+    user_id = models.IntegerField(null=True, blank=True)
+    expense_id = models.BigIntegerField(null=True, blank=True)
+    description = models.CharField(max_length=255, blank=True, default='')
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'ledger_entry'
+        indexes = [
+            # Balance tails and statements: one account's entries after an id.
+            models.Index(fields=['bank_acc_id', 'id'], name='idx_ledger_account_id'),
+            models.Index(fields=['created_at'], name='idx_ledger_created'),
+            # Month boundaries of statements: the newest entry before a date.
+            models.Index(fields=['created_at', 'id'], name='idx_ledger_created_id'),
+            models.Index(fields=['transfer_id'], name='idx_ledger_transfer'),
+        ]
+
+    def __str__(self):
+        return f"{self.entry_type} {self.amount} on {self.bank_acc_id} ({self.transfer_id})"
+
+class BalanceSnapshot(models.Model):
+    """
+    An account's balance including every ledger entry with id <=
+    last_entry_id (and the opening balance in bank_accounts.balance).
+    Written by `manage.py snapshot_balances`.
+    """
+    bank_acc_id = models.IntegerField()
+    balance = models.DecimalField(max_digits=14, decimal_places=2)
+    last_entry_id = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'balance_snapshot'
+        constraints = [
+            models.UniqueConstraint(fields=['bank_acc_id', 'last_entry_id'], name='uniq_snapshot_account_entry'),
+        ]
+
+    def __str__(self):
+        return f"{self.bank_acc_id}: {self.balance} through entry {self.last_entry_id}"
+
+class MonthlyStatement(models.Model):
+    """
+    Totals of one account's statement for a closed month. The month covers
+    the ledger entries with after_entry_id < id <= last_entry_id; see
+    ledger.statements.
+    """
+    bank_acc_id = models.IntegerField()
+    month = models.DateField()
+    after_entry_id = models.BigIntegerField()
+    last_entry_id = models.BigIntegerField()
+    opening_balance = models.DecimalField(max_digits=14, decimal_places=2)
+    closing_balance = models.DecimalField(max_digits=14, decimal_places=2)
+    total_debits = models.DecimalField(max_digits=14, decimal_places=2)
+    total_credits = models.DecimalField(max_digits=14, decimal_places=2)
+    entry_count = models.IntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'monthly_statement'
+        constraints = [
+            models.UniqueConstraint(fields=['bank_acc_id', 'month'], name='uniq_statement_account_month'),
+        ]
+
+    def __str__(self):
+        return f"{self.bank_acc_id} {self.month:%Y-%m}: {self.opening_balance} -> {self.closing_balance}"
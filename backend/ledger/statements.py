@@ -0,0 +1,245 @@
+import base64
+from datetime import date, datetime, timedelta
+from django.core.cache import cache
+from django.db import IntegrityError
+from django.utils import timezone
+from .balances import current_balance, to_amount
+from .models import MonthlyStatement
+
+# Account statements.
+#
+# A month of an account's statement is the account's ledger entries with
+# boundary(month) < id <= boundary(next month), where boundary(day) is the id
+# of the newest ledger entry created before that day. Boundaries are global,
+# so the months of every account partition its entries and each month opens
+# with exactly the previous month's closing balance.
+#
+# A page is read from the (bank_acc_id, id) index, continuing after the
+# cursor's entry id, and the running balance is a window SUM over the page
+# added to the balance right before it. Once a month has ended (plus
+# CLOSE_DELAY for transactions still committing) its entries can no longer
+# change: its totals are stored in MonthlyStatement and its pages are cached.
+
+CLOSE_DELAY = timedelta(minutes=10)
+PAGE_CACHE_TIMEOUT = 60 * 60 * 24
+
+class InvalidCursor(ValueError):
+    pass
+
+def encode_cursor(entry_id):
+    return base64.urlsafe_b64encode(str(entry_id).encode()).decode().rstrip('=')
+
+def decode_cursor(value):
+    try:
+        return int(base64.urlsafe_b64decode(value + '=' * (-len(value) % 4)).decode())
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursor("Invalid cursor.")
+
+def parse_month(value):
+    """
+    First day of the month given as YYYY-MM. Raises ValueError.
+    """
+    parsed = datetime.strptime(value, "%Y-%m")
+    return date(parsed.year, parsed.month, 1)
+
+def next_month(month):
+    return date(month.year + 1, 1, 1) if month.month == 12 else date(month.year, month.month + 1, 1)
+
+def month_start_at(month):
+    return timezone.make_aware(datetime(month.year, month.month, 1))
+
+def is_closed(month, now=None):
+    return month_start_at(next_month(month)) + CLOSE_DELAY <= (now or timezone.now())
+
+def entry_boundary(cursor, when):
+    """
+    Id of the newest ledger entry created before `when`, 0 when there is
+    none. Boundaries far enough in the past never change and are cached.
+    """
+    settled = when + CLOSE_DELAY <= timezone.now()
+    key = f"ledger_boundary:{when.isoformat()}"
+    if settled:
+        value = cache.get(key)
+        if value is not None:
+            return value
+    cursor.execute("""
+        SELECT id FROM ledger_entry
+        WHERE created_at < %s
+        ORDER BY created_at DESC, id DESC
+        LIMIT 1
+    """, [when])
+    row = cursor.fetchone()
+    value = row[0] if row else 0
+    if settled:
+        cache.set(key, value, timeout=None)
+    return value
+
+def month_range(cursor, month):
+    """
+    (after_entry_id, last_entry_id) of the month; last_entry_id is None for
+    a month that has not ended yet.
+    """
+    after_id = entry_boundary(cursor, month_start_at(month))
+    end = month_start_at(next_month(month))
+    last_id = entry_boundary(cursor, end) if end <= timezone.now() else None
+    return after_id, last_id
+
+def summarize(cursor, month, after_id, last_id, bank_acc_ids):
+    """
+    Unsaved MonthlyStatement objects of a closed month for the given
+    accounts: totals from one grouped range scan, opening balances from the
+    previous month's statements or, where there is none, the ledger.
+    """
+    placeholders = ', '.join(['%s'] * len(bank_acc_ids))
+    cursor.execute(f"""
+        SELECT bank_acc_id,
+               COALESCE(SUM(CASE WHEN amount < 0 THEN -amount ELSE 0 END), 0),
+               COALESCE(SUM(CASE WHEN amount > 0 THEN amount ELSE 0 END), 0),
+               COUNT(*)
+        FROM ledger_entry
+        WHERE id > %s AND id <= %s AND bank_acc_id IN ({placeholders})
+        GROUP BY bank_acc_id
+    """, [after_id, last_id] + list(bank_acc_ids))
+    totals = {acc_id: (to_amount(debits), to_amount(credits), count)
+              for acc_id, debits, credits, count in cursor.fetchall()}
+
+    previous_month = date(month.year - 1, 12, 1) if month.month == 1 else date(month.year, month.month - 1, 1)
+    openings = {
+        statement.bank_acc_id: statement.closing_balance
+        for statement in MonthlyStatement.objects.filter(
+            bank_acc_id__in=bank_acc_ids, month=previous_month, last_entry_id=after_id)
+    }
+    missing = [acc_id for acc_id in bank_acc_ids if acc_id not in openings]
+    if missing:
+        placeholders = ', '.join(['%s'] * len(missing))
+        cursor.execute(f"SELECT bank_acc_id, balance FROM bank_accounts WHERE bank_acc_id IN ({placeholders})",
+                       missing)
+        for acc_id, opening in cursor.fetchall():
+            openings[acc_id] = current_balance(cursor, acc_id, opening, through=after_id)
+
+    statements = []
+    for acc_id in bank_acc_ids:
+        if acc_id not in openings:
+            continue
+        debits, credits, count = totals.get(acc_id, (to_amount(0), to_amount(0), 0))
+        opening = to_amount(openings[acc_id])
+        statements.append(MonthlyStatement(
+            bank_acc_id=acc_id, month=month, after_entry_id=after_id, last_entry_id=last_id,
+            opening_balance=opening, closing_balance=opening - debits + credits,
+            total_debits=debits, total_credits=credits, entry_count=count,
+        ))
+    return statements
+
+def closed_summary(cursor, bank_acc_id, month, after_id, last_id):
+    """
+    The account's MonthlyStatement for a closed month, computed and stored
+    on first use.
+    """
+    statement = MonthlyStatement.objects.filter(bank_acc_id=bank_acc_id, month=month).first()
+    if statement is not None:
+        return statement
+    statements = summarize(cursor, month, after_id, last_id, [bank_acc_id])
+    if not statements:
+        return None
+    try:
+        statements[0].save()
+    except IntegrityError:
+        # Stored concurrently; the numbers are the same.
+        pass
+    return statements[0]
+
+def fetch_page(cursor, bank_acc_id, after_id, last_id, limit):
+    """
+    Up to `limit` entries after `after_id` in id order as (id, transfer_id,
+    entry_type, amount, description, created_at, counterparty name,
+    counterparty account number, running sum of amount within the page).
+    """
+    bound, params = ("AND id <= %s", [last_id]) if last_id is not None else ("", [])
+    cursor.execute(f"""
+        SELECT page.id, page.transfer_id, page.entry_type, page.amount, page.description, page.created_at,
+               b.account_holder_name, b.account_number,
+               SUM(page.amount) OVER (ORDER BY page.id ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW)
+        FROM (
+            SELECT id, transfer_id, entry_type, amount, counterparty_acc_id, description, created_at
+            FROM ledger_entry
+            WHERE bank_acc_id = %s AND id > %s {bound}
+            ORDER BY id
+            LIMIT %s
+        ) page
+        LEFT JOIN bank_accounts b ON b.bank_acc_id = page.counterparty_acc_id
+        ORDER BY page.id
+    """, [bank_acc_id, after_id] + params + [limit])
+    return cursor.fetchall()
+
+def _format_date(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+def build_statement(cursor, bank_acc_id, opening, month, page_cursor=None, limit=100):
+    """
+    One page of the account's statement for `month`. Raises InvalidCursor.
+    """
+    after_id, last_id = month_range(cursor, month)
+    closed = last_id is not None and is_closed(month)
+    summary = closed_summary(cursor, bank_acc_id, month, after_id, last_id) if closed else None
+
+    page_after = after_id
+    if page_cursor:
+        page_after = decode_cursor(page_cursor)
+        if page_after < after_id or (last_id is not None and page_after > last_id):
+            raise InvalidCursor("Cursor does not belong to this month.")
+
+    if summary is not None and page_after == after_id:
+        month_opening = page_opening = summary.opening_balance
+    else:
+        month_opening = current_balance(cursor, bank_acc_id, opening, through=after_id)
+        page_opening = (month_opening if page_after == after_id
+                        else current_balance(cursor, bank_acc_id, opening, through=page_after))
+
+    rows = fetch_page(cursor, bank_acc_id, page_after, last_id, limit + 1)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][0])
+
+    entries = [{
+        'entry_id': entry_id,
+        'transfer_id': transfer_id,
+        'type': entry_type,
+        'amount': str(to_amount(amount)),
+        'description': description,
+        'date': _format_date(created_at),
+        'counterparty_name': counterparty_name,
+        'counterparty_account_number': counterparty_number,
+        'balance': str(page_opening + to_amount(running)),
+    } for (entry_id, transfer_id, entry_type, amount, description, created_at,
+           counterparty_name, counterparty_number, running) in rows]
+
+    result = {
+        'month': month.strftime("%Y-%m"),
+        'closed': summary is not None,
+        'opening_balance': str(summary.opening_balance if summary else month_opening),
+        'entries': entries,
+        'next_cursor': next_cursor,
+    }
+    if summary is not None:
+        result.update({
+            'closing_balance': str(summary.closing_balance),
+            'total_debits': str(summary.total_debits),
+            'total_credits': str(summary.total_credits),
+            'entry_count': summary.entry_count,
+        })
+    return result
+
+def cached_statement(cursor, bank_acc_id, opening, month, page_cursor=None, limit=100):
+    """
+    build_statement, with pages of closed months kept in the cache: their
+    entries and balances can no longer change.
+    """
+    if not is_closed(month):
+        return build_statement(cursor, bank_acc_id, opening, month, page_cursor, limit)
+    key = f"statement:{bank_acc_id}:{month:%Y-%m}:{page_cursor or ''}:{limit}"
+    result = cache.get(key)
+    if result is None:
+        result = build_statement(cursor, bank_acc_id, opening, month, page_cursor, limit)
+        cache.set(key, result, PAGE_CACHE_TIMEOUT)
+    return result
@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import get_statement
+
+urlpatterns = [
+    path('statement/', get_statement, name='get_statement'),
+]
@@ -0,0 +1,52 @@
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from rest_framework import status
+from django.utils import timezone
+from accounts.data_version import conditional_on_data_version
+from accounts.tokens import resolve_token_from_request
+from Trackex.routers import read_connection
+from .statements import InvalidCursor, cached_statement, parse_month
+
+@api_view(['GET'])
+@conditional_on_data_version
+def get_statement(request):
+    """
+    Bank-style statement of the authenticated user's account for one month,
+    oldest entry first, with the balance after every entry.
+    Optional query parameters:
+      - month: YYYY-MM (default: the current month)
+      - limit: page size (default 100, max 500)
+      - cursor: next_cursor from the previous page
+    """
+    user_id = resolve_token_from_request(request)
+    if user_id is None:
+        return Response({'error': 'Invalid or missing token'}, status=status.HTTP_401_UNAUTHORIZED)
+    try:
+        month = parse_month(request.GET.get('month') or timezone.now().strftime("%Y-%m"))
+    except ValueError:
+        return Response({'error': 'month must be in YYYY-MM format'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        limit = min(max(int(request.GET.get('limit', 100)), 1), 500)
+    except ValueError:
+        return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        with read_connection(user_id).cursor() as cursor:
+            cursor.execute("""
+                SELECT b.bank_acc_id, b.balance, b.account_number
+                FROM app_accounts a
+                JOIN bank_accounts b ON a.bank_acc_id = b.bank_acc_id
+                WHERE a.user_id = %s
+            """, [user_id])
+            account = cursor.fetchone()
+            if not account:
+                return Response({'error': 'No account details found.'}, status=status.HTTP_404_NOT_FOUND)
+            bank_acc_id, opening, account_number = account
+            statement = cached_statement(cursor, bank_acc_id, opening, month,
+                                         request.GET.get('cursor'), limit)
+    except InvalidCursor as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    return Response(dict(statement, account_number=account_number), status=status.HTTP_200_OK)
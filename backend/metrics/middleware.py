@@ -0,0 +1,116 @@
+import logging
+import random
+import re
+import time
+from collections import Counter as _Counter
+from contextlib import ExitStack
+from django.conf import settings
+from django.db import connections
+from .registry import QUERY_COUNT_BUCKETS, REGISTRY
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    # Fraction of requests instrumented. Unsampled requests skip the execute
+    # wrapper entirely, so turning this down removes practically all overhead.
+    'SAMPLE_RATE': 1.0,
+    # Log statements repeated this many times within one request (N+1 style).
+    'LOG_DUPLICATE_QUERIES': True,
+    'DUPLICATE_QUERY_THRESHOLD': 5,
+    # Log any single statement slower than this many seconds.
+    'SLOW_QUERY_SECONDS': 0.5,
+}
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    'trackex_request_duration_seconds', 'Total request time per endpoint.', ('endpoint',))
+VIEW_SECONDS = REGISTRY.histogram(
+    'trackex_view_duration_seconds', 'Request time spent outside the database per endpoint.', ('endpoint',))
+DB_SECONDS = REGISTRY.histogram(
+    'trackex_db_duration_seconds', 'Database time per request per endpoint.', ('endpoint',))
+DB_QUERIES = REGISTRY.histogram(
+    'trackex_db_queries_per_request', 'SQL statements issued per request per endpoint.', ('endpoint',),
+    buckets=QUERY_COUNT_BUCKETS)
+SLOWEST_QUERY = REGISTRY.gauge(
+    'trackex_db_slowest_query_seconds', 'Slowest single statement seen per endpoint.', ('endpoint',))
+DUPLICATE_QUERIES = REGISTRY.counter(
+    'trackex_db_duplicate_query_requests_total', 'Requests that repeated a statement past the threshold.', ('endpoint',))
+
+_whitespace = re.compile(r'\s+')
+
+def get_config():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, 'QUERY_METRICS', {}))
+    return config
+
+class QueryRecorder:
+    """
+    connection.execute_wrapper callable collecting per-request statistics.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.slowest = (0.0, None)
+        self.statements = _Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.total += elapsed
+            if elapsed > self.slowest[0]:
+                self.slowest = (elapsed, sql)
+            self.statements[sql] += 1
+
+class QueryMetricsMiddleware:
+    """
+    Records query count, DB time, slowest statement and view time for a
+    sample of requests and exports them as histograms on /metrics.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.config = get_config()
+
+    def __call__(self, request):
+        sample_rate = self.config['SAMPLE_RATE']
+        if sample_rate <= 0 or (sample_rate < 1 and random.random() >= sample_rate):
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        if match is None or match.view_name == 'metrics':
+            return response
+        self.record(match.view_name, elapsed, recorder)
+        return response
+
+    def record(self, endpoint, elapsed, recorder):
+        REQUEST_SECONDS.observe(endpoint, value=elapsed)
+        DB_SECONDS.observe(endpoint, value=recorder.total)
+        VIEW_SECONDS.observe(endpoint, value=max(0.0, elapsed - recorder.total))
+        DB_QUERIES.observe(endpoint, value=recorder.count)
+
+        slowest_seconds, slowest_sql = recorder.slowest
+        if slowest_sql is None:
+            return
+        SLOWEST_QUERY.set_max(endpoint, value=slowest_seconds)
+        if slowest_seconds >= self.config['SLOW_QUERY_SECONDS']:
+            logger.warning("Slow query on %s (%.3fs): %s", endpoint, slowest_seconds,
+                           _whitespace.sub(' ', slowest_sql).strip())
+
+        if self.config['LOG_DUPLICATE_QUERIES']:
+            sql, repeats = recorder.statements.most_common(1)[0]
+            if repeats >= self.config['DUPLICATE_QUERY_THRESHOLD']:
+                DUPLICATE_QUERIES.inc(endpoint)
+                logger.warning("Possible N+1 on %s: statement ran %d times: %s", endpoint, repeats,
+                               _whitespace.sub(' ', sql).strip())
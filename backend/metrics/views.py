@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from accounts.data_version import cache_stats
+from .registry import REGISTRY
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+def _render_cache_stats():
+    # The conditional-GET counters live in accounts.data_version; render them
+    # here so one scrape covers both.
+    lines = [
+        '# HELP trackex_conditional_get_total Conditional GET outcomes per endpoint.',
+        '# TYPE trackex_conditional_get_total counter',
+    ]
+    for endpoint, counts in sorted(cache_stats().items()):
+        for result in ('hits', 'misses'):
+            lines.append(f'trackex_conditional_get_total{{endpoint="{endpoint}",result="{result}"}} {counts[result]}')
+    return '\n'.join(lines) + '\n'
+
+def request_allowed(request):
+    """
+    True when the request comes from an address in METRICS_ALLOWED_IPS.
+    """
+    allowed = getattr(settings, 'METRICS_ALLOWED_IPS', ('127.0.0.1', '::1'))
+    return request.META.get('REMOTE_ADDR') in allowed
+
+def metrics(request):
+    """
+    Prometheus scrape endpoint. Only answers local requests.
+    """
+    if not request_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(REGISTRY.render() + _render_cache_stats(), content_type=CONTENT_TYPE)
@@ -1,6 +1,7 @@
 from django.urls import path
-from .views import process_payment
+from .views import process_batch_payment, process_payment
 
 urlpatterns = [
     path('process/', process_payment, name='process_payment'),
+    path('process/batch/', process_batch_payment, name='process_batch_payment'),
 ]
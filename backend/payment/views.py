@@ -4,6 +4,16 @@ from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
 import pytz
+from accounts.tokens import resolve_token
+from accounts.data_version import bump_data_version
+from anomalies.detector import observe
+from forecast.engine import record_expense
+from ledger.balances import (current_balance, lock_account, new_transfer_id, post_transfer, to_amount,
+                             transfer_entries)
+from ledger.models import LedgerEntry
+
+# Largest number of payments accepted by one batch payout request.
+MAX_BATCH_PAYMENTS = 100
 
 # Utility function to execute raw SQL queries.
 def execute_query(query, params=None, fetch_one=False):
@@ -18,9 +28,7 @@ def get_user_id_from_request(request):
         return None
     if token.startswith("Bearer "):
         token = token[7:]
-    query = "SELECT user_id FROM user_token WHERE token = %s"
-    user_token = execute_query(query, [token], fetch_one=True)
-    return user_token[0] if user_token else None
+    return resolve_token(token)
 
 @api_view(['POST'])
 def process_payment(request):
@@ -77,17 +85,17 @@ def process_payment(request):
                         status=status.HTTP_400_BAD_REQUEST)
     
     try:
-        amount = float(amount)
+        amount = to_amount(amount)
         if amount <= 0:
             return Response({'error': 'Amount must be positive.'},
                             status=status.HTTP_400_BAD_REQUEST)
-    except ValueError:
+    except (ArithmeticError, ValueError):
         return Response({'error': 'Invalid amount.'},
                         status=status.HTTP_400_BAD_REQUEST)
     
     # Find the recipient’s bank account details.
     query = """
-        SELECT bank_acc_id, balance
+        SELECT bank_acc_id
         FROM bank_accounts
         WHERE account_number = %s
           AND account_holder_name = %s
@@ -102,32 +110,20 @@ def process_payment(request):
     
     recipient_bank_acc_id = recipient_acc[0]
     
-    # Check if sender has sufficient funds.
-    sender_query = "SELECT balance FROM bank_accounts WHERE bank_acc_id = %s"
-    sender_acc = execute_query(sender_query, [sender_app[0]], fetch_one=True)
-    if not sender_acc:
-        return Response({'error': 'Sender account details not found.'},
-                        status=status.HTTP_400_BAD_REQUEST)
-    try:
-        sender_balance = float(sender_acc[0])
-    except (ValueError, TypeError):
-        return Response({'error': 'Invalid sender balance.'},
-                        status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-    
-    if sender_balance < amount:
-        return Response({'error': 'Insufficient balance.'},
-                        status=status.HTTP_400_BAD_REQUEST)
-    
     # Perform the transaction in an atomic block.
     try:
         with transaction.atomic():
-            # Deduct the amount from sender's account.
-            update_sender_query = "UPDATE bank_accounts SET balance = balance - %s WHERE bank_acc_id = %s"
-            execute_query(update_sender_query, [amount, sender_app[0]])
-            
-            # Add the amount to recipient's account.
-            update_recipient_query = "UPDATE bank_accounts SET balance = balance + %s WHERE bank_acc_id = %s"
-            execute_query(update_recipient_query, [amount, recipient_bank_acc_id])
+            # Lock the sender's account so the balance check and the debit
+            # are atomic; the recipient's row is not locked (see ledger).
+            with connection.cursor() as cursor:
+                opening = lock_account(cursor, sender_app[0])
+                if opening is None:
+                    return Response({'error': 'Sender account details not found.'},
+                                    status=status.HTTP_400_BAD_REQUEST)
+                sender_balance = current_balance(cursor, sender_app[0], opening)
+            if sender_balance < amount:
+                return Response({'error': 'Insufficient balance.'},
+                                status=status.HTTP_400_BAD_REQUEST)
             
             # Dynamically fetch the category_id for "Account Transfer".
             cat_query = "SELECT category_id FROM categories WHERE name = %s"
@@ -145,10 +141,200 @@ def process_payment(request):
                 VALUES (%s, %s, %s, %s, %s, %s)
             """
             description = f"Paid to {recipient_name}"
-            execute_query(insert_expense_query, [user_id, category_id, amount, current_time, 'Account Transfer', description])
-            
+            with connection.cursor() as cursor:
+                cursor.execute(insert_expense_query, [user_id, category_id, amount, current_time, 'Account Transfer', description])
+                expense_id = cursor.lastrowid
+
+            # Debit the sender and credit the recipient in the ledger.
+            post_transfer(sender_app[0], recipient_bank_acc_id, amount, description, user_id, expense_id)
+
+            # Users linked to the recipient account see a new balance too.
+            recipient_users = execute_query(
+                "SELECT user_id FROM app_accounts WHERE bank_acc_id = %s",
+                [recipient_bank_acc_id]
+            )
+
+        bump_data_version(user_id)
+        record_expense(user_id, category_id, amount)
+        observe(user_id, category_id, amount, 'Account Transfer', expense_id)
+        for (recipient_user_id,) in recipient_users:
+            bump_data_version(recipient_user_id)
         return Response({'detail': 'Payment successful.'},
                         status=status.HTTP_200_OK)
     except Exception as e:
         return Response({'error': 'Transaction failed. ' + str(e)},
                         status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+def _validate_payout(item):
+    """
+    Returns (account_number, recipient_name, ifsc_code, amount) for one
+    payout of a batch, or raises ValueError with the reason it was rejected.
+    """
+    if not isinstance(item, dict):
+        raise ValueError('Each payment must be an object.')
+    details = [item.get('account_number'), item.get('recipient_name'), item.get('ifsc_code')]
+    if not all(details) or not item.get('amount'):
+        raise ValueError('All fields (account_number, recipient_name, ifsc_code, amount) are required.')
+    try:
+        amount = to_amount(item['amount'])
+        valid = amount > 0
+    except (ArithmeticError, ValueError):
+        raise ValueError('Invalid amount.')
+    if not valid:
+        raise ValueError('Amount must be positive.')
+    return [str(value) for value in details] + [amount]
+
+@api_view(['POST'])
+def process_batch_payment(request):
+    """
+    POST endpoint paying many recipients from the sender's account at once.
+    
+    Expected JSON payload:
+    {
+      "pin_no": "4-digit PIN",
+      "payments": [
+        {"account_number": ..., "recipient_name": ..., "ifsc_code": ..., "amount": ...},
+        ...
+      ]
+    }
+    
+    The PIN, token and category are checked once and all recipients are
+    resolved with one query. Payments that fail validation are rejected
+    individually; the others are paid together in one transaction, or not
+    at all when their total exceeds the balance. The response lists the
+    status of every payment in request order.
+    """
+    user_id = get_user_id_from_request(request)
+    if user_id is None:
+        return Response({'error': 'Token is required or is invalid.'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    
+    sender_app = execute_query(
+        "SELECT bank_acc_id, pin_no FROM app_accounts WHERE user_id = %s",
+        [user_id],
+        fetch_one=True
+    )
+    if not sender_app or not sender_app[0]:
+        return Response({'error': 'Please add bank details before making a payment.'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    sender_acc_id, stored_pin = sender_app
+    
+    provided_pin = request.data.get('pin_no')
+    if not provided_pin:
+        return Response({'error': 'PIN is required.'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    if stored_pin is None or stored_pin != provided_pin:
+        return Response({'error': 'Wrong PIN.'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    
+    payments = request.data.get('payments')
+    if not isinstance(payments, list) or not payments:
+        return Response({'error': 'payments must be a non-empty list.'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    if len(payments) > MAX_BATCH_PAYMENTS:
+        return Response({'error': f'At most {MAX_BATCH_PAYMENTS} payments per batch.'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    
+    results = []
+    valid = []
+    for index, item in enumerate(payments):
+        result = {'index': index, 'account_number': item.get('account_number') if isinstance(item, dict) else None}
+        results.append(result)
+        try:
+            valid.append((result, _validate_payout(item)))
+        except ValueError as e:
+            result.update(status='rejected', error=str(e))
+    
+    # Resolve every recipient with one IN query on account_number.
+    accounts = {}
+    numbers = sorted({details[0] for _, details in valid})
+    if numbers:
+        placeholders = ', '.join(['%s'] * len(numbers))
+        rows = execute_query(f"""
+            SELECT bank_acc_id, account_number, account_holder_name, ifsc_code
+            FROM bank_accounts
+            WHERE account_number IN ({placeholders})
+        """, numbers)
+        accounts = {(number, holder, ifsc): bank_acc_id for bank_acc_id, number, holder, ifsc in rows}
+    
+    payable = []
+    for result, (number, name, ifsc, amount) in valid:
+        recipient_acc_id = accounts.get((number, name, ifsc))
+        if recipient_acc_id is None:
+            result.update(status='rejected', error='No account found for the entered recipient details.')
+        elif recipient_acc_id == sender_acc_id:
+            result.update(status='rejected', error='Cannot pay your own account.')
+        else:
+            result['amount'] = str(amount)
+            payable.append((result, recipient_acc_id, name, amount))
+    if not payable:
+        return Response({'error': 'No valid payments in the batch.', 'results': results},
+                        status=status.HTTP_400_BAD_REQUEST)
+    total = sum((amount for _, _, _, amount in payable), to_amount(0))
+    
+    try:
+        with transaction.atomic():
+            # One lock and one balance check for the whole batch.
+            with connection.cursor() as cursor:
+                opening = lock_account(cursor, sender_acc_id)
+                if opening is None:
+                    return Response({'error': 'Sender account details not found.'},
+                                    status=status.HTTP_400_BAD_REQUEST)
+                sender_balance = current_balance(cursor, sender_acc_id, opening)
+            if sender_balance < total:
+                return Response({'error': 'Insufficient balance.', 'total_amount': str(total),
+                                 'balance': str(sender_balance)},
+                                status=status.HTTP_400_BAD_REQUEST)
+            
+            cat = execute_query("SELECT category_id FROM categories WHERE name = %s",
+                                ["ACCOUNT TRANSFER"], fetch_one=True)
+            if not cat:
+                raise Exception("Category 'Account Transfer' not found.")
+            category_id = cat[0]
+            current_time = timezone.now().astimezone(pytz.timezone("Asia/Kolkata"))
+            
+            # Each expense row carries its transfer id (transactions
+            # migration 0004), so all rows go in with one executemany (a
+            # multi-row INSERT on MySQL) and their ids come back with one IN
+            # query on the (user_id, transfer_id) index.
+            transfers = [(new_transfer_id(), result, recipient_acc_id, f"Paid to {name}", amount)
+                         for result, recipient_acc_id, name, amount in payable]
+            with connection.cursor() as cursor:
+                cursor.executemany("""
+                    INSERT INTO expense (user_id, category_id, amount, date, payment_method, description, transfer_id)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                """, [[user_id, category_id, amount, current_time, 'Account Transfer', description, transfer_id]
+                      for transfer_id, _, _, description, amount in transfers])
+                placeholders = ', '.join(['%s'] * len(transfers))
+                cursor.execute(f"""
+                    SELECT transfer_id, expense_id FROM expense
+                    WHERE user_id = %s AND transfer_id IN ({placeholders})
+                """, [user_id] + [transfer_id for transfer_id, *_ in transfers])
+                expense_ids = dict(cursor.fetchall())
+            
+            entries = []
+            for transfer_id, _, recipient_acc_id, description, amount in transfers:
+                entries += transfer_entries(transfer_id, sender_acc_id, recipient_acc_id, amount, description,
+                                            user_id, expense_ids.get(transfer_id))
+            LedgerEntry.objects.bulk_create(entries)
+            
+            recipient_ids = sorted({recipient_acc_id for _, _, recipient_acc_id, _, _ in transfers})
+            placeholders = ', '.join(['%s'] * len(recipient_ids))
+            recipient_users = execute_query(
+                f"SELECT DISTINCT user_id FROM app_accounts WHERE bank_acc_id IN ({placeholders})",
+                recipient_ids
+            )
+        
+        bump_data_version(user_id)
+        record_expense(user_id, category_id, total)
+        for transfer_id, result, _, _, amount in transfers:
+            result.update(status='paid', transfer_id=transfer_id)
+            observe(user_id, category_id, amount, 'Account Transfer', expense_ids.get(transfer_id))
+        for (recipient_user_id,) in recipient_users:
+            bump_data_version(recipient_user_id)
+        return Response({'paid': len(transfers), 'rejected': len(results) - len(transfers),
+                         'total_amount': str(total), 'results': results},
+                        status=status.HTTP_200_OK)
+    except Exception as e:
+        return Response({'error': 'Transaction failed. ' + str(e)},
+                        status=status.HTTP_500_INTERNAL_SERVER_ERROR)
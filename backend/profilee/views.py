@@ -2,7 +2,9 @@ from django.db import connection
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
-import bcrypt
+from accounts.tokens import resolve_token
+from accounts.passwords import PasswordHasherBusy, check_password, hash_password
+from accounts.data_version import conditional_on_data_version
 
 def get_user_id_from_token(request):
     """
@@ -15,16 +17,15 @@ def get_user_id_from_token(request):
     if token.startswith("Bearer "):
         token = token[7:]
     try:
-        with connection.cursor() as cursor:
-            cursor.execute("SELECT user_id FROM user_token WHERE token = %s", [token])
-            user_token = cursor.fetchone()
-        if not user_token:
+        user_id = resolve_token(token)
+        if user_id is None:
             return None, Response({"error": "Invalid token."}, status=status.HTTP_401_UNAUTHORIZED)
-        return user_token[0], None
+        return user_id, None
     except Exception as e:
         return None, Response({"error": f"Token validation error: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @api_view(['GET'])
+@conditional_on_data_version
 def get_account_holder_name(request):
     """
     Retrieves the account holder name for the current logged in user.
@@ -53,6 +54,7 @@ def get_account_holder_name(request):
         return Response({"error": f"An error occurred: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @api_view(['GET'])
+@conditional_on_data_version
 def get_account_number(request):
     """
     Retrieves the account number for the current logged in user.
@@ -114,11 +116,11 @@ def change_password(request):
         
         stored_hashed_password = result[0]
         # Verify the old password using bcrypt.
-        if not bcrypt.checkpw(old_password.encode(), stored_hashed_password.encode()):
+        if not check_password(old_password, stored_hashed_password):
             return Response({"error": "Old password is incorrect."}, status=status.HTTP_401_UNAUTHORIZED)
         
         # Hash the new password
-        new_hashed_password = bcrypt.hashpw(new_password.encode(), bcrypt.gensalt()).decode()
+        new_hashed_password = hash_password(new_password)
         
         # Update the user's password.
         with connection.cursor() as cursor:
@@ -127,6 +129,8 @@ def change_password(request):
         
         return Response({"message": "Password changed successfully."}, status=status.HTTP_200_OK)
     
+    except PasswordHasherBusy:
+        return Response({"error": "Server busy, please retry."}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
     except Exception as e:
         return Response({"error": f"An error occurred while changing the password: {str(e)}"},
                         status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -3,4 +3,6 @@ from django.apps import AppConfig
 
 class PaymentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'payments'
+    name = 'razarpay_payments'
+    # Existing migrations are recorded under the "payments" label.
+    label = 'payments'
@@ -0,0 +1,170 @@
+import logging
+import threading
+import time
+import razorpay
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from razorpay.errors import ServerError
+from metrics.registry import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# Razorpay API access.
+#
+# One process-wide razorpay.Client on a pooled keep-alive requests.Session,
+# so calls reuse TLS connections instead of opening one each. Every request
+# gets connect/read timeouts, and a circuit breaker stops calling Razorpay
+# after BREAKER_FAILURES consecutive timeouts or 5xx responses: callers get
+# GatewayUnavailable immediately (a 503) rather than holding a worker for
+# the full timeout. After BREAKER_RESET_SECONDS one trial call is let
+# through; if it succeeds the circuit closes again.
+
+DEFAULTS = {
+    'API_BASE_URL': None,
+    'CONNECT_TIMEOUT': 3.05,
+    'READ_TIMEOUT': 10.0,
+    'POOL_SIZE': 10,
+    'BREAKER_FAILURES': 5,
+    'BREAKER_RESET_SECONDS': 30.0,
+}
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    'razorpay_request_duration_seconds', 'Razorpay API call time by operation and outcome.', ('operation', 'outcome'))
+SHORT_CIRCUITED = REGISTRY.counter(
+    'razorpay_short_circuited_total', 'Razorpay calls refused while the circuit was open.', ('operation',))
+CIRCUIT_OPEN = REGISTRY.gauge(
+    'razorpay_circuit_open', '1 while the Razorpay circuit breaker is open.')
+
+class GatewayUnavailable(Exception):
+    """Razorpay timed out, failed, or the circuit is open."""
+
+def get_config():
+    config = {}
+    for name, default in DEFAULTS.items():
+        config[name] = getattr(settings, f'RAZORPAY_{name}', default)
+    return config
+
+class CircuitBreaker:
+
+    def __init__(self, failure_threshold, reset_seconds, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self._opened_at is not None
+
+    def allow(self):
+        """
+        Returns True when a call may go out. While open, only one trial call
+        is allowed once reset_seconds have passed.
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial_running or self._clock() - self._opened_at < self.reset_seconds:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+        CIRCUIT_OPEN.set(value=0)
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._opened_at is None and self._failures < self.failure_threshold:
+                return
+            if self._opened_at is None:
+                logger.warning("Razorpay circuit opened after %s consecutive failures", self._failures)
+            # A failed trial restarts the cool-down.
+            self._opened_at = self._clock()
+        CIRCUIT_OPEN.set(value=1)
+
+class TimeoutSession(requests.Session):
+    """A Session that applies a default timeout to every request."""
+
+    def __init__(self, timeout):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return super().request(method, url, **kwargs)
+
+def build_session(config):
+    session = TimeoutSession((config['CONNECT_TIMEOUT'], config['READ_TIMEOUT']))
+    # No automatic retries: order creation is not idempotent and the caller
+    # decides whether to try again.
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=config['POOL_SIZE'], max_retries=0)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+class RazorpayGateway:
+
+    def __init__(self, key_id, key_secret, config=None):
+        config = config or get_config()
+        options = {'base_url': config['API_BASE_URL']} if config['API_BASE_URL'] else {}
+        self.session = build_session(config)
+        self.client = razorpay.Client(session=self.session, auth=(key_id, key_secret), **options)
+        self.breaker = CircuitBreaker(config['BREAKER_FAILURES'], config['BREAKER_RESET_SECONDS'])
+
+    def _call(self, operation, func, *args, **kwargs):
+        if not self.breaker.allow():
+            SHORT_CIRCUITED.inc(operation)
+            raise GatewayUnavailable('Payment provider is unavailable, try again shortly')
+        started = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except (requests.RequestException, ServerError) as e:
+            REQUEST_SECONDS.observe(operation, 'error', value=time.perf_counter() - started)
+            self.breaker.record_failure()
+            raise GatewayUnavailable(f'Payment provider error: {e}') from e
+        except Exception:
+            # 4xx and the like: Razorpay answered, so it is up.
+            REQUEST_SECONDS.observe(operation, 'rejected', value=time.perf_counter() - started)
+            self.breaker.record_success()
+            raise
+        REQUEST_SECONDS.observe(operation, 'ok', value=time.perf_counter() - started)
+        self.breaker.record_success()
+        return result
+
+    def create_order(self, data):
+        return self._call('order.create', self.client.order.create, data=data)
+
+    def fetch_order(self, order_id):
+        return self._call('order.fetch', self.client.order.fetch, order_id)
+
+    def list_payments(self, params):
+        """
+        One page of GET /payments; params take from/to (unix seconds),
+        count (at most 100) and skip.
+        """
+        return self._call('payment.all', self.client.payment.all, data=params)
+
+    def verify_payment_signature(self, params):
+        # Local HMAC check; no network call, so no breaker.
+        return self.client.utility.verify_payment_signature(params)
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+def get_gateway():
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                _gateway = RazorpayGateway(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET)
+    return _gateway
@@ -0,0 +1,64 @@
+import logging
+import threading
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection
+from razarpay_payments.webhooks import claim_batch, process_batch
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = "Applies queued Razorpay webhook events to payments."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help='Worker threads (default: 2).')
+        parser.add_argument('--batch-size', type=int, default=100, help='Events claimed at a time (default: 100).')
+        parser.add_argument('--lease', type=int, default=60,
+                            help='Seconds a worker owns a claimed batch before others may retry it (default: 60).')
+        parser.add_argument('--idle-sleep', type=float, default=1.0,
+                            help='Pause when the queue is empty (default: 1s).')
+        parser.add_argument('--once', action='store_true', help='Drain the queue once and exit.')
+
+    def handle(self, *args, **options):
+        stop = threading.Event()
+        totals = {'processed': 0, 'ignored': 0, 'retry': 0, 'failed': 0}
+        lock = threading.Lock()
+
+        def work():
+            try:
+                while not stop.is_set():
+                    try:
+                        events = claim_batch(options['batch_size'], options['lease'])
+                        if not events:
+                            if options['once']:
+                                return
+                            stop.wait(options['idle_sleep'])
+                            continue
+                        counts = process_batch(events)
+                    except Exception:
+                        logger.exception("Webhook batch failed; its events will be retried after the lease")
+                        stop.wait(options['idle_sleep'])
+                        continue
+                    with lock:
+                        for outcome, count in counts.items():
+                            totals[outcome] += count
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=work, daemon=True) for _ in range(max(1, options['workers']))]
+        for thread in threads:
+            thread.start()
+        try:
+            while any(thread.is_alive() for thread in threads):
+                for thread in threads:
+                    thread.join(timeout=0.5)
+        except KeyboardInterrupt:
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Webhook events in {time.perf_counter() - started:.1f}s: " +
+            ', '.join(f"{outcome} {count}" for outcome, count in totals.items())
+        ))
@@ -0,0 +1,60 @@
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from razarpay_payments.gateway import get_gateway
+from razarpay_payments.reconcile import apply_batch, fetch_payments, iter_stale
+
+class Command(BaseCommand):
+    help = "Settles payments stuck in 'initiated' from Razorpay's payment records. Run nightly."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-age-minutes', type=int, default=30,
+                            help='Leave payments younger than this to verify_payment and webhooks (default: 30).')
+        parser.add_argument('--lookback-days', type=int, default=30, help='Ignore older payments (default: 30).')
+        parser.add_argument('--abandon-hours', type=int, default=24,
+                            help='Mark orders this old with no Razorpay payment as failed (default: 24).')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per read and update (default: 1000).')
+        parser.add_argument('--window-minutes', type=int, default=60,
+                            help='Length of each Razorpay listing window (default: 60).')
+        parser.add_argument('--concurrency', type=int, default=4,
+                            help='Razorpay listing calls in flight (default: 4).')
+        parser.add_argument('--max-minutes', type=float, default=30,
+                            help='Stop starting new listing windows after this long (default: 30).')
+        parser.add_argument('--dry-run', action='store_true', help='Fetch and report without updating.')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        now = timezone.now()
+        stale = []
+        for batch in iter_stale(now - timedelta(minutes=options['min_age_minutes']),
+                                now - timedelta(days=options['lookback_days']), options['batch_size']):
+            stale.extend(batch)
+        if not stale:
+            self.stdout.write("No stale payments.")
+            return
+
+        order_ids = {order_id for _, order_id, _ in stale}
+        deadline = started + options['max_minutes'] * 60
+        found, complete = fetch_payments(get_gateway(), order_ids, stale[0][2], now, options['window_minutes'],
+                                         max(1, options['concurrency']), deadline)
+        self.stdout.write(f"{len(stale)} stale payments, {len(found)} with a Razorpay payment"
+                          f"{'' if complete else ' (listing incomplete; nothing marked abandoned)'} "
+                          f"after {time.monotonic() - started:.1f}s")
+        if options['dry_run']:
+            return
+
+        # Only an order missing from a complete listing is known to be abandoned.
+        abandon_before = now - timedelta(hours=options['abandon_hours']) if complete else None
+        totals = {'successful': 0, 'failed': 0, 'abandoned': 0}
+        size = options['batch_size']
+        for offset in range(0, len(stale), size):
+            counts = apply_batch([payment_id for payment_id, _, _ in stale[offset:offset + size]], found,
+                                 abandon_before)
+            for key, value in counts.items():
+                totals[key] += value
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Reconciled in {time.monotonic() - started:.1f}s: {totals['successful']} successful, "
+            f"{totals['failed']} failed, {totals['abandoned']} abandoned"
+        ))
@@ -37,6 +37,46 @@ class Payment(models.Model):
     signature = models.CharField(max_length=255, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # reconcile_razorpay_orders walks stale 'initiated' rows by age.
+            models.Index(fields=['status', 'created_at'], name='idx_payment_status_created'),
+        ]
     
     def __str__(self):
         return f"{self.order_id} - {self.amount} - {self.status}"
+
+class WebhookEvent(models.Model):
+    """
+    Inbox of Razorpay webhook deliveries. The raw body is stored as received
+    and never changed; only the processing columns move as the
+    process_webhook_events worker works through the queue.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('processed', 'Processed'),
+        ('ignored', 'Ignored'),
+        ('failed', 'Failed'),
+    ]
+
+    event_id = models.CharField(max_length=100, unique=True)
+    event_type = models.CharField(max_length=100)
+    payload = models.TextField()
+    received_at = models.DateTimeField(auto_now_add=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.IntegerField(default=0)
+    # A worker owns a 'processing' event until this time; after that it is
+    # picked up again, so a crashed worker cannot strand events.
+    locked_until = models.DateTimeField(null=True, blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default='')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id'], name='idx_webhook_status_id'),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} {self.event_id} ({self.status})"
@@ -0,0 +1,145 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+from django.db import transaction
+from django.utils import timezone
+from .gateway import GatewayUnavailable
+from .models import Payment
+from .webhooks import PAYMENT_METHODS
+
+logger = logging.getLogger(__name__)
+
+# Order reconciliation.
+#
+# Payments left 'initiated' (the app died before verify_payment and no
+# webhook arrived) are settled from Razorpay's own records. Rather than one
+# order fetch per payment, the job lists Razorpay payments for the whole
+# period the stale orders span: the period is cut into windows that are
+# fetched concurrently, 100 payments a page, and matched to the stale
+# orders by order_id. Updates are applied in batches with bulk_update, each
+# batch re-read under a row lock so a concurrent verify_payment or webhook
+# is never overwritten.
+
+PAGE_SIZE = 100
+PAGE_RETRIES = 3
+
+# Razorpay payment states that settle an order, strongest first: a captured
+# (or since refunded) attempt wins over a failed one for the same order.
+SETTLED = {'captured': ('successful', 3), 'refunded': ('successful', 3), 'failed': ('failed', 1)}
+
+def iter_stale(older_than, newer_than, batch_size):
+    """
+    Yields lists of (id, order_id, created_at) for initiated payments created
+    between newer_than and older_than, oldest first, walking
+    idx_payment_status_created with a (created_at, id) keyset.
+    """
+    base = Payment.objects.filter(status='initiated', created_at__lt=older_than, created_at__gte=newer_than)
+    after = None
+    while True:
+        query = base
+        if after is not None:
+            query = query.filter(created_at__gte=after[0]).exclude(created_at=after[0], id__lte=after[1])
+        batch = list(query.order_by('created_at', 'id').values_list('id', 'order_id', 'created_at')[:batch_size])
+        if not batch:
+            return
+        yield batch
+        after = (batch[-1][2], batch[-1][0])
+
+def windows(start, end, minutes):
+    step = timedelta(minutes=minutes)
+    while start < end:
+        yield start, min(start + step, end)
+        start += step
+
+def fetch_window(gateway, start, end, order_ids):
+    """
+    Pages through Razorpay payments created in [start, end) and returns
+    ({order_id: entity}, complete) for the orders of interest.
+    """
+    found = {}
+    skip = 0
+    while True:
+        params = {'from': int(start.timestamp()), 'to': int(end.timestamp()) - 1, 'count': PAGE_SIZE, 'skip': skip}
+        for attempt in range(PAGE_RETRIES):
+            try:
+                page = gateway.list_payments(params)
+                break
+            except GatewayUnavailable:
+                if attempt == PAGE_RETRIES - 1:
+                    logger.warning("Giving up on Razorpay payments %s..%s at skip %s", start, end, skip)
+                    return found, False
+                time.sleep(2 ** attempt)
+        items = page.get('items') or []
+        for entity in items:
+            order_id = entity.get('order_id')
+            if order_id in order_ids:
+                _keep_strongest(found, order_id, entity)
+        if len(items) < PAGE_SIZE:
+            return found, True
+        skip += PAGE_SIZE
+
+def _keep_strongest(found, order_id, entity):
+    rank = SETTLED.get(entity.get('status'), (None, 0))[1]
+    current = found.get(order_id)
+    if current is None or rank > SETTLED.get(current.get('status'), (None, 0))[1]:
+        found[order_id] = entity
+
+def fetch_payments(gateway, order_ids, start, end, window_minutes, concurrency, deadline):
+    """
+    Fetches the windows between start and end with at most `concurrency`
+    calls in flight. Returns ({order_id: entity}, complete); windows not
+    started before `deadline` (a time.monotonic value) are skipped and make
+    the result incomplete.
+    """
+    found = {}
+    complete = True
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        pending = {}
+        for window_start, window_end in windows(start, end, window_minutes):
+            pending[pool.submit(_fetch_before, deadline, gateway, window_start, window_end, order_ids)] = window_start
+        for future in as_completed(pending):
+            window_found, window_complete = future.result()
+            complete = complete and window_complete
+            for order_id, entity in window_found.items():
+                _keep_strongest(found, order_id, entity)
+    return found, complete
+
+def _fetch_before(deadline, gateway, start, end, order_ids):
+    if time.monotonic() >= deadline:
+        return {}, False
+    return fetch_window(gateway, start, end, order_ids)
+
+def apply_batch(ids, found, abandon_before):
+    """
+    Settles one batch of stale payments. Orders with a captured or failed
+    Razorpay payment take that status; orders created before abandon_before
+    with no payment at all are marked failed (pass None to skip that).
+    Returns {'successful': n, 'failed': n, 'abandoned': n}.
+    """
+    counts = {'successful': 0, 'failed': 0, 'abandoned': 0}
+    now = timezone.now()
+    with transaction.atomic():
+        payments = list(Payment.objects.select_for_update().filter(id__in=ids, status='initiated'))
+        changed = []
+        for payment in payments:
+            entity = found.get(payment.order_id)
+            if entity is not None:
+                status = SETTLED.get(entity.get('status'), (None, 0))[0]
+                if status is None:
+                    continue
+                payment.status = status
+                payment.payment_id = payment.payment_id or entity.get('id')
+                payment.payment_method = PAYMENT_METHODS.get(entity.get('method'), payment.payment_method)
+                counts[status] += 1
+            elif abandon_before is not None and payment.created_at < abandon_before:
+                payment.status = 'failed'
+                counts['abandoned'] += 1
+            else:
+                continue
+            payment.updated_at = now
+            changed.append(payment)
+        if changed:
+            Payment.objects.bulk_update(changed, ['status', 'payment_id', 'payment_method', 'updated_at'],
+                                        batch_size=500)
+    return counts
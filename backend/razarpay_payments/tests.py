@@ -1,3 +1,347 @@
-from django.test import TestCase
+import json
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from benchmarks import stubs
 
-# Create your tests here.
+try:
+    import razorpay  # noqa: F401
+except ImportError:
+    # The gateway only needs the client class; the benchmark stand-in will do.
+    stubs.install()
+
+from .gateway import CircuitBreaker, GatewayUnavailable
+from .models import Payment, WebhookEvent
+from .reconcile import PAGE_RETRIES, PAGE_SIZE, apply_batch, fetch_window
+from .webhooks import MAX_ATTEMPTS, process_batch
+
+def make_payment(order_id, status='initiated'):
+    return Payment.objects.create(order_id=order_id, amount=Decimal('100.00'), status=status)
+
+def make_event(event_type, order_id, payment_id='pay_1', method='upi', event_id=None, attempts=0):
+    body = {
+        'event': event_type,
+        'payload': {'payment': {'entity': {'id': payment_id, 'order_id': order_id, 'method': method}}},
+    }
+    return WebhookEvent.objects.create(
+        event_id=event_id or f"evt_{WebhookEvent.objects.count() + 1}", event_type=event_type,
+        payload=json.dumps(body), status='processing', attempts=attempts,
+    )
+
+class ProcessBatchTests(TestCase):
+
+    def test_captured_settles_payment(self):
+        payment = make_payment('order_1')
+        event = make_event('payment.captured', 'order_1', method='card')
+
+        self.assertEqual(process_batch([event]), {'processed': 1, 'ignored': 0, 'retry': 0, 'failed': 0})
+        payment.refresh_from_db()
+        event.refresh_from_db()
+        self.assertEqual((payment.status, payment.payment_id, payment.payment_method),
+                         ('successful', 'pay_1', 'card'))
+        self.assertEqual((event.status, event.attempts), ('processed', 1))
+        self.assertIsNone(event.locked_until)
+
+    def test_redelivery_is_dropped_at_insert(self):
+        make_event('payment.captured', 'order_1', event_id='evt_same')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            make_event('payment.captured', 'order_1', event_id='evt_same')
+        self.assertEqual(WebhookEvent.objects.filter(event_id='evt_same').count(), 1)
+
+    def test_applying_an_event_twice_changes_nothing(self):
+        payment = make_payment('order_1')
+        event = make_event('payment.captured', 'order_1')
+        process_batch([event])
+        payment.refresh_from_db()
+        updated_at = payment.updated_at
+
+        self.assertEqual(process_batch([event])['processed'], 1)
+        payment.refresh_from_db()
+        self.assertEqual(payment.status, 'successful')
+        self.assertEqual(payment.updated_at, updated_at)
+
+    def test_duplicates_in_one_batch(self):
+        payment = make_payment('order_1')
+        events = [make_event('payment.captured', 'order_1'), make_event('order.paid', 'order_1')]
+
+        self.assertEqual(process_batch(events)['processed'], 2)
+        payment.refresh_from_db()
+        self.assertEqual(payment.status, 'successful')
+
+    def test_failure_after_capture_is_ignored(self):
+        payment = make_payment('order_1')
+        process_batch([make_event('payment.captured', 'order_1')])
+        process_batch([make_event('payment.failed', 'order_1', payment_id='pay_2')])
+
+        payment.refresh_from_db()
+        self.assertEqual((payment.status, payment.payment_id), ('successful', 'pay_1'))
+
+    def test_capture_after_failure_wins(self):
+        payment = make_payment('order_1')
+        events = [make_event('payment.failed', 'order_1'), make_event('payment.captured', 'order_1', payment_id='pay_2')]
+
+        process_batch(events)
+        payment.refresh_from_db()
+        self.assertEqual((payment.status, payment.payment_id), ('successful', 'pay_2'))
+
+    def test_unknown_order_is_retried_then_failed(self):
+        retried = make_event('payment.captured', 'order_missing')
+        exhausted = make_event('payment.captured', 'order_missing', attempts=MAX_ATTEMPTS - 1)
+
+        self.assertEqual(process_batch([retried, exhausted]), {'processed': 0, 'ignored': 0, 'retry': 1, 'failed': 1})
+        retried.refresh_from_db()
+        exhausted.refresh_from_db()
+        self.assertEqual((retried.status, retried.attempts), ('processing', 1))
+        self.assertIsNotNone(retried.locked_until)
+        self.assertEqual((exhausted.status, exhausted.attempts), ('failed', MAX_ATTEMPTS))
+        self.assertIn('order_missing', exhausted.last_error)
+
+    def test_unhandled_and_malformed_events(self):
+        ignored = make_event('refund.created', 'order_1')
+        malformed = WebhookEvent.objects.create(event_id='evt_bad', event_type='payment.captured',
+                                                payload='{not json', status='processing')
+
+        self.assertEqual(process_batch([ignored, malformed]), {'processed': 0, 'ignored': 1, 'retry': 0, 'failed': 1})
+        ignored.refresh_from_db()
+        malformed.refresh_from_db()
+        self.assertEqual(ignored.status, 'ignored')
+        self.assertEqual(malformed.status, 'failed')
+        self.assertTrue(malformed.last_error.startswith('Invalid JSON'))
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class CircuitBreakerTests(SimpleTestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(failure_threshold=3, reset_seconds=30, clock=self.clock)
+
+    def trip(self):
+        for _ in range(3):
+            self.breaker.record_failure()
+
+    def test_opens_after_consecutive_failures(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.assertFalse(self.breaker.is_open)
+        self.assertTrue(self.breaker.allow())
+
+        self.breaker.record_failure()
+        self.assertTrue(self.breaker.is_open)
+        self.assertFalse(self.breaker.allow())
+
+    def test_success_resets_the_failure_count(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.assertFalse(self.breaker.is_open)
+
+    def test_one_trial_after_reset_seconds(self):
+        self.trip()
+        self.clock.now += 29
+        self.assertFalse(self.breaker.allow())
+
+        self.clock.now += 1
+        self.assertTrue(self.breaker.allow())
+        # Only one trial at a time.
+        self.assertFalse(self.breaker.allow())
+
+    def test_successful_trial_closes(self):
+        self.trip()
+        self.clock.now += 30
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_success()
+
+        self.assertFalse(self.breaker.is_open)
+        self.assertTrue(self.breaker.allow())
+        self.assertTrue(self.breaker.allow())
+
+    def test_failed_trial_restarts_the_cool_down(self):
+        self.trip()
+        self.clock.now += 30
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_failure()
+
+        self.assertTrue(self.breaker.is_open)
+        self.clock.now += 29
+        self.assertFalse(self.breaker.allow())
+        self.clock.now += 1
+        self.assertTrue(self.breaker.allow())
+
+class ListingGateway:
+    """
+    Serves GET /payments from the benchmark client's in-memory listing;
+    calls with skip >= fail_from_skip raise GatewayUnavailable.
+    """
+
+    def __init__(self, fail_from_skip=None):
+        self.client = stubs.FakeRazorpayClient()
+        self.fail_from_skip = fail_from_skip
+        self.calls = []
+
+    def add(self, order_id, status, created_at, method='upi'):
+        self.client.payments.append({
+            'id': f"pay_{len(self.client.payments) + 1}", 'entity': 'payment', 'order_id': order_id,
+            'status': status, 'method': method, 'created_at': int(created_at.timestamp()),
+        })
+
+    def list_payments(self, params):
+        self.calls.append(params)
+        if self.fail_from_skip is not None and params['skip'] >= self.fail_from_skip:
+            raise GatewayUnavailable('Payment provider is unavailable, try again shortly')
+        return self.client.payment.all(data=params)
+
+@mock.patch('razarpay_payments.reconcile.time.sleep')
+class FetchWindowTests(SimpleTestCase):
+
+    def setUp(self):
+        self.end = timezone.now().replace(microsecond=0)
+        self.start = self.end - timedelta(hours=1)
+
+    def fill(self, gateway, count):
+        for i in range(count):
+            gateway.add(f"order_{i}", 'captured', self.start + timedelta(seconds=i))
+
+    def test_pages_until_a_short_page(self, sleep):
+        gateway = ListingGateway()
+        self.fill(gateway, 2 * PAGE_SIZE + 50)
+
+        found, complete = fetch_window(gateway, self.start, self.end, {'order_0', 'order_150', 'order_249'})
+        self.assertTrue(complete)
+        self.assertEqual(set(found), {'order_0', 'order_150', 'order_249'})
+        self.assertEqual([call['skip'] for call in gateway.calls], [0, PAGE_SIZE, 2 * PAGE_SIZE])
+
+    def test_full_last_page_is_followed_by_an_empty_one(self, sleep):
+        gateway = ListingGateway()
+        self.fill(gateway, 2 * PAGE_SIZE)
+
+        found, complete = fetch_window(gateway, self.start, self.end, {'order_199'})
+        self.assertTrue(complete)
+        self.assertEqual(set(found), {'order_199'})
+        self.assertEqual(len(gateway.calls), 3)
+
+    def test_window_end_is_exclusive(self, sleep):
+        gateway = ListingGateway()
+        gateway.add('order_in', 'captured', self.end - timedelta(seconds=1))
+        gateway.add('order_out', 'captured', self.end)
+
+        found, _ = fetch_window(gateway, self.start, self.end, {'order_in', 'order_out'})
+        self.assertEqual(set(found), {'order_in'})
+
+    def test_captured_attempt_wins_over_failed(self, sleep):
+        gateway = ListingGateway()
+        gateway.add('order_1', 'failed', self.start)
+        gateway.add('order_1', 'captured', self.start + timedelta(seconds=1))
+        gateway.add('order_1', 'failed', self.start + timedelta(seconds=2))
+
+        found, _ = fetch_window(gateway, self.start, self.end, {'order_1'})
+        self.assertEqual(found['order_1']['status'], 'captured')
+
+    def test_failing_page_makes_the_window_incomplete(self, sleep):
+        gateway = ListingGateway(fail_from_skip=PAGE_SIZE)
+        self.fill(gateway, 2 * PAGE_SIZE + 50)
+
+        found, complete = fetch_window(gateway, self.start, self.end, {'order_0', 'order_249'})
+        self.assertFalse(complete)
+        # Newest first: order_249 was on the first page, order_0 never listed.
+        self.assertEqual(set(found), {'order_249'})
+        self.assertEqual(len(gateway.calls), 1 + PAGE_RETRIES)
+        self.assertEqual(sleep.call_count, PAGE_RETRIES - 1)
+
+class ApplyBatchTests(TestCase):
+
+    def setUp(self):
+        self.now = timezone.now()
+
+    def stale(self, order_id, hours_old):
+        payment = make_payment(order_id)
+        Payment.objects.filter(pk=payment.pk).update(created_at=self.now - timedelta(hours=hours_old))
+        return payment
+
+    def test_settles_from_razorpay_payments(self):
+        captured = self.stale('order_captured', 1)
+        failed = self.stale('order_failed', 1)
+        found = {
+            'order_captured': {'id': 'pay_1', 'status': 'captured', 'method': 'card'},
+            'order_failed': {'id': 'pay_2', 'status': 'failed', 'method': 'upi'},
+        }
+
+        counts = apply_batch([captured.pk, failed.pk], found, None)
+        self.assertEqual(counts, {'successful': 1, 'failed': 1, 'abandoned': 0})
+        captured.refresh_from_db()
+        failed.refresh_from_db()
+        self.assertEqual((captured.status, captured.payment_id, captured.payment_method),
+                         ('successful', 'pay_1', 'card'))
+        self.assertEqual(failed.status, 'failed')
+
+    def test_abandons_only_old_orders_with_no_payment(self):
+        old = self.stale('order_old', 48)
+        recent = self.stale('order_recent', 1)
+
+        counts = apply_batch([old.pk, recent.pk], {}, self.now - timedelta(hours=24))
+        self.assertEqual(counts, {'successful': 0, 'failed': 0, 'abandoned': 1})
+        old.refresh_from_db()
+        recent.refresh_from_db()
+        self.assertEqual((old.status, recent.status), ('failed', 'initiated'))
+
+    def test_abandons_nothing_without_a_cutoff(self):
+        old = self.stale('order_old', 48)
+
+        self.assertEqual(apply_batch([old.pk], {}, None)['abandoned'], 0)
+        old.refresh_from_db()
+        self.assertEqual(old.status, 'initiated')
+
+    def test_leaves_payments_settled_meanwhile(self):
+        payment = self.stale('order_1', 1)
+        Payment.objects.filter(pk=payment.pk).update(status='successful')
+
+        counts = apply_batch([payment.pk], {'order_1': {'id': 'pay_1', 'status': 'failed'}}, None)
+        self.assertEqual(counts['failed'], 0)
+        payment.refresh_from_db()
+        self.assertEqual(payment.status, 'successful')
+
+@mock.patch('razarpay_payments.reconcile.time.sleep')
+class ReconcileCommandTests(TestCase):
+
+    def setUp(self):
+        now = timezone.now()
+        self.abandoned = make_payment('order_abandoned')
+        self.paid = make_payment('order_paid')
+        Payment.objects.update(created_at=now - timedelta(hours=30))
+        self.created_at = now - timedelta(hours=30)
+
+    def run_command(self, gateway):
+        out = StringIO()
+        with mock.patch('razarpay_payments.management.commands.reconcile_razorpay_orders.get_gateway',
+                        return_value=gateway):
+            call_command('reconcile_razorpay_orders', '--lookback-days', '2', stdout=out)
+        self.abandoned.refresh_from_db()
+        self.paid.refresh_from_db()
+        return out.getvalue()
+
+    def test_complete_listing_abandons_missing_orders(self, sleep):
+        gateway = ListingGateway()
+        gateway.add('order_paid', 'captured', self.created_at + timedelta(seconds=5))
+
+        self.run_command(gateway)
+        self.assertEqual((self.paid.status, self.abandoned.status), ('successful', 'failed'))
+
+    def test_incomplete_listing_abandons_nothing(self, sleep):
+        gateway = ListingGateway(fail_from_skip=0)
+
+        output = self.run_command(gateway)
+        self.assertIn('listing incomplete', output)
+        self.assertEqual((self.paid.status, self.abandoned.status), ('initiated', 'initiated'))
@@ -5,4 +5,5 @@ urlpatterns = [
     path('create_order/', views.create_order, name='create_order'),
     path('verify_payment/', views.verify_payment, name='verify_payment'),
     path('payment_history/', views.payment_history, name='payment_history'),
+    path('razorpay/webhook/', views.razorpay_webhook, name='razorpay_webhook'),
 ]
@@ -1,13 +1,13 @@
 import json
-import razorpay
 from rest_framework import status
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from rest_framework.response import Response
 from django.conf import settings
-from .models import Payment
+from django.db import IntegrityError
+from .gateway import GatewayUnavailable, get_gateway
+from .models import Payment, WebhookEvent
 from .serializers import CreateOrderSerializer, PaymentSerializer
-
-client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
+from .webhooks import event_id_for, signature_valid, webhook_secret
 
 @api_view(['POST'])
 def create_order(request):
@@ -29,7 +29,7 @@ def create_order(request):
             'receipt': f'receipt_{amount}_{category}',
             'payment_capture': 1  # Auto-capture
         }
-        order = client.order.create(data=order_data)
+        order = get_gateway().create_order(order_data)
         
         # Save order to database
         payment = Payment(
@@ -50,6 +50,8 @@ def create_order(request):
         
         return Response(response_data, status=status.HTTP_200_OK)
     
+    except GatewayUnavailable as e:
+        return Response({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -70,7 +72,7 @@ def verify_payment(request):
         }
         
         # Verify the payment signature
-        client.utility.verify_payment_signature(params_dict)
+        get_gateway().verify_payment_signature(params_dict)
         
         # Update payment in database
         try:
@@ -78,7 +80,8 @@ def verify_payment(request):
             payment.payment_id = payment_id
             payment.signature = signature
             payment.status = 'successful'
-            payment.payment_method = payment_method
+            if payment_method:
+                payment.payment_method = payment_method
             payment.save()
             
             serializer = PaymentSerializer(payment)
@@ -88,17 +91,43 @@ def verify_payment(request):
             return Response({'error': 'Payment not found'}, status=status.HTTP_404_NOT_FOUND)
     
     except Exception as e:
-        # Update payment as failed if there was an exception
-        if order_id:
-            try:
-                payment = Payment.objects.get(order_id=order_id)
-                payment.status = 'failed'
-                payment.save()
-            except Payment.DoesNotExist:
-                pass
-        
+        # A failed client-side check leaves the status alone: the payment may
+        # still be captured, and the webhook (see razorpay_webhook) is what
+        # settles it.
         return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+@api_view(['POST'])
+@authentication_classes([])
+@permission_classes([])
+def razorpay_webhook(request):
+    """
+    Receives Razorpay webhooks. Verifies X-Razorpay-Signature over the raw
+    body, appends the event to the WebhookEvent inbox and returns at once;
+    `manage.py process_webhook_events` applies it to the payment.
+    """
+    secret = webhook_secret()
+    if not secret:
+        return Response({'error': 'Webhook secret is not configured'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    # Read the raw bytes before anything touches request.data.
+    body = request.body
+    if not signature_valid(body, request.headers.get('X-Razorpay-Signature'), secret):
+        return Response({'error': 'Invalid signature'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        event_type = json.loads(body).get('event') or ''
+    except (ValueError, AttributeError):
+        return Response({'error': 'Invalid payload'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        WebhookEvent.objects.create(
+            event_id=event_id_for(body, request.headers.get('X-Razorpay-Event-Id')),
+            event_type=event_type[:100],
+            payload=body.decode('utf-8'),
+        )
+    except IntegrityError:
+        # Redelivery of an event already in the inbox.
+        return Response({'status': 'duplicate'}, status=status.HTTP_200_OK)
+    return Response({'status': 'queued'}, status=status.HTTP_200_OK)
+
 @api_view(['GET'])
 def payment_history(request):
     payments = Payment.objects.all().order_by('-created_at')
@@ -0,0 +1,144 @@
+import hashlib
+import hmac
+import json
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from .models import Payment, WebhookEvent
+
+# Razorpay webhook inbox.
+#
+# The endpoint only verifies the signature and appends the raw body to
+# WebhookEvent, so its latency does not depend on how busy the payments
+# table is. Workers (manage.py process_webhook_events) claim pending events
+# in batches, apply them to Payment and mark them done. Processing is
+# idempotent: redeliveries share an event id and are dropped at insert, and
+# a payment that is already successful is never moved back to failed, so
+# events can be applied in any order and more than once.
+
+MAX_ATTEMPTS = 5
+RETRY_BACKOFF = timedelta(seconds=30)
+
+# Razorpay payment methods mapped onto Payment.PAYMENT_METHOD_CHOICES.
+PAYMENT_METHODS = {'upi': 'upi', 'card': 'card', 'netbanking': 'netbanking', 'wallet': 'wallet'}
+
+SUCCESS_EVENTS = ('payment.captured', 'order.paid')
+FAILURE_EVENTS = ('payment.failed',)
+
+def webhook_secret():
+    return getattr(settings, 'RAZORPAY_WEBHOOK_SECRET', '')
+
+def signature_valid(body, signature, secret):
+    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature or '')
+
+def event_id_for(body, header_value):
+    # Razorpay sends X-Razorpay-Event-Id; fall back to the body hash so a
+    # redelivery without the header still deduplicates.
+    return header_value or hashlib.sha256(body).hexdigest()
+
+def claim_batch(batch_size, lease_seconds=60):
+    """
+    Marks up to batch_size pending (or abandoned) events as processing for
+    this worker and returns them. Concurrent workers skip each other's rows.
+    """
+    now = timezone.now()
+    ready = Q(status='pending') | Q(status='processing', locked_until__lt=now)
+    with transaction.atomic():
+        ids = list(
+            WebhookEvent.objects.select_for_update(skip_locked=True)
+            .filter(ready).order_by('id').values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return []
+        WebhookEvent.objects.filter(id__in=ids).update(
+            status='processing', locked_until=now + timedelta(seconds=lease_seconds),
+        )
+    return list(WebhookEvent.objects.filter(id__in=ids).order_by('id'))
+
+def _payment_entity(payload):
+    return ((payload.get('payload') or {}).get('payment') or {}).get('entity') or {}
+
+def apply_event(payment, event_type, entity):
+    """
+    Applies one event to a Payment in memory. Returns True when it changed.
+    """
+    if event_type in SUCCESS_EVENTS:
+        changed = payment.status != 'successful'
+        payment.status = 'successful'
+        if entity.get('id') and payment.payment_id != entity['id']:
+            payment.payment_id = entity['id']
+            changed = True
+        method = PAYMENT_METHODS.get(entity.get('method'))
+        if method and payment.payment_method != method:
+            payment.payment_method = method
+            changed = True
+        return changed
+    if event_type in FAILURE_EVENTS and payment.status == 'initiated':
+        payment.status = 'failed'
+        return True
+    return False
+
+def process_batch(events):
+    """
+    Applies a claimed batch: one query to load the affected payments, one
+    bulk_update for the changes and one update per outcome for the events.
+    Returns a dict of counts by outcome.
+    """
+    parsed = {}
+    outcomes = {'processed': [], 'ignored': [], 'retry': [], 'failed': []}
+    errors = {}
+    for event in events:
+        try:
+            body = json.loads(event.payload)
+        except ValueError as e:
+            errors[event.id] = f"Invalid JSON: {e}"
+            outcomes['failed'].append(event.id)
+            continue
+        if event.event_type not in SUCCESS_EVENTS + FAILURE_EVENTS:
+            outcomes['ignored'].append(event.id)
+            continue
+        entity = _payment_entity(body)
+        parsed[event.id] = (event, entity, entity.get('order_id'))
+
+    order_ids = {order_id for _, _, order_id in parsed.values() if order_id}
+    now = timezone.now()
+    with transaction.atomic():
+        # Locked so a concurrent verify_payment cannot be overwritten.
+        payments = (Payment.objects.select_for_update().in_bulk(order_ids, field_name='order_id')
+                    if order_ids else {})
+        changed = {}
+        for event_id, (event, entity, order_id) in parsed.items():
+            payment = payments.get(order_id)
+            if payment is None:
+                errors[event_id] = f"No payment for order '{order_id}'"
+                outcomes['retry' if event.attempts + 1 < MAX_ATTEMPTS else 'failed'].append(event_id)
+                continue
+            if apply_event(payment, event.event_type, entity):
+                changed[payment.pk] = payment
+            outcomes['processed'].append(event_id)
+
+        if changed:
+            for payment in changed.values():
+                payment.updated_at = now
+            Payment.objects.bulk_update(list(changed.values()),
+                                        ['status', 'payment_id', 'payment_method', 'updated_at'])
+        if outcomes['processed']:
+            WebhookEvent.objects.filter(id__in=outcomes['processed']).update(
+                status='processed', processed_at=now, locked_until=None, attempts=F('attempts') + 1)
+        if outcomes['ignored']:
+            WebhookEvent.objects.filter(id__in=outcomes['ignored']).update(
+                status='ignored', processed_at=now, locked_until=None, attempts=F('attempts') + 1)
+        for event_id in outcomes['retry']:
+            # Left 'processing' with a lease that expires after the backoff,
+            # so claim_batch picks it up again later rather than immediately.
+            WebhookEvent.objects.filter(id=event_id).update(
+                locked_until=now + RETRY_BACKOFF, attempts=F('attempts') + 1, last_error=errors[event_id],
+            )
+        for event_id in outcomes['failed']:
+            WebhookEvent.objects.filter(id=event_id).update(
+                status='failed', locked_until=None, attempts=F('attempts') + 1, last_error=errors.get(event_id, ''),
+            )
+    return {outcome: len(ids) for outcome, ids in outcomes.items()}
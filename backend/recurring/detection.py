@@ -0,0 +1,132 @@
+import hashlib
+import re
+from datetime import datetime, timedelta
+import numpy as np
+
+# Recurring charge detection.
+#
+# Expenses are grouped by a merchant key (the description with digits,
+# reference numbers and punctuation stripped). All groups of a batch of
+# users are analysed together: rows are sorted by (group, date) once, and
+# the intervals, median interval, regularity and amount spread of every
+# group come out of a handful of NumPy passes (diff / lexsort / bincount)
+# rather than a Python loop per group.
+
+# (cadence, nominal period in days, accepted median interval range, tolerance
+# for each individual interval, minimum occurrences)
+CADENCES = (
+    ('weekly', 7, (6, 8), 2, 4),
+    ('monthly', 30.4, (26, 35), 5, 3),
+    ('quarterly', 91.3, (84, 98), 10, 3),
+    ('yearly', 365.25, (350, 380), 20, 2),
+)
+
+# A group counts as recurring when at least this share of its intervals sit
+# within tolerance of the median and amounts vary by at most MAX_AMOUNT_CV.
+MIN_REGULARITY = 0.75
+MAX_AMOUNT_CV = 0.25
+
+_noise = re.compile(r'[^a-z ]+')
+_spaces = re.compile(r'\s+')
+
+def merchant_key(description):
+    """
+    Stable key for "the same merchant": lower-cased letters only, so order
+    numbers, dates and UPI references do not split a subscription.
+    """
+    text = _spaces.sub(' ', _noise.sub(' ', (description or '').lower())).strip()
+    return hashlib.sha1(text.encode('utf-8')).hexdigest() if text else None
+
+def _as_datetime(value):
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value))
+
+def detect(rows, epoch=datetime(2000, 1, 1)):
+    """
+    Finds recurring groups in `rows` of (user_id, description, amount, date,
+    category_id). Returns one dict per recurring (user_id, merchant_key)
+    with cadence, period_days, typical_amount, occurrences, confidence,
+    first_seen, last_seen, next_expected, description and category_id.
+    """
+    groups = {}
+    group_ids, days, amounts = [], [], []
+    samples = []
+    for user_id, description, amount, date, category_id in rows:
+        key = merchant_key(description)
+        if key is None:
+            continue
+        group = groups.get((user_id, key))
+        if group is None:
+            group = groups[(user_id, key)] = len(groups)
+            samples.append((user_id, key, description, category_id))
+        group_ids.append(group)
+        days.append((_as_datetime(date) - epoch).total_seconds() / 86400.0)
+        amounts.append(float(amount))
+    if not groups:
+        return []
+
+    g = np.asarray(group_ids, dtype=np.int64)
+    t = np.asarray(days, dtype=np.float64)
+    a = np.asarray(amounts, dtype=np.float64)
+    order = np.lexsort((t, g))
+    g, t, a = g[order], t[order], a[order]
+    count = len(groups)
+
+    occurrences = np.bincount(g, minlength=count)
+    last_index = np.cumsum(occurrences) - 1
+    first_index = last_index - occurrences + 1
+
+    # Intervals between consecutive charges of the same group.
+    same = g[1:] == g[:-1]
+    interval_group = g[1:][same]
+    intervals = np.diff(t)[same]
+    # Same-day duplicates (split payments) are not an interval.
+    keep = intervals >= 1
+    interval_group, intervals = interval_group[keep], intervals[keep]
+    interval_count = np.bincount(interval_group, minlength=count)
+
+    # Lower median of each group's intervals: sort by (group, interval) and
+    # index into the middle of each group's run.
+    by_value = np.lexsort((intervals, interval_group))
+    sorted_intervals = intervals[by_value]
+    starts = np.cumsum(interval_count) - interval_count
+    has_intervals = interval_count > 0
+    median = np.zeros(count)
+    median[has_intervals] = sorted_intervals[starts[has_intervals] + (interval_count[has_intervals] - 1) // 2]
+
+    amount_sum = np.bincount(g, weights=a, minlength=count)
+    amount_sq = np.bincount(g, weights=a * a, minlength=count)
+    mean_amount = amount_sum / np.maximum(occurrences, 1)
+    variance = np.maximum(amount_sq / np.maximum(occurrences, 1) - mean_amount ** 2, 0.0)
+    amount_cv = np.sqrt(variance) / np.maximum(mean_amount, 1e-9)
+
+    results = []
+    for cadence, period, (low, high), tolerance, min_occurrences in CADENCES:
+        candidate = has_intervals & (median >= low) & (median <= high) & (occurrences >= min_occurrences)
+        if not candidate.any():
+            continue
+        on_beat = np.abs(intervals - median[interval_group]) <= tolerance
+        regular = np.bincount(interval_group, weights=on_beat, minlength=count) / np.maximum(interval_count, 1)
+        matched = candidate & (regular >= MIN_REGULARITY) & (amount_cv <= MAX_AMOUNT_CV)
+        for group in np.flatnonzero(matched):
+            user_id, key, description, category_id = samples[group]
+            last_seen = epoch + timedelta(days=float(t[last_index[group]]))
+            # More occurrences and steadier amounts raise confidence.
+            confidence = float(regular[group]) * min(1.0, occurrences[group] / (min_occurrences + 3)) \
+                * (1.0 - float(amount_cv[group]))
+            results.append({
+                'user_id': user_id,
+                'merchant_key': key,
+                'description': description[:255],
+                'category_id': category_id,
+                'cadence': cadence,
+                'period_days': float(median[group]),
+                'typical_amount': round(float(mean_amount[group]), 2),
+                'occurrences': int(occurrences[group]),
+                'confidence': round(confidence, 3),
+                'first_seen': epoch + timedelta(days=float(t[first_index[group]])),
+                'last_seen': last_seen,
+                'next_expected': last_seen + timedelta(days=float(median[group])),
+            })
+    return results
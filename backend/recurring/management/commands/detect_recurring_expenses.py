@@ -0,0 +1,109 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+from recurring.detection import detect
+from recurring.models import RecurringExpense, RecurringScanState
+
+STATE_NAME = 'recurring_expenses'
+UPDATE_FIELDS = ['description', 'category_id', 'cadence', 'period_days', 'typical_amount', 'occurrences',
+                 'confidence', 'first_seen', 'last_seen', 'next_expected', 'active', 'updated_at']
+
+def _aware(value):
+    return timezone.make_aware(value) if timezone.is_naive(value) else value
+
+def analyse_users(user_ids, high_water, since):
+    """
+    Re-runs detection for one chunk of users over the lookback window and
+    upserts the results. Runs on a worker thread with its own connection.
+    """
+    try:
+        placeholders = ', '.join(['%s'] * len(user_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT user_id, description, amount, date, category_id
+                FROM expense
+                WHERE user_id IN ({placeholders}) AND date >= %s AND expense_id <= %s
+            """, list(user_ids) + [since, high_water])
+            rows = cursor.fetchall()
+
+        found = detect(rows)
+        started = timezone.now()
+        records = [
+            RecurringExpense(
+                **dict(result, first_seen=_aware(result['first_seen']), last_seen=_aware(result['last_seen']),
+                       next_expected=_aware(result['next_expected'])),
+                active=True,
+            )
+            for result in found
+        ]
+        if records:
+            RecurringExpense.objects.bulk_create(
+                records, update_conflicts=True, unique_fields=['user_id', 'merchant_key'],
+                update_fields=UPDATE_FIELDS,
+            )
+        # Groups these users had that no longer look recurring.
+        RecurringExpense.objects.filter(user_id__in=user_ids, active=True, updated_at__lt=started).update(active=False)
+        return len(rows), len(records)
+    finally:
+        connection.close()
+
+class Command(BaseCommand):
+    help = ("Detects recurring expenses (subscriptions, rent, bills). Only users with expense rows "
+            "added since the previous run are re-analysed.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Parallel worker threads (default: 4).')
+        parser.add_argument('--chunk-users', type=int, default=200,
+                            help='Users analysed per task (default: 200).')
+        parser.add_argument('--lookback-days', type=int, default=400,
+                            help='History considered per user (default: 400 days).')
+        parser.add_argument('--grace-days', type=int, default=10,
+                            help='Mark a charge inactive once it is this overdue (default: 10).')
+        parser.add_argument('--overlap-ids', type=int, default=1000,
+                            help='Expense ids below the previous watermark to look at again (default: 1000).')
+        parser.add_argument('--full', action='store_true', help='Ignore the watermark and rescan every user.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        state, _ = RecurringScanState.objects.get_or_create(name=STATE_NAME)
+        # Ids are handed out before commit, so a row that commits after the
+        # previous run read MAX(expense_id) can sit below that watermark.
+        # Each run looks again at the last --overlap-ids ids; re-analysing a
+        # user is idempotent.
+        low_water = 0 if options['full'] else max(state.last_expense_id - options['overlap_ids'], 0)
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT MAX(expense_id) FROM expense")
+            high_water = cursor.fetchone()[0] or 0
+            # The primary key range makes this proportional to new rows only.
+            cursor.execute(
+                "SELECT DISTINCT user_id FROM expense WHERE expense_id > %s AND expense_id <= %s",
+                [low_water, high_water]
+            )
+            user_ids = sorted(row[0] for row in cursor.fetchall())
+
+        since = datetime.now() - timedelta(days=options['lookback_days'])
+        chunk = max(1, options['chunk_users'])
+        chunks = [user_ids[i:i + chunk] for i in range(0, len(user_ids), chunk)]
+        rows_read = detected = 0
+        if chunks:
+            with ThreadPoolExecutor(max_workers=max(1, options['workers'])) as pool:
+                for rows, records in pool.map(lambda ids: analyse_users(ids, high_water, since), chunks):
+                    rows_read += rows
+                    detected += records
+
+        overdue = RecurringExpense.objects.filter(
+            active=True, next_expected__lt=timezone.now() - timedelta(days=options['grace_days'])
+        ).update(active=False)
+
+        state.last_expense_id = high_water
+        state.last_run_at = timezone.now()
+        state.save(update_fields=['last_expense_id', 'last_run_at'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Analysed {len(user_ids)} users ({rows_read} rows, expense_id {low_water}..{high_water}) in "
+            f"{time.perf_counter() - started:.1f}s: {detected} recurring charges, {overdue} marked inactive."
+        ))
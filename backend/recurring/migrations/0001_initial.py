@@ -0,0 +1,45 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecurringExpense',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.IntegerField()),
+                ('merchant_key', models.CharField(max_length=40)),
+                ('description', models.CharField(max_length=255)),
+                ('category_id', models.IntegerField(blank=True, null=True)),
+                ('cadence', models.CharField(choices=[('weekly', 'Weekly'), ('monthly', 'Monthly'), ('quarterly', 'Quarterly'), ('yearly', 'Yearly')], max_length=10)),
+                ('period_days', models.FloatField()),
+                ('typical_amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('occurrences', models.IntegerField()),
+                ('confidence', models.FloatField()),
+                ('first_seen', models.DateTimeField()),
+                ('last_seen', models.DateTimeField()),
+                ('next_expected', models.DateTimeField()),
+                ('active', models.BooleanField(default=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user_id', 'active'], name='idx_recurring_user_active')],
+                'constraints': [models.UniqueConstraint(fields=('user_id', 'merchant_key'), name='uniq_recurring_user_merchant')],
+            },
+        ),
+        migrations.CreateModel(
+            name='RecurringScanState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_expense_id', models.BigIntegerField(default=0)),
+                ('last_run_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,48 @@
+from django.db import models
+
+class RecurringExpense(models.Model):
+    CADENCE_CHOICES = [
+        ('weekly', 'Weekly'),
+        ('monthly', 'Monthly'),
+        ('quarterly', 'Quarterly'),
+        ('yearly', 'Yearly'),
+    ]
+
+    # expense / user are raw tables, so these are plain ids rather than FKs.
+    user_id = models.IntegerField()
+    merchant_key = models.CharField(max_length=40)
+    description = models.CharField(max_length=255)
+    category_id = models.IntegerField(null=True, blank=True)
+    cadence = models.CharField(max_length=10, choices=CADENCE_CHOICES)
+    period_days = models.FloatField()
+    typical_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    occurrences = models.IntegerField()
+    confidence = models.FloatField()
+    first_seen = models.DateTimeField()
+    last_seen = models.DateTimeField()
+    next_expected = models.DateTimeField()
+    active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user_id', 'merchant_key'], name='uniq_recurring_user_merchant'),
+        ]
+        indexes = [
+            models.Index(fields=['user_id', 'active'], name='idx_recurring_user_active'),
+        ]
+
+    def __str__(self):
+        return f"{self.description} ({self.cadence}) for user {self.user_id}"
+
+class RecurringScanState(models.Model):
+    """
+    High-water mark of the detection job: expense rows up to
+    last_expense_id have been analysed.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    last_expense_id = models.BigIntegerField(default=0)
+    last_run_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.last_expense_id}"
@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import get_recurring_expenses
+
+urlpatterns = [
+    path('', get_recurring_expenses, name='get_recurring_expenses'),
+]
@@ -0,0 +1,48 @@
+from django.db import connection
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from rest_framework import status
+from accounts.tokens import resolve_token_from_request
+from .models import RecurringExpense
+
+@api_view(['GET'])
+def get_recurring_expenses(request):
+    """
+    Lists the recurring charges detected for the authenticated user, most
+    confident first.
+    Optional query parameters:
+      - include_inactive ('true' to include charges that have stopped)
+    """
+    user_id = resolve_token_from_request(request)
+    if user_id is None:
+        return Response({'error': 'Invalid or missing token'}, status=status.HTTP_401_UNAUTHORIZED)
+
+    queryset = RecurringExpense.objects.filter(user_id=user_id)
+    if request.GET.get('include_inactive', '').lower() != 'true':
+        queryset = queryset.filter(active=True)
+    records = list(queryset.order_by('-confidence', 'next_expected'))
+
+    category_ids = {record.category_id for record in records if record.category_id is not None}
+    names = {}
+    if category_ids:
+        placeholders = ', '.join(['%s'] * len(category_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT category_id, name FROM categories WHERE category_id IN ({placeholders})",
+                           list(category_ids))
+            names = dict(cursor.fetchall())
+
+    results = [{
+        'id': record.id,
+        'description': record.description,
+        'category': names.get(record.category_id),
+        'cadence': record.cadence,
+        'period_days': round(record.period_days, 1),
+        'typical_amount': record.typical_amount,
+        'occurrences': record.occurrences,
+        'confidence': record.confidence,
+        'first_seen': record.first_seen,
+        'last_seen': record.last_seen,
+        'next_expected': record.next_expected,
+        'active': record.active,
+    } for record in records]
+    return Response(results, status=status.HTTP_200_OK)
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class TaxApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tax_api'
+
+    def ready(self):
+        # Compile every year's slab tables once at startup.
+        from .slabs import compile_all
+        compile_all()
@@ -0,0 +1,110 @@
+import numpy as np
+from .slabs import DEFAULT_FISCAL_YEAR, get_rules
+
+# Vectorized counterparts of calculate_old_regime_tax / calculate_new_regime_tax.
+#
+# Slab tables come from tax_api.slabs, compiled once per fiscal year, so the
+# tax for a whole array of incomes is one searchsorted plus one multiply-add.
+
+# Request field for each deduction bucket, as accepted by calculate_tax.
+DEDUCTION_FIELDS = {
+    "80C": 'deduction_80c',
+    "80D": 'deduction_80d',
+    "80E": 'deduction_80e',
+    "80G": 'deduction_80g',
+    "80TTA": 'deduction_80tta',
+    "HomeLoan": 'home_loan_interest',
+    "NPS": 'nps_contribution',
+}
+
+# Upper bound on scenarios / sweep combinations evaluated per request.
+MAX_SCENARIOS = 10000
+MAX_SWEEP_COMBINATIONS = 200000
+
+def old_regime_tax_batch(gross_income, total_deductions, fiscal_year=DEFAULT_FISCAL_YEAR):
+    rules = get_rules(fiscal_year, 'old')
+    taxable = (np.asarray(gross_income, dtype=np.float64) - rules.standard_deduction
+               - np.asarray(total_deductions, dtype=np.float64))
+    return rules.tax_array(taxable)
+
+def new_regime_tax_batch(gross_income, fiscal_year=DEFAULT_FISCAL_YEAR):
+    rules = get_rules(fiscal_year, 'new')
+    return rules.tax_array(np.asarray(gross_income, dtype=np.float64) - rules.standard_deduction)
+
+def recommended_regime(old_tax, new_tax):
+    return np.where(new_tax < old_tax, "New", np.where(old_tax > new_tax, "Old", "Zero Tax"))
+
+def parse_deductions(data):
+    """
+    Reads the deduction fields of one scenario; missing fields count as 0.
+    Raises ValueError on non-numeric input.
+    """
+    return {name: float(data.get(field, 0) or 0) for name, field in DEDUCTION_FIELDS.items()}
+
+def evaluate_scenarios(scenarios, fiscal_year=DEFAULT_FISCAL_YEAR):
+    """
+    Evaluates both regimes for a list of scenario dicts (the calculate_tax
+    payload) in one vectorized pass per fiscal year. A scenario may carry its
+    own 'fiscal_year'; otherwise `fiscal_year` applies. Returns a list of
+    result dicts in input order.
+    """
+    gross = np.array([float(s.get('gross_income', 0) or 0) for s in scenarios], dtype=np.float64)
+    deductions = np.array([sum(parse_deductions(s).values()) for s in scenarios], dtype=np.float64)
+    years = np.array([s.get('fiscal_year') or fiscal_year for s in scenarios])
+
+    old_tax = np.empty(len(scenarios))
+    new_tax = np.empty(len(scenarios))
+    for year in np.unique(years):
+        mask = years == year
+        old_tax[mask] = old_regime_tax_batch(gross[mask], deductions[mask], str(year))
+        new_tax[mask] = new_regime_tax_batch(gross[mask], str(year))
+    regimes = recommended_regime(old_tax, new_tax)
+    return [
+        {
+            "fiscal_year": str(year),
+            "Old Regime Tax": float(old),
+            "New Regime Tax": float(new),
+            "Recommended Regime": str(regime),
+        }
+        for year, old, new, regime in zip(years, old_tax, new_tax, regimes)
+    ]
+
+def sweep_deductions(gross_income, options, max_total_deduction=None, fiscal_year=DEFAULT_FISCAL_YEAR):
+    """
+    Evaluates every combination of the candidate amounts in `options`
+    ({request field: [amounts]}) and returns the combination with the lowest
+    old-regime tax, preferring the smallest total outlay on ties.
+    """
+    fields = list(options)
+    grids = [np.asarray(options[field], dtype=np.float64) for field in fields]
+    combinations = int(np.prod([len(grid) for grid in grids])) if grids else 1
+    if combinations > MAX_SWEEP_COMBINATIONS:
+        raise ValueError(f"Sweep has {combinations} combinations; the limit is {MAX_SWEEP_COMBINATIONS}.")
+
+    if grids:
+        mesh = np.stack([axis.ravel() for axis in np.meshgrid(*grids, indexing='ij')], axis=1)
+    else:
+        mesh = np.zeros((1, 0))
+    totals = mesh.sum(axis=1)
+    if max_total_deduction is not None:
+        allowed = totals <= max_total_deduction
+        if not allowed.any():
+            raise ValueError("No combination fits within max_total_deduction.")
+        mesh, totals = mesh[allowed], totals[allowed]
+
+    old_tax = old_regime_tax_batch(np.full(len(totals), gross_income), totals, fiscal_year)
+    new_tax = float(new_regime_tax_batch([gross_income], fiscal_year)[0])
+    # lexsort sorts by the last key first: tax, then total outlay.
+    best = int(np.lexsort((totals, old_tax))[0])
+    best_old = float(old_tax[best])
+
+    return {
+        "fiscal_year": fiscal_year,
+        "gross_income": gross_income,
+        "best_deductions": {field: float(value) for field, value in zip(fields, mesh[best])},
+        "total_deduction": float(totals[best]),
+        "Old Regime Tax": best_old,
+        "New Regime Tax": new_tax,
+        "Recommended Regime": str(recommended_regime(np.array([best_old]), np.array([new_tax]))[0]),
+        "combinations_evaluated": int(len(totals)),
+    }
@@ -0,0 +1,53 @@
+from datetime import datetime
+
+# Expense categories that count towards a deduction bucket when estimating
+# tax from a user's own transactions. Names are matched case-insensitively.
+CATEGORY_DEDUCTIONS = {
+    'INSURANCE': '80D',
+    'HEALTH INSURANCE': '80D',
+    'MEDICAL INSURANCE': '80D',
+    'DONATION': '80G',
+    'DONATIONS': '80G',
+    'CHARITY': '80G',
+    'EDUCATION LOAN': '80E',
+    'INVESTMENT': '80C',
+    'INVESTMENTS': '80C',
+    'LIFE INSURANCE': '80C',
+    'PPF': '80C',
+    'ELSS': '80C',
+    'TUITION FEES': '80C',
+    'NPS': 'NPS',
+    'HOME LOAN INTEREST': 'HomeLoan',
+}
+
+# Statutory ceilings: spending above these is not deductible.
+DEDUCTION_CAPS = {
+    '80C': 150000,
+    '80D': 25000,
+    '80TTA': 10000,
+    'HomeLoan': 200000,
+    'NPS': 50000,
+}
+
+def fiscal_year_range(fiscal_year):
+    """
+    '2024-25' -> (2024-04-01, 2025-04-01), a half-open datetime range.
+    """
+    try:
+        start_year = int(fiscal_year.split('-')[0])
+    except (AttributeError, ValueError):
+        raise ValueError(f"Invalid fiscal year '{fiscal_year}'. Expected e.g. '2024-25'.")
+    return datetime(start_year, 4, 1), datetime(start_year + 1, 4, 1)
+
+def deductions_from_spend(spend_by_category):
+    """
+    Folds {category name: total spent} into capped deduction buckets.
+    Returns (claimed, spend) where spend is the uncapped total per bucket.
+    """
+    spend = {}
+    for name, total in spend_by_category.items():
+        bucket = CATEGORY_DEDUCTIONS.get(str(name).upper())
+        if bucket:
+            spend[bucket] = spend.get(bucket, 0.0) + float(total or 0)
+    claimed = {bucket: min(total, DEDUCTION_CAPS.get(bucket, total)) for bucket, total in spend.items()}
+    return claimed, spend
@@ -0,0 +1,157 @@
+from bisect import bisect_right
+from functools import lru_cache
+import numpy as np
+
+# Slab definitions per fiscal year and regime.
+#
+# Each regime lists its standard deduction, slabs as (lower bound, rate)
+# pairs, an optional section 87A rebate, surcharge bands as (taxable income
+# above, rate) pairs and the health & education cess. Adding a year means
+# adding an entry here; no code changes.
+#
+# 2024-25 reproduces the figures the calculator has always returned, so it
+# carries no rebate or surcharge. Marginal relief on surcharge is not modelled.
+
+DEFAULT_FISCAL_YEAR = '2024-25'
+
+TAX_RULES = {
+    '2024-25': {
+        'old': {
+            'standard_deduction': 50000,
+            'slabs': [(0, 0.0), (250000, 0.05), (500000, 0.20), (1000000, 0.30)],
+            'rebate': None,
+            'surcharge': [],
+            'cess': 0.04,
+        },
+        'new': {
+            'standard_deduction': 75000,
+            'slabs': [(0, 0.0), (300000, 0.05), (700000, 0.10), (1000000, 0.15),
+                      (1200000, 0.20), (1500000, 0.30)],
+            'rebate': None,
+            'surcharge': [],
+            'cess': 0.04,
+        },
+    },
+    '2025-26': {
+        'old': {
+            'standard_deduction': 50000,
+            'slabs': [(0, 0.0), (250000, 0.05), (500000, 0.20), (1000000, 0.30)],
+            'rebate': {'max_taxable_income': 500000, 'max_rebate': 12500},
+            'surcharge': [(5000000, 0.10), (10000000, 0.15), (20000000, 0.25), (50000000, 0.37)],
+            'cess': 0.04,
+        },
+        'new': {
+            'standard_deduction': 75000,
+            'slabs': [(0, 0.0), (400000, 0.05), (800000, 0.10), (1200000, 0.15),
+                      (1600000, 0.20), (2000000, 0.25), (2400000, 0.30)],
+            'rebate': {'max_taxable_income': 1200000, 'max_rebate': 60000},
+            'surcharge': [(5000000, 0.10), (10000000, 0.15), (20000000, 0.25)],
+            'cess': 0.04,
+        },
+    },
+}
+
+REGIMES = ('old', 'new')
+
+class UnknownTaxRules(ValueError):
+    pass
+
+class CompiledRegime:
+    """
+    One regime of one fiscal year, compiled into sorted threshold arrays
+    with the cumulative tax at each threshold, so the tax for an income is a
+    binary search plus one multiply-add.
+    """
+
+    __slots__ = ('fiscal_year', 'regime', 'standard_deduction', 'thresholds', 'rates', 'base',
+                 'rebate_limit', 'rebate_max', 'surcharge_thresholds', 'surcharge_rates', 'cess',
+                 '_thresholds_list', '_surcharge_list')
+
+    def __init__(self, fiscal_year, regime, definition):
+        slabs = sorted(definition['slabs'])
+        if not slabs or slabs[0][0] != 0:
+            raise ValueError(f"{fiscal_year} {regime}: slabs must start at 0")
+        self.fiscal_year = fiscal_year
+        self.regime = regime
+        self.standard_deduction = float(definition.get('standard_deduction', 0))
+        self.thresholds = np.array([lower for lower, _ in slabs], dtype=np.float64)
+        self.rates = np.array([rate for _, rate in slabs], dtype=np.float64)
+        # base[i] = tax payable on an income of exactly thresholds[i].
+        self.base = np.concatenate(([0.0], np.cumsum(np.diff(self.thresholds) * self.rates[:-1])))
+
+        rebate = definition.get('rebate') or {}
+        self.rebate_limit = float(rebate.get('max_taxable_income', -1))
+        self.rebate_max = float(rebate.get('max_rebate', 0))
+
+        bands = sorted(definition.get('surcharge') or [])
+        self.surcharge_thresholds = np.array([0.0] + [above for above, _ in bands], dtype=np.float64)
+        self.surcharge_rates = np.array([0.0] + [rate for _, rate in bands], dtype=np.float64)
+        self.cess = float(definition.get('cess', 0))
+
+        self._thresholds_list = self.thresholds.tolist()
+        self._surcharge_list = self.surcharge_thresholds.tolist()
+
+    def tax_array(self, taxable_income):
+        """
+        Total tax (including rebate, surcharge and cess) for an array of
+        taxable incomes, rounded to paise.
+        """
+        taxable = np.maximum(np.asarray(taxable_income, dtype=np.float64), 0.0)
+        index = np.searchsorted(self.thresholds, taxable, side='right') - 1
+        tax = self.base[index] + (taxable - self.thresholds[index]) * self.rates[index]
+        if self.rebate_max:
+            tax = np.where(taxable <= self.rebate_limit, np.maximum(tax - self.rebate_max, 0.0), tax)
+        if len(self.surcharge_thresholds) > 1:
+            # Income exactly at a band boundary stays in the lower band.
+            band = np.searchsorted(self.surcharge_thresholds, taxable, side='left') - 1
+            tax = tax * (1 + self.surcharge_rates[np.maximum(band, 0)])
+        return np.round(tax * (1 + self.cess), 2)
+
+    def tax(self, taxable_income):
+        """
+        Scalar version of tax_array, without NumPy overhead.
+        """
+        taxable = max(float(taxable_income), 0.0)
+        index = bisect_right(self._thresholds_list, taxable) - 1
+        tax = float(self.base[index]) + (taxable - self._thresholds_list[index]) * float(self.rates[index])
+        if self.rebate_max and taxable <= self.rebate_limit:
+            tax = max(tax - self.rebate_max, 0.0)
+        if len(self._surcharge_list) > 1:
+            band = max(0, bisect_right(self._surcharge_list, taxable - 1e-9) - 1)
+            tax *= 1 + float(self.surcharge_rates[band])
+        return round(tax * (1 + self.cess), 2)
+
+def get_rules(fiscal_year=DEFAULT_FISCAL_YEAR, regime='new'):
+    """
+    Returns the CompiledRegime for a fiscal year, compiling it on first use.
+    Raises UnknownTaxRules for years or regimes that are not defined.
+    """
+    # Both come straight from request bodies; anything but a string (a
+    # list, say) would fail in the cache lookup with a TypeError.
+    if not isinstance(fiscal_year, str) or not isinstance(regime, str):
+        raise UnknownTaxRules(
+            f"Fiscal year and regime must be strings. Available: {', '.join(supported_fiscal_years())}."
+        )
+    return _compiled_rules(fiscal_year, regime)
+
+@lru_cache(maxsize=None)
+def _compiled_rules(fiscal_year, regime):
+    try:
+        definition = TAX_RULES[fiscal_year][regime]
+    except KeyError:
+        raise UnknownTaxRules(
+            f"No tax rules for fiscal year '{fiscal_year}' ({regime} regime). "
+            f"Available: {', '.join(supported_fiscal_years())}."
+        )
+    return CompiledRegime(fiscal_year, regime, definition)
+
+def supported_fiscal_years():
+    return sorted(TAX_RULES)
+
+def compile_all():
+    """
+    Compiles every defined year up front (called from TaxApiConfig.ready).
+    """
+    for fiscal_year in TAX_RULES:
+        for regime in REGIMES:
+            get_rules(fiscal_year, regime)
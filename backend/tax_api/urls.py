@@ -1,6 +1,10 @@
 from django.urls import path
-from .views import calculate_tax
+from .views import calculate_tax, calculate_tax_batch, calculate_tax_sweep, estimate_tax_from_transactions, get_tax_years
 
 urlpatterns = [
     path('calculate-tax/', calculate_tax, name='calculate_tax'),
+    path('calculate-tax/batch/', calculate_tax_batch, name='calculate_tax_batch'),
+    path('calculate-tax/sweep/', calculate_tax_sweep, name='calculate_tax_sweep'),
+    path('calculate-tax/years/', get_tax_years, name='tax_years'),
+    path('calculate-tax/from-transactions/', estimate_tax_from_transactions, name='tax_from_transactions'),
 ]
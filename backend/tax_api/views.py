@@ -1,47 +1,25 @@
+from django.core.cache import cache
+from django.db import connection
 from rest_framework.response import Response
 from rest_framework.decorators import api_view
 import math
+from accounts.data_version import conditional_on_data_version, get_data_version
+from accounts.tokens import resolve_token_from_request
+from archive.reads import archived_expenses
+from .deductions import CATEGORY_DEDUCTIONS, deductions_from_spend, fiscal_year_range
+from .batch import DEDUCTION_FIELDS, MAX_SCENARIOS, evaluate_scenarios, sweep_deductions
+from .slabs import DEFAULT_FISCAL_YEAR, UnknownTaxRules, get_rules, supported_fiscal_years
 
 # Old Tax Regime Calculation
-def calculate_old_regime_tax(gross_income, deductions):
-    standard_deduction = 50000
-    total_deductions = standard_deduction + sum(deductions.values())
-    taxable_income = max(0, gross_income - total_deductions)
-
-    tax = 0
-    if taxable_income <= 250000:
-        tax = 0
-    elif taxable_income <= 500000:
-        tax = (taxable_income - 250000) * 0.05
-    elif taxable_income <= 1000000:
-        tax = 12500 + (taxable_income - 500000) * 0.20
-    else:
-        tax = 12500 + 100000 + (taxable_income - 1000000) * 0.30
-
-    cess = tax * 0.04
-    return round(tax + cess, 2)
+def calculate_old_regime_tax(gross_income, deductions, fiscal_year=DEFAULT_FISCAL_YEAR):
+    rules = get_rules(fiscal_year, 'old')
+    taxable_income = max(0, gross_income - rules.standard_deduction - sum(deductions.values()))
+    return rules.tax(taxable_income)
 
 # New Tax Regime Calculation
-def calculate_new_regime_tax(gross_income):
-    standard_deduction = 75000
-    taxable_income = gross_income - standard_deduction
-
-    tax = 0
-    if taxable_income <= 300000:
-        tax = 0
-    elif taxable_income <= 700000:
-        tax = (taxable_income - 300000) * 0.05
-    elif taxable_income <= 1000000:
-        tax = 20000 + (taxable_income - 700000) * 0.10
-    elif taxable_income <= 1200000:
-        tax = 20000 + 30000 + (taxable_income - 1000000) * 0.15
-    elif taxable_income <= 1500000:
-        tax = 20000 + 30000 + 30000 + (taxable_income - 1200000) * 0.20
-    else:
-        tax = 20000 + 30000 + 30000 + 60000 + (taxable_income - 1500000) * 0.30
-
-    cess = tax * 0.04
-    return round(tax + cess, 2)
+def calculate_new_regime_tax(gross_income, fiscal_year=DEFAULT_FISCAL_YEAR):
+    rules = get_rules(fiscal_year, 'new')
+    return rules.tax(gross_income - rules.standard_deduction)
 
 # API View
 @api_view(['POST'])
@@ -58,11 +36,156 @@ def calculate_tax(request):
         "NPS": float(data.get('nps_contribution', 0)),
     }
 
-    old_tax = calculate_old_regime_tax(gross_income, deductions)
-    new_tax = calculate_new_regime_tax(gross_income)
+    fiscal_year = data.get('fiscal_year') or DEFAULT_FISCAL_YEAR
+    try:
+        old_tax = calculate_old_regime_tax(gross_income, deductions, fiscal_year)
+        new_tax = calculate_new_regime_tax(gross_income, fiscal_year)
+    except UnknownTaxRules as e:
+        return Response({"error": str(e)}, status=400)
 
     return Response({
+        "fiscal_year": fiscal_year,
         "Old Regime Tax": old_tax,
         "New Regime Tax": new_tax,
         "Recommended Regime": "New" if new_tax < old_tax else "Old" if old_tax>new_tax else"Zero Tax"
     })
+
+@api_view(['POST'])
+def calculate_tax_batch(request):
+    """
+    Evaluates many calculate_tax scenarios in one request.
+    Expects: {"scenarios": [{"gross_income": ..., "deduction_80c": ..., ...}, ...],
+              "fiscal_year": "2024-25"   (optional; a scenario may set its own)}
+    Returns the per-scenario results in the same order and shape as calculate_tax.
+    """
+    scenarios = request.data.get('scenarios')
+    if not isinstance(scenarios, list) or not scenarios:
+        return Response({"error": "'scenarios' must be a non-empty list."}, status=400)
+    if len(scenarios) > MAX_SCENARIOS:
+        return Response({"error": f"At most {MAX_SCENARIOS} scenarios per request."}, status=400)
+    if not all(isinstance(scenario, dict) for scenario in scenarios):
+        return Response({"error": "Each scenario must be an object."}, status=400)
+    try:
+        results = evaluate_scenarios(scenarios, request.data.get('fiscal_year') or DEFAULT_FISCAL_YEAR)
+    except UnknownTaxRules as e:
+        return Response({"error": str(e)}, status=400)
+    except (TypeError, ValueError):
+        return Response({"error": "Scenario values must be numeric."}, status=400)
+    return Response({"results": results})
+
+@api_view(['POST'])
+def calculate_tax_sweep(request):
+    """
+    Finds the deduction mix with the lowest old-regime tax.
+    Expects:
+    {
+      "gross_income": 1800000,
+      "options": {"deduction_80c": [0, 50000, 150000], "nps_contribution": [0, 50000], ...},
+      "max_total_deduction": 175000,   (optional)
+      "fiscal_year": "2025-26"         (optional)
+    }
+    """
+    data = request.data
+    options = data.get('options') or {}
+    if not isinstance(options, dict) or any(not isinstance(values, list) or not values for values in options.values()):
+        return Response({"error": "'options' must map deduction fields to non-empty lists."}, status=400)
+    unknown = [field for field in options if field not in DEDUCTION_FIELDS.values()]
+    if unknown:
+        return Response({"error": f"Unknown deduction field(s): {', '.join(unknown)}."}, status=400)
+    try:
+        gross_income = float(data.get('gross_income', 0))
+        max_total = data.get('max_total_deduction')
+        max_total = float(max_total) if max_total is not None else None
+        result = sweep_deductions(gross_income, options, max_total,
+                                  data.get('fiscal_year') or DEFAULT_FISCAL_YEAR)
+    except (TypeError, ValueError) as e:
+        return Response({"error": str(e)}, status=400)
+    return Response(result)
+
+@api_view(['GET'])
+def get_tax_years(request):
+    """
+    Lists the fiscal years calculate_tax can be asked for.
+    """
+    return Response({
+        "default": DEFAULT_FISCAL_YEAR,
+        "fiscal_years": supported_fiscal_years(),
+    })
+
+# Estimates are cached per user data version, so any new or deleted expense
+# invalidates them without explicit cache deletes.
+ESTIMATE_CACHE_TIMEOUT = 24 * 60 * 60
+
+def fetch_spend_by_category(user_id, start, end, include_archived=False):
+    """
+    Totals the user's expenses in deduction-relevant categories over
+    [start, end) with one grouped query on the (user_id, date) index, plus
+    archived months when include_archived is set.
+    """
+    names = list(CATEGORY_DEDUCTIONS)
+    placeholders = ", ".join(["%s"] * len(names))
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            SELECT c.name, SUM(e.amount)
+            FROM expense e
+            JOIN categories c ON e.category_id = c.category_id
+            WHERE e.user_id = %s
+              AND e.date >= %s
+              AND e.date < %s
+              AND UPPER(c.name) IN ({placeholders})
+            GROUP BY c.name
+        """, [user_id, start, end] + names)
+        spend = dict(cursor.fetchall())
+    if include_archived:
+        for _, category, _, amount, _, _ in archived_expenses(user_id, start, end):
+            if category and category.upper() in names:
+                spend[category] = float(spend.get(category) or 0) + float(amount)
+    return spend
+
+@api_view(['GET'])
+@conditional_on_data_version
+def estimate_tax_from_transactions(request):
+    """
+    Estimates tax for a fiscal year using the user's recorded expenses as
+    deductions (e.g. insurance -> 80D, donations -> 80G).
+    Expects:
+      - Token (in the Authorization header or as a query parameter 'token')
+      - gross_income (query parameter)
+      - fiscal_year (optional query parameter, e.g. "2024-25")
+      - include_archived (optional, 'true' to count months moved to the archive)
+    """
+    user_id = resolve_token_from_request(request)
+    if user_id is None:
+        return Response({"error": "Token is required or is invalid."}, status=400)
+
+    fiscal_year = request.query_params.get('fiscal_year') or DEFAULT_FISCAL_YEAR
+    include_archived = (request.query_params.get('include_archived') or '').lower() in ('1', 'true', 'yes')
+    try:
+        gross_income = float(request.query_params.get('gross_income', 0))
+        start, end = fiscal_year_range(fiscal_year)
+        get_rules(fiscal_year, 'old')
+    except (TypeError, ValueError) as e:
+        return Response({"error": str(e) or "gross_income must be numeric."}, status=400)
+
+    version, _ = get_data_version(user_id)
+    cache_key = f"tax_estimate:{user_id}:{version}:{fiscal_year}:{gross_income}:{include_archived}"
+    result = cache.get(cache_key)
+    if result is None:
+        try:
+            spend_by_category = fetch_spend_by_category(user_id, start, end, include_archived)
+        except Exception as e:
+            return Response({"error": f"An error occurred: {str(e)}"}, status=500)
+        claimed, spend = deductions_from_spend(spend_by_category)
+        old_tax = calculate_old_regime_tax(gross_income, claimed, fiscal_year)
+        new_tax = calculate_new_regime_tax(gross_income, fiscal_year)
+        result = {
+            "fiscal_year": fiscal_year,
+            "gross_income": gross_income,
+            "deductions": claimed,
+            "eligible_spend": spend,
+            "Old Regime Tax": old_tax,
+            "New Regime Tax": new_tax,
+            "Recommended Regime": "New" if new_tax < old_tax else "Old" if old_tax > new_tax else "Zero Tax",
+        }
+        cache.set(cache_key, result, ESTIMATE_CACHE_TIMEOUT)
+    return Response(result)
@@ -0,0 +1,139 @@
+import csv
+import io
+import zlib
+from datetime import datetime
+from decimal import Decimal
+from itertools import islice
+from archive.reads import archived_search_rows, merge_newest_first
+from .search import iter_expense_rows
+
+# Streaming exports for /api/expenses/export/.
+#
+# Rows are pulled in keyset chunks (search.iter_expense_rows) and encoded
+# chunk by chunk, so an export of any size holds at most one chunk of rows
+# plus one encoded chunk in memory. Parquet needs pyarrow, which is optional:
+# without it the endpoint only offers CSV.
+
+COLUMNS = ('expense_id', 'date', 'category', 'amount', 'payment_method', 'description')
+EXPORT_FORMATS = ('csv', 'parquet')
+CHUNK_SIZE = 5000
+
+class ExportUnavailable(Exception):
+    pass
+
+def _as_datetime(value):
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value))
+
+def _csv_row(row):
+    expense_id, category, dt, amount, payment_method, description = row
+    return [expense_id, _as_datetime(dt).strftime("%Y-%m-%d %H:%M:%S"), category, amount,
+            payment_method or '', description or '']
+
+def row_chunks(user_id, filters, chunk_size=CHUNK_SIZE):
+    """
+    iter_expense_rows, with archived rows merged in when the filters ask
+    for include_archived.
+    """
+    chunks = iter_expense_rows(user_id, filters, chunk_size)
+    if not filters.get('include_archived'):
+        yield from chunks
+        return
+    rows = merge_newest_first((row for chunk in chunks for row in chunk), archived_search_rows(user_id, filters))
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def csv_chunks(user_id, filters, chunk_size=CHUNK_SIZE):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+    for rows in row_chunks(user_id, filters, chunk_size):
+        writer.writerows(_csv_row(row) for row in rows)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+def gzip_chunks(chunks):
+    # wbits=31 writes a gzip header and trailer around the deflate stream.
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+class _DrainingSink(io.RawIOBase):
+    """
+    Write-only file object that keeps only the bytes written since the last
+    drain(), so ParquetWriter output can be streamed out row group by row group.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._buffer += data
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+def parquet_schema():
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ExportUnavailable("Parquet export requires pyarrow to be installed on the server.")
+    return pa.schema([
+        ('expense_id', pa.int64()),
+        ('date', pa.timestamp('s')),
+        ('category', pa.string()),
+        ('amount', pa.decimal128(12, 2)),
+        ('payment_method', pa.string()),
+        ('description', pa.string()),
+    ])
+
+def parquet_chunks(user_id, filters, schema, chunk_size=CHUNK_SIZE):
+    """
+    Writes one Parquet row group per chunk of rows. `schema` comes from
+    parquet_schema(), called before streaming starts so a missing pyarrow is
+    reported as an error response rather than a truncated download.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink = _DrainingSink()
+    writer = pq.ParquetWriter(sink, schema, compression='zstd')
+    try:
+        for rows in row_chunks(user_id, filters, chunk_size):
+            columns = list(zip(*rows))
+            batch = pa.record_batch([
+                pa.array(columns[0], pa.int64()),
+                pa.array([_as_datetime(value) for value in columns[2]], pa.timestamp('s')),
+                pa.array(columns[1], pa.string()),
+                pa.array([Decimal(str(value)).quantize(Decimal('0.01')) for value in columns[3]], pa.decimal128(12, 2)),
+                pa.array(columns[4], pa.string()),
+                pa.array(columns[5], pa.string()),
+            ], schema=schema)
+            writer.write_batch(batch)
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
@@ -0,0 +1,126 @@
+import base64
+import re
+from datetime import datetime, timedelta
+from django.db import connection
+
+# Expense search and keyset pagination.
+#
+# Pages are ordered by (date, expense_id) descending and continue from an
+# opaque cursor holding the last row's key, so fetching page N costs the same
+# as page 1: the (user_id, date) index is walked from the cursor onwards and
+# stops after `limit` rows. Text matching goes through the FULLTEXT (MySQL)
+# or FTS5 (SQLite) index created by transactions migration 0002.
+
+class InvalidCursor(ValueError):
+    pass
+
+def encode_cursor(dt, expense_id):
+    raw = f"{_as_datetime(dt).isoformat(' ')}|{expense_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """
+    Returns (datetime, expense_id) from a cursor made by encode_cursor.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        dt, expense_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(dt), int(expense_id)
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursor("Invalid cursor.")
+
+def keyset_condition(cursor):
+    """
+    SQL fragment and params restricting rows to those after the cursor in
+    (date DESC, expense_id DESC) order.
+    """
+    dt, expense_id = decode_cursor(cursor)
+    return "(e.date < %s OR (e.date = %s AND e.expense_id < %s))", [dt, dt, expense_id]
+
+def _as_datetime(value):
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value))
+
+def text_terms(q):
+    # Quote each term so user input cannot inject boolean / FTS operators.
+    return [term.replace('"', '') for term in re.split(r'\s+', q.strip()) if term.replace('"', '')]
+
+def text_condition(q):
+    terms = text_terms(q)
+    if not terms:
+        return None, []
+    if connection.vendor == 'mysql':
+        return "MATCH(e.description) AGAINST (%s IN BOOLEAN MODE)", [' '.join(f'+"{term}"' for term in terms)]
+    return ("e.expense_id IN (SELECT rowid FROM expense_fts WHERE expense_fts MATCH %s)",
+            [' '.join(f'"{term}"' for term in terms)])
+
+def build_search_query(user_id, filters):
+    """
+    Returns (sql, params) for one page of the user's expenses matching the
+    validated ExpenseSearchSerializer data. One extra row is fetched so the
+    caller can tell whether another page exists.
+    """
+    conditions = ["e.user_id = %s"]
+    params = [user_id]
+
+    if filters.get('q'):
+        condition, condition_params = text_condition(filters['q'])
+        if condition:
+            conditions.append(condition)
+            params.extend(condition_params)
+    if filters.get('min_amount') is not None:
+        conditions.append("e.amount >= %s")
+        params.append(filters['min_amount'])
+    if filters.get('max_amount') is not None:
+        conditions.append("e.amount <= %s")
+        params.append(filters['max_amount'])
+    if filters.get('payment_method'):
+        conditions.append("e.payment_method = %s")
+        params.append(filters['payment_method'])
+    if filters.get('categories'):
+        conditions.append(f"c.name IN ({', '.join(['%s'] * len(filters['categories']))})")
+        params.extend(filters['categories'])
+    # Plain ranges on e.date so the (user_id, date) index applies.
+    if filters.get('start_date'):
+        conditions.append("e.date >= %s")
+        params.append(datetime.combine(filters['start_date'], datetime.min.time()))
+    if filters.get('end_date'):
+        conditions.append("e.date < %s")
+        params.append(datetime.combine(filters['end_date'] + timedelta(days=1), datetime.min.time()))
+    if filters.get('cursor'):
+        condition, condition_params = keyset_condition(filters['cursor'])
+        conditions.append(condition)
+        params.extend(condition_params)
+
+    sql = f"""
+        SELECT e.expense_id, c.name AS category, e.date, e.amount, e.payment_method, e.description
+        FROM expense e
+        JOIN categories c ON e.category_id = c.category_id
+        WHERE {' AND '.join(conditions)}
+        ORDER BY e.date DESC, e.expense_id DESC
+        LIMIT %s
+    """
+    params.append(filters['limit'] + 1)
+    return sql, params
+
+def iter_expense_rows(user_id, filters, chunk_size=5000):
+    """
+    Yields lists of up to chunk_size rows covering every expense matching
+    `filters`, newest first. Each chunk is its own short keyset query, so
+    memory stays bounded and no long-running statement holds the table.
+    """
+    filters = dict(filters, limit=chunk_size, cursor=filters.get('cursor'))
+    while True:
+        query, params = build_search_query(user_id, filters)
+        with connection.cursor() as cursor:
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+        if not rows:
+            return
+        has_more = len(rows) > chunk_size
+        rows = rows[:chunk_size]
+        yield rows
+        if not has_more:
+            return
+        filters['cursor'] = encode_cursor(rows[-1][2], rows[-1][0])
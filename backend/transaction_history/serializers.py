@@ -0,0 +1,42 @@
+from rest_framework import serializers
+
+# Page size bounds for /api/expenses/search/.
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+class ExpenseSearchSerializer(serializers.Serializer):
+    q = serializers.CharField(required=False, allow_blank=True, max_length=200)
+    min_amount = serializers.DecimalField(required=False, max_digits=12, decimal_places=2)
+    max_amount = serializers.DecimalField(required=False, max_digits=12, decimal_places=2)
+    payment_method = serializers.CharField(required=False, allow_blank=True, max_length=100)
+    categories = serializers.CharField(required=False, allow_blank=True)
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+    cursor = serializers.CharField(required=False, allow_blank=True)
+    limit = serializers.IntegerField(required=False, min_value=1, max_value=MAX_PAGE_SIZE,
+                                     default=DEFAULT_PAGE_SIZE)
+    # Also read months moved to the archive (archive app); slower.
+    include_archived = serializers.BooleanField(required=False, default=False)
+
+    def validate_categories(self, value):
+        return [name.strip() for name in value.split(',') if name.strip()]
+
+    def validate(self, data):
+        if data.get('min_amount') is not None and data.get('max_amount') is not None \
+                and data['min_amount'] > data['max_amount']:
+            raise serializers.ValidationError("min_amount cannot be greater than max_amount.")
+        if data.get('start_date') and data.get('end_date') and data['start_date'] > data['end_date']:
+            raise serializers.ValidationError("start_date cannot be after end_date.")
+        return data
+
+class ExpenseExportSerializer(ExpenseSearchSerializer):
+    # Not 'format': DRF reserves that query parameter for renderer selection.
+    file_format = serializers.ChoiceField(choices=('csv', 'parquet'), default='csv')
+    gzip = serializers.BooleanField(required=False, default=False)
+
+    def validate(self, data):
+        data = super().validate(data)
+        # Exports always start from the newest row and run to the end.
+        data.pop('cursor', None)
+        data.pop('limit', None)
+        return data
@@ -1,8 +1,10 @@
 from django.urls import path
-from .views import delete_expense, get_categories, get_expenses
+from .views import delete_expense, get_categories, export_expenses, get_expenses, search_expenses
 
 urlpatterns = [
     path('expenses/', get_expenses, name='get_expenses'),
+    path('expenses/search/', search_expenses, name='search_expenses'),
+    path('expenses/export/', export_expenses, name='export_expenses'),
      path('expenses/<int:expense_id>/', delete_expense, name='delete_expense'),
     path('categories/', get_categories, name='get_categories'),
 ]
@@ -1,8 +1,18 @@
-from datetime import datetime
+from datetime import datetime, timedelta
+from itertools import islice
 from django.db import connection
+from django.http import StreamingHttpResponse
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
+from accounts.tokens import resolve_token, resolve_token_from_request
+from accounts.data_version import bump_data_version, conditional_on_data_version
+from Trackex.routers import read_connection
+from forecast.engine import record_expense
+from archive.reads import archived_expenses, archived_search_rows, merge_newest_first
+from .search import InvalidCursor, build_search_query, encode_cursor
+from .export import ExportUnavailable, csv_chunks, gzip_chunks, parquet_chunks, parquet_schema
+from .serializers import ExpenseExportSerializer, ExpenseSearchSerializer
 
 # Utility function to execute SQL queries.
 def execute_query(query, params=None, fetch_one=False):
@@ -12,7 +22,28 @@ def execute_query(query, params=None, fetch_one=False):
             return cursor.fetchone()
         return None
 
+# Turns an (expense_id, category, date, amount, payment_method, description)
+# row into the response shape shared by the expense listing endpoints.
+def format_expense_row(row):
+    expense_id, category_name, dt, amount, payment_method, description = row
+    # Ensure dt is a datetime object.
+    if not isinstance(dt, datetime):
+        try:
+            dt = datetime.strptime(str(dt), "%Y-%m-%d %H:%M:%S")
+        except Exception:
+            dt = datetime.now()
+    return {
+        'expense_id': expense_id,
+        'category': category_name,
+        'date': dt.strftime("%Y-%m-%d"),
+        'time': dt.strftime("%H:%M:%S"),
+        'amount': amount,
+        'payment_method': payment_method,
+        'description': description,
+    }
+
 @api_view(['GET'])
+@conditional_on_data_version
 def get_expenses(request):
     """
     Retrieves expenses for the authenticated user.
@@ -20,6 +51,7 @@ def get_expenses(request):
       - start_date (YYYY-MM-DD)
       - end_date (YYYY-MM-DD)
       - category (e.g., "Food", "Groceries", etc.; use 'All' for no filter)
+      - include_archived ('true' to include months moved to the archive)
     """
     token = request.headers.get('Authorization') or request.GET.get('token')
     if not token:
@@ -29,14 +61,14 @@ def get_expenses(request):
     
     try:
         # Validate token and get user_id.
-        user_token = execute_query("SELECT user_id FROM user_token WHERE token = %s", [token], fetch_one=True)
-        if not user_token:
+        user_id = resolve_token(token)
+        if user_id is None:
             return Response({'error': 'Invalid token'}, status=status.HTTP_401_UNAUTHORIZED)
-        user_id = user_token[0]
 
         start_date = request.GET.get("start_date")
         end_date = request.GET.get("end_date")
         category = request.GET.get("category")
+        include_archived = (request.GET.get("include_archived") or '').lower() in ('1', 'true', 'yes')
         
         # Build dynamic SQL conditions.
         conditions = ["e.user_id = %s"]
@@ -60,36 +92,114 @@ def get_expenses(request):
             ORDER BY e.date DESC, e.expense_id DESC
         """
         
-        with connection.cursor() as cursor:
+        with read_connection(user_id).cursor() as cursor:
             cursor.execute(expense_query, params)
             rows = cursor.fetchall()
+
+        if include_archived:
+            start = datetime.strptime(start_date, "%Y-%m-%d") if start_date else None
+            end = datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1) if end_date else None
+            archived = [row for row in archived_expenses(user_id, start, end)
+                        if not category or category.lower() == "all" or row[1] == category]
+            rows = list(merge_newest_first(rows, archived))
         
-        results = []
-        for row in rows:
-            expense_id, category_name, dt, amount, payment_method, description = row
-            # Ensure dt is a datetime object.
-            if not isinstance(dt, datetime):
-                try:
-                    dt = datetime.strptime(str(dt), "%Y-%m-%d %H:%M:%S")
-                except Exception:
-                    dt = datetime.now()
-            date_str = dt.strftime("%Y-%m-%d")
-            time_str = dt.strftime("%H:%M:%S")
-            results.append({
-                'expense_id': expense_id,
-                'category': category_name,
-                'date': date_str,
-                'time': time_str,
-                'amount': amount,
-                'payment_method': payment_method,
-                'description': description,
-            })
+        results = [format_expense_row(row) for row in rows]
         
         return Response(results, status=status.HTTP_200_OK)
     
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+@api_view(['GET'])
+@conditional_on_data_version
+def search_expenses(request):
+    """
+    Searches the authenticated user's expenses, newest first.
+    Expects (all optional, as query parameters):
+      - q: words to match in the description
+      - min_amount / max_amount
+      - payment_method
+      - categories: comma-separated category names
+      - start_date / end_date (YYYY-MM-DD)
+      - limit: page size (default 50, max 200)
+      - cursor: next_cursor from the previous page
+      - include_archived: 'true' to also search months moved to the archive
+    """
+    user_id = resolve_token_from_request(request)
+    if user_id is None:
+        return Response({'error': 'Invalid or missing token'}, status=status.HTTP_401_UNAUTHORIZED)
+
+    serializer = ExpenseSearchSerializer(data=request.GET)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    filters = serializer.validated_data
+
+    try:
+        query, params = build_search_query(user_id, filters)
+    except InvalidCursor as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        with read_connection(user_id).cursor() as cursor:
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+        if filters['include_archived']:
+            rows = list(islice(merge_newest_first(rows, archived_search_rows(user_id, filters)),
+                               filters['limit'] + 1))
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    limit = filters['limit']
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][2], rows[-1][0])
+    return Response({
+        'results': [format_expense_row(row) for row in rows],
+        'next_cursor': next_cursor,
+    }, status=status.HTTP_200_OK)
+
+@api_view(['GET'])
+@conditional_on_data_version
+def export_expenses(request):
+    """
+    Streams the authenticated user's expenses as a file download.
+    Expects (as query parameters):
+      - file_format: 'csv' (default) or 'parquet'
+      - gzip: 'true' to gzip a CSV export
+      - the same optional filters as /api/expenses/search/ (q, min_amount,
+        max_amount, payment_method, categories, start_date, end_date,
+        include_archived)
+    """
+    user_id = resolve_token_from_request(request)
+    if user_id is None:
+        return Response({'error': 'Invalid or missing token'}, status=status.HTTP_401_UNAUTHORIZED)
+
+    serializer = ExpenseExportSerializer(data=request.GET)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    filters = dict(serializer.validated_data)
+    export_format = filters.pop('file_format')
+    compress = filters.pop('gzip')
+
+    filename = f"expenses-{datetime.now():%Y%m%d}"
+    if export_format == 'parquet':
+        try:
+            schema = parquet_schema()
+        except ExportUnavailable as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        response = StreamingHttpResponse(parquet_chunks(user_id, filters, schema),
+                                         content_type='application/vnd.apache.parquet')
+        filename += '.parquet'
+    elif compress:
+        response = StreamingHttpResponse(gzip_chunks(csv_chunks(user_id, filters)), content_type='application/gzip')
+        filename += '.csv.gz'
+    else:
+        response = StreamingHttpResponse(csv_chunks(user_id, filters), content_type='text/csv; charset=utf-8')
+        filename += '.csv'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
 @api_view(['DELETE'])
 def delete_expense(request, expense_id):
     """
@@ -103,16 +213,25 @@ def delete_expense(request, expense_id):
     
     try:
         # Validate token.
-        user_token = execute_query("SELECT user_id FROM user_token WHERE token = %s", [token], fetch_one=True)
-        if not user_token:
+        user_id = resolve_token(token)
+        if user_id is None:
             return Response({'error': 'Invalid token'}, status=status.HTTP_401_UNAUTHORIZED)
-        user_id = user_token[0]
         
         # Delete expense only if it belongs to the authenticated user.
         with connection.cursor() as cursor:
+            cursor.execute("SELECT category_id, amount, date FROM expense WHERE expense_id = %s AND user_id = %s",
+                           [expense_id, user_id])
+            row = cursor.fetchone()
+            if row is None:
+                return Response({'error': 'Expense not found'}, status=status.HTTP_404_NOT_FOUND)
             cursor.execute("DELETE FROM expense WHERE expense_id = %s AND user_id = %s", [expense_id, user_id])
             if cursor.rowcount == 0:
                 return Response({'error': 'Expense not found'}, status=status.HTTP_404_NOT_FOUND)
+        bump_data_version(user_id)
+        category_id, amount, dt = row
+        if not isinstance(dt, datetime):
+            dt = datetime.strptime(str(dt)[:19], "%Y-%m-%d %H:%M:%S")
+        record_expense(user_id, category_id, -amount, dt)
         
         return Response({'message': 'Expense deleted successfully'}, status=status.HTTP_204_NO_CONTENT)
     
@@ -125,7 +244,7 @@ def get_categories(request):
     Retrieves a list of category names for a dropdown.
     """
     try:
-        with connection.cursor() as cursor:
+        with read_connection().cursor() as cursor:
             cursor.execute("SELECT name FROM categories ORDER BY name ASC")
             rows = cursor.fetchall()
         categories = [row[0] for row in rows]
@@ -0,0 +1,155 @@
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from archive.reads import archived_fingerprints
+from categorize.classifier import predict_categories
+from forecast.engine import record_expense
+from .statements import Fingerprinter, StatementError
+
+# Bulk import of parsed statement lines into expense.
+#
+# Lines are consumed in batches of STATEMENT_IMPORT_BATCH. Each batch is
+# fingerprinted, checked against the (user_id, fingerprint) index with one
+# IN query, and inserted with one executemany; the whole statement runs in a
+# single transaction, so a failed import leaves nothing behind. Progress is
+# written to the cache after every batch for the status endpoint to read.
+# Current-month amounts are totalled per category and applied to the spend
+# forecasts with one update each once the import has committed.
+#
+# Categories come from the keyword rules below, then from the trained
+# classifier (categorize.classifier), then from the caller's default.
+
+# Description keywords mapped to category names, checked in order.
+KEYWORD_CATEGORIES = (
+    (('swiggy', 'zomato', 'restaurant', 'cafe', 'dominos', 'pizza', 'kfc', 'mcdonald'), 'Food'),
+    (('bigbasket', 'dmart', 'blinkit', 'zepto', 'grofers', 'kirana', 'grocery', 'supermarket'), 'Groceries'),
+    (('pharmacy', 'apollo', 'hospital', 'clinic', 'medplus', 'diagnostic', '1mg', 'pharmeasy'), 'Healthcare'),
+    (('uber', 'ola', 'rapido', 'metro', 'irctc', 'petrol', 'fuel', 'fastag', 'indigo'), 'Transportation'),
+    (('electricity', 'broadband', 'airtel', 'jio', 'recharge', 'bescom', 'water bill', 'gas bill'), 'Utilities'),
+    (('udemy', 'coursera', 'school', 'college', 'tuition', 'books'), 'Education'),
+    (('netflix', 'spotify', 'hotstar', 'prime video', 'bookmyshow', 'pvr', 'inox'), 'Entertainment'),
+    (('neft', 'imps', 'rtgs', 'upi/p2p', 'transfer'), 'ACCOUNT TRANSFER'),
+)
+
+DESCRIPTION_MAX_LENGTH = 255
+
+def batch_size():
+    return getattr(settings, 'STATEMENT_IMPORT_BATCH', 1000)
+
+def new_import_id():
+    return uuid.uuid4().hex
+
+def _progress_key(user_id, import_id):
+    return f"statement_import:{user_id}:{import_id}"
+
+def get_progress(user_id, import_id):
+    return cache.get(_progress_key(user_id, import_id))
+
+def set_progress(user_id, import_id, progress):
+    cache.set(_progress_key(user_id, import_id), progress, timeout=60 * 60)
+
+def load_categories():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT category_id, name FROM categories")
+        return {name: category_id for category_id, name in cursor.fetchall()}
+
+def keyword_category(description):
+    lowered = (description or '').lower()
+    for keywords, category in KEYWORD_CATEGORIES:
+        if any(keyword in lowered for keyword in keywords):
+            return category
+    return None
+
+def _existing_fingerprints(cursor, user_id, fingerprints):
+    placeholders = ', '.join(['%s'] * len(fingerprints))
+    cursor.execute(
+        f"SELECT fingerprint FROM expense WHERE user_id = %s AND fingerprint IN ({placeholders})",
+        [user_id] + fingerprints
+    )
+    return {row[0] for row in cursor.fetchall()}
+
+def import_lines(user_id, lines, import_id, payment_method, default_category=None):
+    """
+    Inserts the debit lines from `lines` (StatementLine or StatementError
+    items) as expenses of `user_id`. Returns the final progress dict:
+    lines_read, inserted, duplicates, credits, uncategorized and errors
+    (the first few parse errors).
+    """
+    categories = load_categories()
+    if default_category is not None and default_category not in categories:
+        raise StatementError(f"Unknown category '{default_category}'.")
+
+    fingerprint = Fingerprinter()
+    progress = {
+        'import_id': import_id, 'status': 'running', 'lines_read': 0, 'inserted': 0,
+        'duplicates': 0, 'credits': 0, 'uncategorized': 0, 'error_count': 0, 'errors': [],
+    }
+    size = batch_size()
+    this_month = datetime.now().strftime("%Y-%m")
+    month_spend = {}
+
+    def flush(cursor, pending):
+        if not pending:
+            return
+        # Lines no keyword rule matched are categorized in one batched call.
+        unmatched = [i for i, (_, category, _) in enumerate(pending) if category is None]
+        predicted = predict_categories(
+            (pending[i][0].description, pending[i][0].amount, payment_method) for i in unmatched
+        )
+        for i, category in zip(unmatched, predicted):
+            pending[i] = (pending[i][0], category or default_category, pending[i][2])
+
+        rows = []
+        for line, category, line_fingerprint in pending:
+            if category not in categories:
+                progress['uncategorized'] += 1
+                continue
+            rows.append([
+                user_id, categories[category], line.amount, line.date.strftime("%Y-%m-%d %H:%M:%S"),
+                payment_method, line.description[:DESCRIPTION_MAX_LENGTH], line_fingerprint,
+            ])
+        if rows:
+            existing = _existing_fingerprints(cursor, user_id, [row[-1] for row in rows])
+            # Old statements can overlap months already moved to the archive.
+            existing |= archived_fingerprints(user_id, [row[3] for row in rows])
+            fresh = [row for row in rows if row[-1] not in existing]
+            progress['duplicates'] += len(rows) - len(fresh)
+            if fresh:
+                cursor.executemany("""
+                    INSERT INTO expense (user_id, category_id, amount, date, payment_method, description, fingerprint)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                """, fresh)
+                progress['inserted'] += len(fresh)
+                for row in fresh:
+                    if row[3].startswith(this_month):
+                        month_spend[row[1]] = month_spend.get(row[1], 0) + Decimal(str(row[2]))
+        set_progress(user_id, import_id, progress)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        pending = []
+        for line in lines:
+            progress['lines_read'] += 1
+            if isinstance(line, StatementError):
+                progress['error_count'] += 1
+                if len(progress['errors']) < 20:
+                    progress['errors'].append(str(line))
+                continue
+            if not line.amount:
+                progress['credits'] += 1
+                continue
+            # Fingerprint every debit in file order, categorized or not, so
+            # occurrence numbers stay stable across re-imports.
+            pending.append((line, keyword_category(line.description), fingerprint(line)))
+            if len(pending) >= size:
+                flush(cursor, pending)
+                pending = []
+        flush(cursor, pending)
+
+    for category_id, amount in month_spend.items():
+        record_expense(user_id, category_id, amount)
+    progress['status'] = 'completed'
+    set_progress(user_id, import_id, progress)
+    return progress
@@ -0,0 +1,23 @@
+from django.db import migrations
+
+# expense is created outside Django; this only adds the composite index that
+# per-user date-range queries (monthly totals, fiscal-year aggregates, recent
+# transactions) rely on.
+
+def add_index(apps, schema_editor):
+    schema_editor.execute("CREATE INDEX idx_expense_user_date ON expense (user_id, date)")
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute("DROP INDEX idx_expense_user_date ON expense")
+    else:
+        schema_editor.execute("DROP INDEX idx_expense_user_date")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = []
+
+    operations = [
+        migrations.RunPython(add_index, drop_index),
+    ]
@@ -0,0 +1,52 @@
+from django.db import migrations
+
+# Text index over expense.description for /api/expenses/search/.
+#
+# MySQL: an InnoDB FULLTEXT index with the ngram parser, so partial words and
+# non-space-delimited text match. SQLite (benchmarks, local development): an
+# external-content FTS5 table keyed by expense_id and kept in step with
+# triggers; the trigram tokenizer is the closest match to ngram.
+
+SQLITE_TRIGGERS = (
+    """CREATE TRIGGER expense_fts_insert AFTER INSERT ON expense BEGIN
+        INSERT INTO expense_fts (rowid, description) VALUES (new.expense_id, new.description);
+    END""",
+    """CREATE TRIGGER expense_fts_delete AFTER DELETE ON expense BEGIN
+        INSERT INTO expense_fts (expense_fts, rowid, description) VALUES ('delete', old.expense_id, old.description);
+    END""",
+    """CREATE TRIGGER expense_fts_update AFTER UPDATE OF description ON expense BEGIN
+        INSERT INTO expense_fts (expense_fts, rowid, description) VALUES ('delete', old.expense_id, old.description);
+        INSERT INTO expense_fts (rowid, description) VALUES (new.expense_id, new.description);
+    END""",
+)
+
+def add_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute("CREATE FULLTEXT INDEX ft_expense_description ON expense (description) WITH PARSER ngram")
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE expense_fts USING fts5("
+        "description, content='expense', content_rowid='expense_id', tokenize='trigram')"
+    )
+    for statement in SQLITE_TRIGGERS:
+        schema_editor.execute(statement)
+    schema_editor.execute("INSERT INTO expense_fts (expense_fts) VALUES ('rebuild')")
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute("DROP INDEX ft_expense_description ON expense")
+        return
+    for name in ('expense_fts_insert', 'expense_fts_delete', 'expense_fts_update'):
+        schema_editor.execute(f"DROP TRIGGER IF EXISTS {name}")
+    schema_editor.execute("DROP TABLE IF EXISTS expense_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0001_expense_user_date_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_index, drop_index),
+    ]
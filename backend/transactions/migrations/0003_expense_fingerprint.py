@@ -0,0 +1,28 @@
+from django.db import migrations
+
+# Statement imports store a fingerprint of each imported line on the expense
+# row; the unique (user_id, fingerprint) index is what makes re-importing an
+# overlapping statement a no-op. Rows added by hand keep a NULL fingerprint,
+# which the unique index ignores.
+
+def add_fingerprint(apps, schema_editor):
+    schema_editor.execute("ALTER TABLE expense ADD COLUMN fingerprint CHAR(40) NULL")
+    schema_editor.execute("CREATE UNIQUE INDEX uniq_expense_user_fingerprint ON expense (user_id, fingerprint)")
+
+def drop_fingerprint(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute("DROP INDEX uniq_expense_user_fingerprint ON expense")
+    else:
+        schema_editor.execute("DROP INDEX uniq_expense_user_fingerprint")
+    schema_editor.execute("ALTER TABLE expense DROP COLUMN fingerprint")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0002_expense_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_fingerprint, drop_fingerprint),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations
+
+# Payments record the ledger transfer (ledger.LedgerEntry.transfer_id) that
+# moved the money on their expense row. Batch payouts insert all their
+# expense rows in one statement and read the new ids back through the
+# (user_id, transfer_id) index. Other expenses keep a NULL transfer_id.
+
+def add_transfer_id(apps, schema_editor):
+    schema_editor.execute("ALTER TABLE expense ADD COLUMN transfer_id CHAR(32) NULL")
+    schema_editor.execute("CREATE INDEX idx_expense_user_transfer ON expense (user_id, transfer_id)")
+
+def drop_transfer_id(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute("DROP INDEX idx_expense_user_transfer ON expense")
+    else:
+        schema_editor.execute("DROP INDEX idx_expense_user_transfer")
+    schema_editor.execute("ALTER TABLE expense DROP COLUMN transfer_id")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0003_expense_fingerprint'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_transfer_id, drop_transfer_id),
+    ]
@@ -12,3 +12,18 @@ class ExpenseOutputSerializer(serializers.Serializer):
     description = serializers.CharField(max_length=255)  # Added description in the output
     amount = serializers.DecimalField(max_digits=10, decimal_places=2)
     date = serializers.DateField()
+
+class StatementImportSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    statement_format = serializers.ChoiceField(choices=('csv', 'ofx'), required=False)
+    date_format = serializers.CharField(required=False, max_length=32)
+    debit_sign = serializers.ChoiceField(choices=('negative', 'positive'), default='negative')
+    default_category = serializers.CharField(required=False, max_length=100)
+    payment_method = serializers.CharField(required=False, max_length=100, default='Bank Statement')
+    import_id = serializers.RegexField(r'^[0-9a-f]{32}$', required=False)
+
+    def validate(self, data):
+        if 'statement_format' not in data:
+            name = data['file'].name.lower()
+            data['statement_format'] = 'ofx' if name.endswith(('.ofx', '.qfx')) else 'csv'
+        return data
@@ -0,0 +1,224 @@
+import codecs
+import csv
+import hashlib
+import re
+from collections import Counter, namedtuple
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+# Streaming parsers for bank statements (CSV and OFX).
+#
+# Both parsers consume an iterable of byte chunks (UploadedFile.chunks()) and
+# yield StatementLine tuples one at a time, so a statement of any length is
+# read in bounded memory. Only outgoing money becomes a line: credits are
+# reported as skipped by the importer, since the expense table has no
+# notion of income.
+
+StatementLine = namedtuple('StatementLine', 'line_no date amount description external_id')
+
+class StatementError(ValueError):
+    pass
+
+# Header aliases seen in Indian bank CSV exports, lower-cased.
+DATE_COLUMNS = ('date', 'transaction date', 'txn date', 'tran date', 'posting date', 'value date')
+DESCRIPTION_COLUMNS = ('description', 'narration', 'particulars', 'details', 'remarks', 'transaction details')
+AMOUNT_COLUMNS = ('amount', 'transaction amount', 'amount (inr)')
+DEBIT_COLUMNS = ('debit', 'withdrawal', 'withdrawal amt.', 'withdrawal amount', 'debit amount', 'dr')
+CREDIT_COLUMNS = ('credit', 'deposit', 'deposit amt.', 'deposit amount', 'credit amount', 'cr')
+REFERENCE_COLUMNS = ('reference', 'ref no', 'ref no./cheque no.', 'chq/ref number', 'transaction id', 'utr')
+
+# Tried in order; day-first formats come before month-first ones.
+DATE_FORMATS = (
+    '%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%d/%m/%y', '%d-%m-%y', '%d.%m.%Y',
+    '%d-%b-%Y', '%d %b %Y', '%d-%b-%y', '%d %b %y', '%Y/%m/%d', '%m/%d/%Y',
+)
+
+def iter_text_lines(chunks, encoding='utf-8-sig'):
+    """
+    Decodes byte chunks incrementally and yields complete lines.
+    """
+    pending = ''
+    for text in codecs.iterdecode(chunks, encoding, errors='replace'):
+        pending += text
+        lines = pending.splitlines(keepends=True)
+        # The last piece may be a partial line; keep it for the next chunk.
+        pending = lines.pop() if lines and not lines[-1].endswith(('\n', '\r')) else ''
+        yield from lines
+    if pending:
+        yield pending
+
+def parse_date(value, date_format=None):
+    value = value.strip()
+    formats = (date_format,) if date_format else DATE_FORMATS
+    for fmt in formats:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    raise StatementError(f"Unrecognised date '{value}'")
+
+def parse_amount(value):
+    """
+    Parses amounts such as '1,234.50', '₹ 99', '(250.00)', '-80' or
+    '500.00 Dr'. Returns a signed Decimal (negative = money out) or None for
+    an empty cell.
+    """
+    value = (value or '').strip()
+    if not value:
+        return None
+    sign = 1
+    lowered = value.lower()
+    if lowered.endswith('dr'):
+        sign, value = -1, value[:-2]
+    elif lowered.endswith('cr'):
+        value = value[:-2]
+    if value.strip().startswith('(') and value.strip().endswith(')'):
+        sign, value = -sign, value.strip()[1:-1]
+    cleaned = re.sub(r'[^0-9.\-]', '', value)
+    if cleaned.startswith('-'):
+        sign, cleaned = -sign, cleaned[1:]
+    try:
+        amount = Decimal(cleaned)
+    except InvalidOperation:
+        raise StatementError(f"Unrecognised amount '{value}'")
+    return (sign * amount).quantize(Decimal('0.01'))
+
+def _find_column(header, aliases):
+    for alias in aliases:
+        if alias in header:
+            return header[alias]
+    return None
+
+def parse_csv(chunks, date_format=None, debit_sign='negative'):
+    """
+    Yields StatementLine for each row of a CSV statement. Columns are
+    matched by header name; either a signed amount column (negative = debit
+    unless debit_sign='positive') or separate debit/credit columns.
+    Credits come through with amount 0. Malformed rows are yielded as
+    StatementError instances so the importer can count them without aborting.
+    """
+    reader = csv.reader(iter_text_lines(chunks))
+    header = None
+    for row in reader:
+        if any(cell.strip() for cell in row):
+            header = {cell.strip().lower(): index for index, cell in enumerate(row)}
+            break
+    if header is None:
+        raise StatementError("The statement is empty.")
+
+    date_col = _find_column(header, DATE_COLUMNS)
+    description_col = _find_column(header, DESCRIPTION_COLUMNS)
+    amount_col = _find_column(header, AMOUNT_COLUMNS)
+    debit_col = _find_column(header, DEBIT_COLUMNS)
+    credit_col = _find_column(header, CREDIT_COLUMNS)
+    reference_col = _find_column(header, REFERENCE_COLUMNS)
+    if date_col is None or (amount_col is None and debit_col is None):
+        raise StatementError("Could not find date and amount/debit columns in the CSV header.")
+
+    def cell(row, index):
+        return row[index] if index is not None and index < len(row) else ''
+
+    for line_no, row in enumerate(reader, start=2):
+        if not any(field.strip() for field in row):
+            continue
+        try:
+            date = parse_date(cell(row, date_col), date_format)
+            if debit_col is not None:
+                debit = parse_amount(cell(row, debit_col))
+                amount = abs(debit) if debit else None
+                if amount is None and parse_amount(cell(row, credit_col)):
+                    amount = Decimal('0')
+            else:
+                signed = parse_amount(cell(row, amount_col))
+                if signed is None:
+                    raise StatementError("Missing amount")
+                if debit_sign == 'positive':
+                    signed = -signed
+                amount = -signed if signed < 0 else Decimal('0')
+        except StatementError as e:
+            yield StatementError(f"line {line_no}: {e}")
+            continue
+        if amount is None:
+            yield StatementError(f"line {line_no}: Missing amount")
+            continue
+        yield StatementLine(line_no, date, amount, cell(row, description_col).strip(),
+                            cell(row, reference_col).strip() or None)
+
+_OFX_TAG = re.compile(r'<(/?)([A-Za-z0-9.]+)>([^<]*)')
+
+def parse_ofx(chunks):
+    """
+    Yields StatementLine for each <STMTTRN> in an OFX statement, in either
+    SGML (OFX 1.x, unclosed leaf tags) or XML (OFX 2.x) form. Credits come
+    through with amount 0.
+    """
+    pending = ''
+    transaction = None
+    line_no = 0
+    for text in codecs.iterdecode(chunks, 'utf-8', errors='replace'):
+        pending += text
+        # Only consume up to the last complete tag; the rest waits for more input.
+        cut = pending.rfind('<')
+        if cut <= 0:
+            continue
+        consumable, pending = pending[:cut], pending[cut:]
+        for closing, tag, value in _OFX_TAG.findall(consumable):
+            tag = tag.upper()
+            if tag == 'STMTTRN' and not closing:
+                transaction = {}
+            elif tag == 'STMTTRN' and closing:
+                if transaction is not None:
+                    line_no += 1
+                    yield _ofx_line(line_no, transaction)
+                transaction = None
+            elif transaction is not None and not closing:
+                transaction[tag] = value.strip()
+    for closing, tag, value in _OFX_TAG.findall(pending):
+        if tag.upper() == 'STMTTRN' and closing and transaction is not None:
+            line_no += 1
+            yield _ofx_line(line_no, transaction)
+
+def _ofx_line(line_no, transaction):
+    try:
+        posted = transaction.get('DTPOSTED', '')
+        date = datetime.strptime(posted[:8], '%Y%m%d')
+        signed = parse_amount(transaction.get('TRNAMT', ''))
+        if signed is None:
+            raise StatementError("Missing TRNAMT")
+    except (ValueError, StatementError) as e:
+        return StatementError(f"transaction {line_no}: {e}")
+    description = transaction.get('NAME') or ''
+    memo = transaction.get('MEMO')
+    if memo and memo != description:
+        description = f"{description} {memo}".strip()
+    amount = -signed if signed < 0 else Decimal('0')
+    return StatementLine(line_no, date, amount, description, transaction.get('FITID') or None)
+
+def parse_statement(chunks, statement_format, date_format=None, debit_sign='negative'):
+    if statement_format == 'ofx':
+        return parse_ofx(chunks)
+    return parse_csv(chunks, date_format=date_format, debit_sign=debit_sign)
+
+def normalize_description(description):
+    return re.sub(r'\s+', ' ', description or '').strip().lower()
+
+class Fingerprinter:
+    """
+    Computes the dedupe key stored in expense.fingerprint. Lines with a bank
+    reference (OFX FITID, CSV reference column) are keyed by it; others by
+    date, amount and description plus an occurrence counter, so two
+    identical coffees on the same day in one statement both import while
+    re-importing the statement matches both again.
+    """
+
+    def __init__(self):
+        self._seen = Counter()
+
+    def __call__(self, line):
+        if line.external_id:
+            key = f"ref|{line.external_id}"
+        else:
+            key = f"{line.date:%Y-%m-%d}|{line.amount}|{normalize_description(line.description)}"
+            self._seen[key] += 1
+            key = f"{key}|{self._seen[key]}"
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
@@ -1,7 +1,9 @@
 from django.urls import path
-from .views import add_transaction, get_recent_transaction
+from .views import add_transaction, get_recent_transaction, import_statement, import_status
 
 urlpatterns = [
     path('add/', add_transaction, name='add_transaction'),
     path('latest/', get_recent_transaction, name='get_recent_transaction'),
+    path('import/', import_statement, name='import_statement'),
+    path('import/<str:import_id>/', import_status, name='import_status'),
 ]
@@ -4,6 +4,17 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.decorators import api_view
 import uuid
+from django.conf import settings
+from django.db import IntegrityError
+from accounts.tokens import resolve_token, resolve_token_from_request
+from accounts.data_version import bump_data_version, conditional_on_data_version
+from Trackex.routers import read_connection
+from categorize.classifier import predict_category
+from anomalies.detector import observe
+from forecast.engine import record_expense
+from .importer import get_progress, import_lines, new_import_id, set_progress
+from .serializers import StatementImportSerializer
+from .statements import StatementError, parse_statement
 
 # Function to execute database queries
 def execute_query(query, params=None, fetch_one=False):
@@ -30,11 +41,9 @@ def add_transaction(request):
 
     try:
         # Find the user associated with the token.
-        query = "SELECT user_id FROM user_token WHERE token = %s"
-        user_token = execute_query(query, [token], fetch_one=True)
-        if not user_token:
+        user_id = resolve_token(token)
+        if user_id is None:
             return Response({'error': 'Invalid token'}, status=status.HTTP_401_UNAUTHORIZED)
-        user_id = user_token[0]
 
         # Extract transaction details from the request data.
         # Now expected: 'category_name', 'category_description', 'amount', 'date', and 'payment_method'
@@ -44,7 +53,10 @@ def add_transaction(request):
         date_str = request.data.get('date')
         payment_method = request.data.get('payment_method')
 
-        # Validate that all fields are provided.
+        # Validate that all fields are provided. category_name may be left
+        # out when the categorizer is confident enough to pick one.
+        if not category_name and category_description and amount:
+            category_name = predict_category(category_description, amount, payment_method)
         if not category_name or not category_description or not amount or not date_str or not payment_method:
             return Response({'error': 'Please fill all fields'}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -69,9 +81,15 @@ def add_transaction(request):
             INSERT INTO expense (user_id, category_id, amount, date, payment_method, description)
             VALUES (%s, %s, %s, %s, %s, %s)
         """
-        execute_query(insert_expense_query, [user_id, category_id, amount, dt_str, payment_method, category_description])
+        with connection.cursor() as cursor:
+            cursor.execute(insert_expense_query, [user_id, category_id, amount, dt_str, payment_method, category_description])
+            expense_id = cursor.lastrowid
+        bump_data_version(user_id)
+        record_expense(user_id, category_id, amount, dt)
+        flags = observe(user_id, category_id, amount, payment_method, expense_id)
 
-        return Response({"message": "Transaction added successfully"}, status=status.HTTP_201_CREATED)
+        return Response({"message": "Transaction added successfully", "category": category_name, "flags": flags},
+                        status=status.HTTP_201_CREATED)
 
     except Exception as e:
         return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -82,6 +100,7 @@ def add_transaction(request):
 # Returns category, description, amount, date, and time (separately)
 # --------------------------------------------------------------
 @api_view(['GET'])
+@conditional_on_data_version
 def get_recent_transaction(request):
     # Extract the token from the Authorization header or query parameter.
     token = request.headers.get('Authorization') or request.GET.get('token')
@@ -95,11 +114,9 @@ def get_recent_transaction(request):
   
     try:
         # Get the user_id associated with the token.
-        query = "SELECT user_id FROM user_token WHERE token = %s"
-        user_token = execute_query(query, [token], fetch_one=True)
-        if not user_token:
+        user_id = resolve_token(token)
+        if user_id is None:
             return Response({'error': 'Invalid token'}, status=status.HTTP_401_UNAUTHORIZED)
-        user_id = user_token[0]
 
         # Fetch the last 3 transactions for this user using a JOIN to get the category name.
         latest_query = """
@@ -110,7 +127,9 @@ def get_recent_transaction(request):
             ORDER BY e.date DESC, e.expense_id DESC
             LIMIT 3
         """
-        transactions = execute_query(latest_query, [user_id])
+        with read_connection(user_id).cursor() as cursor:
+            cursor.execute(latest_query, [user_id])
+            transactions = cursor.fetchall()
         if not transactions:
             return Response({'error': 'No transactions found for this user'}, status=status.HTTP_404_NOT_FOUND)
 
@@ -137,3 +156,72 @@ def get_recent_transaction(request):
 
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+# --------------------------------------------------------------
+# Bank statement import (CSV / OFX)
+# --------------------------------------------------------------
+@api_view(['POST'])
+def import_statement(request):
+    """
+    Imports the debits of a bank statement as expenses.
+    Expects (multipart form):
+      - file: the CSV or OFX statement
+      - statement_format: 'csv' or 'ofx' (default: from the file extension)
+      - date_format: strptime format for CSV dates (default: auto-detect)
+      - debit_sign: 'negative' (default) or 'positive', for a signed CSV amount column
+      - default_category: category for lines neither the keyword rules nor the
+        categorizer can place
+      - payment_method (default 'Bank Statement')
+      - import_id: optional 32-char hex id to poll import/<import_id>/ with
+    Lines already imported (same fingerprint) are skipped.
+    """
+    user_id = resolve_token_from_request(request)
+    if user_id is None:
+        return Response({'error': 'Invalid or missing token'}, status=status.HTTP_401_UNAUTHORIZED)
+
+    serializer = StatementImportSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    data = serializer.validated_data
+
+    upload = data['file']
+    max_bytes = getattr(settings, 'STATEMENT_IMPORT_MAX_BYTES', 20 * 1024 * 1024)
+    if upload.size > max_bytes:
+        return Response({'error': f'Statement is larger than {max_bytes} bytes'},
+                        status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+    import_id = data.get('import_id') or new_import_id()
+    set_progress(user_id, import_id, {'import_id': import_id, 'status': 'running', 'lines_read': 0})
+    try:
+        lines = parse_statement(upload.chunks(), data['statement_format'],
+                                date_format=data.get('date_format'), debit_sign=data['debit_sign'])
+        result = import_lines(user_id, lines, import_id, data['payment_method'],
+                              default_category=data.get('default_category'))
+    except StatementError as e:
+        set_progress(user_id, import_id, {'import_id': import_id, 'status': 'failed', 'error': str(e)})
+        return Response({'error': str(e), 'import_id': import_id}, status=status.HTTP_400_BAD_REQUEST)
+    except IntegrityError:
+        set_progress(user_id, import_id, {'import_id': import_id, 'status': 'failed'})
+        return Response({'error': 'This statement is already being imported', 'import_id': import_id},
+                        status=status.HTTP_409_CONFLICT)
+    except Exception as e:
+        set_progress(user_id, import_id, {'import_id': import_id, 'status': 'failed', 'error': str(e)})
+        return Response({'error': str(e), 'import_id': import_id}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    if result['inserted']:
+        bump_data_version(user_id)
+    return Response(result, status=status.HTTP_201_CREATED if result['inserted'] else status.HTTP_200_OK)
+
+@api_view(['GET'])
+def import_status(request, import_id):
+    """
+    Returns the progress of a statement import started by this user.
+    """
+    user_id = resolve_token_from_request(request)
+    if user_id is None:
+        return Response({'error': 'Invalid or missing token'}, status=status.HTTP_401_UNAUTHORIZED)
+    progress = get_progress(user_id, import_id)
+    if progress is None:
+        return Response({'error': 'Import not found'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(progress, status=status.HTTP_200_OK)
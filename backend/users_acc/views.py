@@ -2,6 +2,9 @@ from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
 from django.db import connection
+from accounts.tokens import resolve_token
+from accounts.data_version import conditional_on_data_version
+from ledger.balances import current_balance
 
 def execute_query(query, params=None, fetch_one=False):
     """
@@ -14,6 +17,7 @@ def execute_query(query, params=None, fetch_one=False):
         return cursor.fetchall()
 
 @api_view(['GET'])
+@conditional_on_data_version
 def account_details(request):
     """
     Fetch account details (account number and balance) for the currently logged-in user.
@@ -33,24 +37,24 @@ def account_details(request):
 
     try:
         # Retrieve the user_id associated with the token.
-        query = "SELECT user_id FROM user_token WHERE token = %s"
-        user_token = execute_query(query, [token], fetch_one=True)
-        if not user_token:
+        user_id = resolve_token(token)
+        if user_id is None:
             return Response({'error': 'Invalid token'}, status=status.HTTP_401_UNAUTHORIZED)
-        user_id = user_token[0]
 
         # Use raw SQL to fetch account details by joining app_accounts and bank_accounts.
         account_query = """
-            SELECT b.account_number, b.balance
+            SELECT b.account_number, b.bank_acc_id, b.balance
             FROM app_accounts a
             JOIN bank_accounts b ON a.bank_acc_id = b.bank_acc_id
             WHERE a.user_id = %s
         """
-        row = execute_query(account_query, [user_id], fetch_one=True)
-        if not row:
-            return Response({'detail': 'No account details found.'}, status=status.HTTP_404_NOT_FOUND)
-        
-        account_number, balance = row
+        with connection.cursor() as cursor:
+            cursor.execute(account_query, [user_id])
+            row = cursor.fetchone()
+            if not row:
+                return Response({'detail': 'No account details found.'}, status=status.HTTP_404_NOT_FOUND)
+            account_number, bank_acc_id, opening = row
+            balance = current_balance(cursor, bank_acc_id, opening)
         data = {
             'account_number': account_number,
             'balance': float(balance),